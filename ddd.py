@@ -2,31 +2,53 @@
 바이낸스 오더북 & 체결 데이터 수집기
 - BTC/USDT, ETH/USDT, XRP/USDT
 - WebSocket 스트리밍 (100ms 오더북 + 체결 틱)
-- 메모리 버퍼링 → 1시간마다 Parquet 저장
+- 메모리 버퍼링 → 1분마다 row group 추가, 1시간 단위 Parquet 파일
 - 7일 지난 파일 자동 삭제
 """
 
 import asyncio
-import json
 import time
 import os
-import glob
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
-import websockets
-import pandas as pd
+import aiohttp
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 # ── 설정 ──
 SYMBOLS = ["btcusdt", "ethusdt", "xrpusdt"]
 DATA_DIR = Path("./data")
-FLUSH_INTERVAL = 3600  # 1시간(초)
+FLUSH_INTERVAL = 60    # 버퍼 → row group 추가 주기(초), 파일은 1시간 단위
 CLEANUP_DAYS = 7       # 7일 지난 파일 삭제
+ROW_GROUP_SIZE = 128_000  # Parquet row group 크기 (writer 메모리 상한)
+COMPRESSION_LEVEL = 1  # zstd 레벨 (메인 수집기 Flusher 기본값과 동일)
+
+ORDERBOOK_SCHEMA = pa.schema([
+    ("ts", pa.float64()), ("symbol", pa.string()),
+    ("bids", pa.list_(pa.list_(pa.string(), 2))),  # [[price, qty], ...]
+    ("asks", pa.list_(pa.list_(pa.string(), 2))), ("event_time", pa.int64()),
+])
+TRADE_SCHEMA = pa.schema([
+    ("ts", pa.float64()), ("symbol", pa.string()), ("price", pa.float64()),
+    ("qty", pa.float64()), ("trade_time", pa.int64()), ("is_buyer_maker", pa.bool_()),
+])
 
 # 메모리 버퍼
 orderbook_buffer = []
 trade_buffer = []
-buffer_lock = asyncio.Lock()
+# 락 없음: collect와 flush_to_parquet는 같은 이벤트 루프 스레드에서 돌고,
+# append와 버퍼 교체 사이에 await가 없어 서로 끼어들 수 없다.
+
+# 파일 쓰기 전용 스레드 (이벤트 루프가 Parquet 쓰기 동안 멈추지 않도록)
+io_executor = ThreadPoolExecutor(max_workers=1)
+
+# 열린 ParquetWriter: (종류, 시간 태그) → writer. io_executor 스레드에서만 접근
+# 단독 스크립트라 체크섬/업로드 단계가 없어 시간당 파일 하나를 택함 - 대신 비정상 종료
+# (kill -9, 전원)로 footer를 못 쓰면 그 시간 파일은 읽을 수 없다. src/ 수집기는 플러시마다 닫힌 파일
+writers = {}
 
 
 def build_ws_url():
@@ -41,92 +63,160 @@ def build_ws_url():
 async def collect(ws):
     """웹소켓에서 데이터 수신 → 메모리 버퍼에 적재"""
     async for msg in ws:
-        data = json.loads(msg)
+        if msg.type is aiohttp.WSMsgType.ERROR:
+            raise ws.exception() or ConnectionError("WebSocket 수신 에러")
+        data = orjson.loads(msg.data)  # decode_text=False → bytes 그대로 (UTF-8 디코딩 생략)
         stream = data.get("stream", "")
         payload = data.get("data", {})
         ts = time.time()
 
-        async with buffer_lock:
-            if "depth" in stream:
-                orderbook_buffer.append({
-                    "ts": ts,
-                    "symbol": stream.split("@")[0].upper(),
-                    "bids": json.dumps(payload.get("b", [])[:20]),  # 상위 20호가
-                    "asks": json.dumps(payload.get("a", [])[:20]),
-                    "event_time": payload.get("E", 0),
-                })
-            elif "aggTrade" in stream:
-                trade_buffer.append({
-                    "ts": ts,
-                    "symbol": payload.get("s", ""),
-                    "price": float(payload.get("p", 0)),
-                    "qty": float(payload.get("q", 0)),
-                    "trade_time": payload.get("T", 0),
-                    "is_buyer_maker": payload.get("m", False),
-                })
+        if "depth" in stream:
+            orderbook_buffer.append({
+                "ts": ts,
+                "symbol": stream.split("@")[0].upper(),
+                "bids": payload.get("b", [])[:20],  # 상위 20호가 (중첩 list 그대로)
+                "asks": payload.get("a", [])[:20],
+                "event_time": payload.get("E", 0),
+            })
+        elif "aggTrade" in stream:
+            trade_buffer.append({
+                "ts": ts,
+                "symbol": payload.get("s", ""),
+                "price": float(payload.get("p", 0)),
+                "qty": float(payload.get("q", 0)),
+                "trade_time": payload.get("T", 0),
+                "is_buyer_maker": payload.get("m", False),
+            })
 
 
 async def flush_to_parquet():
-    """주기적으로 메모리 버퍼 → Parquet 파일 저장"""
+    """주기적으로 메모리 버퍼 → 현재 시간대 Parquet 파일에 row group 추가"""
+    global orderbook_buffer, trade_buffer
     DATA_DIR.mkdir(exist_ok=True)
+    loop = asyncio.get_running_loop()
+    last_tag = None
+
+    try:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            tag = datetime.now().strftime("%Y%m%d_%H")
+
+            # 복사 대신 리스트 교체 (O(1)) - collect는 다음 append부터 새 리스트에 적재
+            ob_data, orderbook_buffer = orderbook_buffer, []
+            tr_data, trade_buffer = trade_buffer, []
+
+            if ob_data:
+                await write_batch(loop, "orderbook", ORDERBOOK_SCHEMA, ob_data, tag)
+            if tr_data:
+                await write_batch(loop, "trades", TRADE_SCHEMA, tr_data, tag)
+
+            # 시간이 바뀔 때마다 7일 지난 파일 자동 삭제 (실패해도 다음 시간에 다시 시도)
+            if tag != last_tag:
+                last_tag = tag
+                try:
+                    await loop.run_in_executor(io_executor, cleanup_old_files)
+                except Exception as e:
+                    print(f"[에러] 오래된 파일 정리 실패: {e}")
+    finally:
+        # 진행 중인 쓰기가 끝난 뒤 footer 기록 (닫지 않은 Parquet 파일은 읽을 수 없음)
+        # I/O 스레드 큐 뒤에 넣고 await - footer 쓰는 동안 이벤트 루프를 막지 않음
+        await loop.run_in_executor(io_executor, close_writers)
+
+
+async def write_batch(loop, kind, schema, records, tag):
+    """배치 하나를 I/O 스레드에서 추가. 실패하면 배치를 버리고 알림 - 저장 루프는 계속 돈다
+
+    되돌려 넣으면 잘못된 행/가득 찬 디스크에서 같은 실패가 반복되며 버퍼가 끝없이 커지므로 폐기.
+    """
+    try:
+        await loop.run_in_executor(io_executor, append_parquet, kind, schema, records, tag)
+        print(f"[저장] {kind}_{tag} +{len(records)}건")
+    except Exception as e:
+        print(f"[에러] {kind}_{tag} 저장 실패, {len(records)}건 폐기: {e}")
+
+
+def append_parquet(kind, schema, records, tag):
+    """레코드 리스트를 (kind, tag) 파일에 row group으로 추가. 시간이 바뀌면 이전 파일 마감
+
+    변환 실패(잘못된 행)는 writer를 건드리지 않는다. 쓰기 실패(디스크 등)면 그 writer를
+    닫아 이미 쓴 row group까지는 읽을 수 있게 두고, 다음 배치는 번호 붙은 새 파일로 시작.
+    """
+    table = pa.Table.from_pylist(records, schema=schema)
+    for key in [k for k in writers if k[0] == kind and k[1] != tag]:
+        writers.pop(key).close()
+        print(f"[마감] {key[0]}_{key[1]}")
+
+    writer = writers.get((kind, tag))
+    if writer is None:
+        path = DATA_DIR / f"{kind}_{tag}.parquet"
+        n = 1
+        while path.exists():  # 재시작 시 같은 시간대 기존 파일 덮어쓰기 방지
+            path = DATA_DIR / f"{kind}_{tag}_{n}.parquet"
+            n += 1
+        writer = pq.ParquetWriter(path, schema, compression="zstd",
+                                  compression_level=COMPRESSION_LEVEL, use_dictionary=True)
+        writers[(kind, tag)] = writer
+
+    try:
+        writer.write_table(table, row_group_size=ROW_GROUP_SIZE)
+    except Exception:
+        writers.pop((kind, tag))
+        try:
+            writer.close()
+        except Exception:
+            pass
+        raise
 
-    while True:
-        await asyncio.sleep(FLUSH_INTERVAL)
-        now = datetime.now()
-        tag = now.strftime("%Y%m%d_%H")
-
-        async with buffer_lock:
-            ob_data = orderbook_buffer.copy()
-            tr_data = trade_buffer.copy()
-            orderbook_buffer.clear()
-            trade_buffer.clear()
-
-        if ob_data:
-            df = pd.DataFrame(ob_data)
-            path = DATA_DIR / f"orderbook_{tag}.parquet"
-            df.to_parquet(path, index=False)
-            print(f"[저장] {path} ({len(ob_data)}건)")
-
-        if tr_data:
-            df = pd.DataFrame(tr_data)
-            path = DATA_DIR / f"trades_{tag}.parquet"
-            df.to_parquet(path, index=False)
-            print(f"[저장] {path} ({len(tr_data)}건)")
 
-        # 7일 지난 파일 자동 삭제
-        cleanup_old_files()
+def close_writers():
+    """열린 ParquetWriter 모두 닫기"""
+    for writer in writers.values():
+        writer.close()
+    writers.clear()
 
 
 def cleanup_old_files():
     """CLEANUP_DAYS일 지난 parquet 파일 삭제"""
     cutoff = time.time() - (CLEANUP_DAYS * 86400)
-    for f in glob.glob(str(DATA_DIR / "*.parquet")):
-        if os.path.getmtime(f) < cutoff:
-            os.remove(f)
-            print(f"[삭제] {f}")
+    # scandir 한 번으로 이름 필터 + DirEntry.stat() (파일당 stat 1회, 윈도우는 캐시)
+    with os.scandir(DATA_DIR) as it:
+        for entry in it:
+            if entry.name.endswith(".parquet") and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                print(f"[삭제] {entry.path}")
 
 
 async def main():
     url = build_ws_url()
     print(f"[시작] 바이낸스 오더북 수집기")
     print(f"[대상] {', '.join(s.upper() for s in SYMBOLS)}")
-    print(f"[저장] {FLUSH_INTERVAL}초마다 → {DATA_DIR}/")
+    print(f"[저장] {FLUSH_INTERVAL}초마다 → {DATA_DIR}/ (1시간 단위 파일)")
     print(f"[정리] {CLEANUP_DAYS}일 지난 파일 자동 삭제")
     print()
 
-    while True:
-        try:
-            async with websockets.connect(url, ping_interval=20) as ws:
-                print(f"[연결] 바이낸스 WebSocket 연결 성공")
-                # 수집과 저장을 동시에 실행
-                await asyncio.gather(
-                    collect(ws),
-                    flush_to_parquet(),
-                )
-        except Exception as e:
-            print(f"[에러] {e} — 5초 후 재연결...")
-            await asyncio.sleep(5)
+    # 저장 태스크는 재연결과 무관하게 하나만 유지 (열린 writer 공유)
+    flush_task = asyncio.create_task(flush_to_parquet())
+    try:
+        while True:
+            try:
+                async with aiohttp.ClientSession() as session, \
+                        session.ws_connect(url, heartbeat=20, max_msg_size=2**22,
+                                           compress=0, decode_text=False) as ws:
+                    print(f"[연결] 바이낸스 WebSocket 연결 성공")
+                    await collect(ws)
+                    raise ConnectionError(f"WebSocket 연결 종료 (code={ws.close_code})")
+            except Exception as e:
+                print(f"[에러] {e} — 5초 후 재연결...")
+                await asyncio.sleep(5)
+    finally:
+        flush_task.cancel()
+        await asyncio.gather(flush_task, return_exceptions=True)
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop  # 선택: 리눅스/맥에서 이벤트 루프 가속
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -1,19 +1,18 @@
 """6심볼 5분 수집 테스트 → CSV 출력"""
 
 import asyncio
-import json
 import logging
 import time
 import sys
 from pathlib import Path
-from dataclasses import asdict
 
-import websockets
+import aiohttp
+import orjson
 import pandas as pd
 
-from src.models import AggTradeEvent, KlineEvent, OrderBookSnapshot, DepthDiffEvent
+from src.models import AggTradeEvent, KlineEvent, DepthDiffEvent
 from src.orderbook_manager import OrderBookManager
-from src.buffer import DataBuffer
+from src.buffer import DataBuffer, row_getter
 from src.integrity_logger import IntegrityLogger
 
 # 갭 로그 너무 많이 찍히는 거 방지
@@ -24,6 +23,9 @@ COLLECT_SECONDS = 120
 DATA_DIR = Path("./data_test2")
 DATA_DIR.mkdir(exist_ok=True)
 
+_TRADE_ROW = row_getter(AggTradeEvent)
+_KLINE_ROW = row_getter(KlineEvent)
+
 
 async def main():
     print(f"🚀 바이낸스 데이터 수집 시작 ({COLLECT_SECONDS}초)...")
@@ -45,7 +47,9 @@ async def main():
     start = time.time()
 
     print(f"  🔗 WebSocket 연결 중...")
-    async with websockets.connect(url, ping_interval=20) as ws:
+    async with aiohttp.ClientSession() as session, \
+            session.ws_connect(url, heartbeat=20, max_msg_size=2**22,
+                               compress=0, decode_text=False) as ws:
         print(f"  ✅ 연결 성공!")
 
         # WS 연결 후 스냅샷 가져오기 (공식 가이드 순서)
@@ -60,9 +64,13 @@ async def main():
 
         while time.time() - start < COLLECT_SECONDS:
             try:
-                raw = await asyncio.wait_for(ws.recv(), timeout=5)
+                msg = await ws.receive(timeout=5)
+                if msg.type not in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                    print(f"\n  ❌ 연결 종료: {msg.type}")
+                    break
+                raw = msg.data
                 recv_time = time.time()
-                data = json.loads(raw)
+                data = orjson.loads(raw)
                 stream = data.get("stream", "")
                 payload = data.get("data", {})
 
@@ -77,9 +85,9 @@ async def main():
                         bids=payload.get("b", []),
                         asks=payload.get("a", []),
                     )
-                    snapshot = ob_manager.apply_diff(sym_name, event)
-                    if snapshot:
-                        await buffer.add_orderbook(sym_name, asdict(snapshot))
+                    row = ob_manager.apply_diff(sym_name, event)
+                    if row:
+                        buffer.add_orderbook(sym_name, row)
                         counts["orderbook"] += 1
                     elif not ob_manager.books[sym_name].initialized and sym_name not in reinit_lock:
                         reinit_lock.add(sym_name)
@@ -95,15 +103,15 @@ async def main():
                     event = AggTradeEvent(
                         symbol=payload.get("s", ""),
                         trade_id=payload.get("a", 0),
-                        price=payload.get("p", "0"),
-                        quantity=payload.get("q", "0"),
+                        price=float(payload.get("p", "0")),
+                        quantity=float(payload.get("q", "0")),
                         first_trade_id=payload.get("f", 0),
                         last_trade_id=payload.get("l", 0),
                         trade_time=payload.get("T", 0),
                         recv_time=recv_time,
                         is_buyer_maker=payload.get("m", False),
                     )
-                    await buffer.add_trade(event.symbol, asdict(event))
+                    buffer.add_trade(event.symbol, _TRADE_ROW(event))
                     counts["trade"] += 1
 
                 elif "kline" in stream:
@@ -113,12 +121,12 @@ async def main():
                             symbol=k.get("s", ""),
                             open_time=k.get("t", 0),
                             close_time=k.get("T", 0),
-                            open=k.get("o", "0"), high=k.get("h", "0"),
-                            low=k.get("l", "0"), close=k.get("c", "0"),
-                            volume=k.get("v", "0"), quote_volume=k.get("q", "0"),
+                            open=float(k.get("o", "0")), high=float(k.get("h", "0")),
+                            low=float(k.get("l", "0")), close=float(k.get("c", "0")),
+                            volume=float(k.get("v", "0")), quote_volume=float(k.get("q", "0")),
                             trade_count=k.get("n", 0), recv_time=recv_time,
                         )
-                        await buffer.add_kline(event.symbol, asdict(event))
+                        buffer.add_kline(event.symbol, _KLINE_ROW(event))
                         counts["kline"] += 1
 
                 elapsed = int(time.time() - start)
@@ -145,13 +153,13 @@ async def main():
         total = ob_cnt + tr_cnt + kl_cnt
         print(f"  {sym_upper:12s} | 오더북: {ob_cnt:>5,} | 체결: {tr_cnt:>5,} | 캔들: {kl_cnt:>3} | 합계: {total:>6,}")
 
-    data = await buffer.flush()
+    data = buffer.flush()
 
     for symbol in SYMBOLS:
         sym = symbol.upper()
         ob_records = data["orderbook"].get(sym, [])
         if ob_records:
-            df = pd.DataFrame(ob_records)
+            df = pd.DataFrame(ob_records.to_pydict())
             df["datetime_utc"] = pd.to_datetime(df["event_time"], unit="ms").dt.strftime("%Y-%m-%d %H:%M:%S.%f")
             df["recv_datetime_utc"] = pd.to_datetime(df["recv_time"], unit="s").dt.strftime("%Y-%m-%d %H:%M:%S.%f")
             csv_path = DATA_DIR / f"{sym}_orderbook.csv"
@@ -160,7 +168,7 @@ async def main():
 
         trade_records = data["trade"].get(sym, [])
         if trade_records:
-            df = pd.DataFrame(trade_records)
+            df = pd.DataFrame(trade_records.to_pydict())
             df["datetime_utc"] = pd.to_datetime(df["trade_time"], unit="ms").dt.strftime("%Y-%m-%d %H:%M:%S.%f")
             df["recv_datetime_utc"] = pd.to_datetime(df["recv_time"], unit="s").dt.strftime("%Y-%m-%d %H:%M:%S.%f")
             csv_path = DATA_DIR / f"{sym}_trades.csv"
@@ -172,7 +180,7 @@ async def main():
     print("="*60)
     btc_trades = data["trade"].get("BTCUSDT", [])
     if btc_trades:
-        df = pd.DataFrame(btc_trades[-10:])
+        df = pd.DataFrame(btc_trades.to_pydict()).tail(10)
         df["trade_time_str"] = pd.to_datetime(df["trade_time"], unit="ms")
         print(df[["trade_time_str", "price", "quantity", "is_buyer_maker"]].to_string(index=False))
 
@@ -181,9 +189,8 @@ async def main():
     print("="*60)
     btc_ob = data["orderbook"].get("BTCUSDT", [])
     if btc_ob:
-        for i, rec in enumerate(btc_ob[-3:]):
-            bids = json.loads(rec["bids"]) if isinstance(rec["bids"], str) else rec["bids"]
-            asks = json.loads(rec["asks"]) if isinstance(rec["asks"], str) else rec["asks"]
+        for i, rec in enumerate(btc_ob[j] for j in range(max(len(btc_ob) - 3, 0), len(btc_ob))):
+            bids, asks = rec["bids"], rec["asks"]
             print(f"\n  [{i+1}] update_id={rec['last_update_id']}")
             print(f"      최우선 매수: {bids[0][0]} x {bids[0][1]}")
             print(f"      최우선 매도: {asks[0][0]} x {asks[0][1]}")
@@ -194,4 +201,9 @@ async def main():
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop  # 선택: 리눅스/맥에서 이벤트 루프 가속
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
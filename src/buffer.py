@@ -2,75 +2,155 @@
 
 from __future__ import annotations
 
-import asyncio
 import sys
 import logging
+from array import array
 from collections import defaultdict
+from dataclasses import fields
+from operator import attrgetter
+from typing import Any, Callable, Iterator
+
+import numpy as np
+
+from src.models import (
+    DECIMAL_FIELDS, OrderBookSnapshot, AggTradeEvent, LiquidationEvent, KlineEvent,
+    FundingRateRecord,
+)
 
 logger = logging.getLogger(__name__)
 
+# 필드 타입 → array 타입코드 (그 외 타입은 파이썬 list 컬럼). bool은 1바이트 0/1
+_TYPECODES = {int: "q", float: "d", bool: "b"}
+# 필드명별 타입코드 예외 - 청산 side는 1바이트 코드 (models.SIDE_CODES)
+_FIELD_TYPECODES = {"side": "b"}
+
+
+def row_getter(model: type) -> Callable[[Any], tuple]:
+    """dataclass 인스턴스 → 필드 순서 튜플 변환기 (asdict 대체)"""
+    return attrgetter(*(f.name for f in fields(model)))
+
+
+class ColumnBatch:
+    """한 스트림/심볼의 컬럼 지향(SoA) 저장소 - 숫자 컬럼은 타입 배열, 나머지는 list"""
+
+    __slots__ = ("names", "_columns", "_appends", "_bool_names")
+
+    def __init__(self, model: type, decimal_as_str: bool = False):
+        model_fields = fields(model)
+        self.names: tuple[str, ...] = tuple(f.name for f in model_fields)
+        self._columns: list[array | list] = []
+        for f in model_fields:
+            if decimal_as_str and f.name in DECIMAL_FIELDS:
+                typecode = None
+            else:
+                typecode = _FIELD_TYPECODES.get(f.name) or _TYPECODES.get(f.type)
+            self._columns.append(array(typecode) if typecode else [])
+        self._appends = [col.append for col in self._columns]
+        self._bool_names = frozenset(f.name for f in model_fields if f.type is bool)
+
+    def append(self, row: tuple) -> None:
+        """모델 필드 순서의 튜플 한 행 추가"""
+        for append, value in zip(self._appends, row):
+            append(value)
+
+    def __len__(self) -> int:
+        return len(self._columns[0])
+
+    def __getitem__(self, index: int) -> dict:
+        """단일 행을 dict로 반환 (디버그/미리보기용)"""
+        return {name: col[index] for name, col in zip(self.names, self._columns)}
+
+    def column(self, name: str) -> array | list:
+        return self._columns[self.names.index(name)]
+
+    def to_pydict(self) -> dict[str, list | np.ndarray]:
+        """컬럼명 → 컬럼 (DataFrame/Arrow 테이블 생성용, 복사 없음)
+
+        타입 배열은 같은 메모리 위의 numpy 뷰로 반환해 int8/int64/float64 dtype을 유지하고,
+        bool 필드는 0/1 바이트 위의 bool 뷰 → Parquet BOOLEAN(비트 패킹).
+        뷰가 살아 있는 동안 배열 크기를 바꿀 수 없으므로 flush()로 분리된 배치에서 호출한다.
+        """
+        return {
+            name: col if isinstance(col, list)
+            else np.frombuffer(col, dtype=np.bool_ if name in self._bool_names else col.typecode)
+            for name, col in zip(self.names, self._columns)
+        }
+
+    def iter_chunks(self, rows: int) -> Iterator[dict[str, list | np.ndarray]]:
+        """to_pydict()를 rows행 단위로 잘라 순서대로 반환 (numpy 뷰/list 슬라이스)"""
+        cols = self.to_pydict()
+        for start in range(0, len(self), rows):
+            yield {name: col[start:start + rows] for name, col in cols.items()}
+
+    def nbytes(self) -> int:
+        """메모리 사용량 추정 - 타입 배열은 정확, list 컬럼은 첫 원소로 표본 추정"""
+        total = 0
+        for col in self._columns:
+            total += sys.getsizeof(col)
+            if isinstance(col, list) and col:
+                total += len(col) * sys.getsizeof(col[0])
+        return total
+
 
 class DataBuffer:
     """메모리 버퍼 - 심볼별 오더북/체결/청산/캔들/펀딩비 데이터 저장"""
 
-    def __init__(self, max_memory_mb: int = 500):
+    def __init__(self, max_memory_mb: int = 500, preserve_decimal_strings: bool = False):
         self.max_memory_bytes = max_memory_mb * 1024 * 1024
-        self._orderbook_data: dict[str, list[dict]] = defaultdict(list)
-        self._trade_data: dict[str, list[dict]] = defaultdict(list)
-        self._liquidation_data: dict[str, list[dict]] = defaultdict(list)
-        self._kline_data: dict[str, list[dict]] = defaultdict(list)
-        self._funding_data: list[dict] = []
-        self._lock = asyncio.Lock()
-
-    async def add_orderbook(self, symbol: str, record: dict) -> None:
-        async with self._lock:
-            self._orderbook_data[symbol].append(record)
-
-    async def add_trade(self, symbol: str, record: dict) -> None:
-        async with self._lock:
-            self._trade_data[symbol].append(record)
-
-    async def add_liquidation(self, symbol: str, record: dict) -> None:
-        async with self._lock:
-            self._liquidation_data[symbol].append(record)
-
-    async def add_kline(self, symbol: str, record: dict) -> None:
-        async with self._lock:
-            self._kline_data[symbol].append(record)
-
-    async def add_funding_rate(self, record: dict) -> None:
-        async with self._lock:
-            self._funding_data.append(record)
-
-    async def flush(self) -> dict[str, dict[str, list[dict]] | list[dict]]:
-        """모든 데이터를 반환하고 버퍼 초기화"""
-        async with self._lock:
-            result = {
-                "orderbook": dict(self._orderbook_data),
-                "trade": dict(self._trade_data),
-                "liquidation": dict(self._liquidation_data),
-                "kline": dict(self._kline_data),
-                "funding": list(self._funding_data),
-            }
-            self._orderbook_data = defaultdict(list)
-            self._trade_data = defaultdict(list)
-            self._liquidation_data = defaultdict(list)
-            self._kline_data = defaultdict(list)
-            self._funding_data = []
-            return result
+        self.preserve_decimal_strings = preserve_decimal_strings
+        # 레코드 dict 대신 심볼별 컬럼 배열: dict/박싱 오버헤드 제거, 플러시 시 전치 불필요.
+        # 메모리 상한은 강제 플러시가 담당 (틱 유실 방지를 위해 고정 용량 링은 쓰지 않음).
+        self._orderbook_data: dict[str, ColumnBatch] = self._new_store(OrderBookSnapshot)
+        self._trade_data: dict[str, ColumnBatch] = self._new_store(AggTradeEvent)
+        self._liquidation_data: dict[str, ColumnBatch] = self._new_store(LiquidationEvent)
+        self._kline_data: dict[str, ColumnBatch] = self._new_store(KlineEvent)
+        self._funding_data: ColumnBatch = ColumnBatch(FundingRateRecord)
+
+    def _new_store(self, model: type) -> dict[str, ColumnBatch]:
+        return defaultdict(lambda: ColumnBatch(model, self.preserve_decimal_strings))
+
+    # 모든 생산자/소비자는 같은 이벤트 루프 스레드에서 실행되고 add_*/flush 사이에
+    # await 지점이 없으므로 락 없이 동기 append/swap으로 충분하다.
+    # 각 add_*의 row는 해당 모델(dataclass)의 필드 순서 튜플이다.
+
+    def add_orderbook(self, symbol: str, row: tuple) -> None:
+        self._orderbook_data[symbol].append(row)
+
+    def add_trade(self, symbol: str, row: tuple) -> None:
+        self._trade_data[symbol].append(row)
+
+    def add_liquidation(self, symbol: str, row: tuple) -> None:
+        self._liquidation_data[symbol].append(row)
+
+    def add_kline(self, symbol: str, row: tuple) -> None:
+        self._kline_data[symbol].append(row)
+
+    def add_funding_rate(self, row: tuple) -> None:
+        self._funding_data.append(row)
+
+    def flush(self) -> dict[str, dict[str, ColumnBatch] | ColumnBatch]:
+        """모든 데이터를 반환하고 버퍼 초기화 (복사 없이 저장소 교체)"""
+        orderbook, self._orderbook_data = self._orderbook_data, self._new_store(OrderBookSnapshot)
+        trade, self._trade_data = self._trade_data, self._new_store(AggTradeEvent)
+        liquidation, self._liquidation_data = self._liquidation_data, self._new_store(LiquidationEvent)
+        kline, self._kline_data = self._kline_data, self._new_store(KlineEvent)
+        funding, self._funding_data = self._funding_data, ColumnBatch(FundingRateRecord)
+        return {
+            "orderbook": dict(orderbook),
+            "trade": dict(trade),
+            "liquidation": dict(liquidation),
+            "kline": dict(kline),
+            "funding": funding,
+        }
 
     def estimate_memory_usage(self) -> int:
-        """현재 메모리 사용량 추정 (바이트)"""
+        """현재 메모리 사용량 추정 (바이트) - 레코드 수가 아닌 컬럼 수에 비례"""
         total = 0
         for store in [self._orderbook_data, self._trade_data,
                       self._liquidation_data, self._kline_data]:
-            for records in store.values():
-                total += sys.getsizeof(records)
-                for r in records:
-                    total += sys.getsizeof(r)
-        total += sys.getsizeof(self._funding_data)
-        for r in self._funding_data:
-            total += sys.getsizeof(r)
+            for batch in store.values():
+                total += batch.nbytes()
+        total += self._funding_data.nbytes()
         return total
 
     def needs_force_flush(self) -> bool:
@@ -3,17 +3,14 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 import time
-from dataclasses import asdict
 from typing import TYPE_CHECKING
 
-import websockets
+import aiohttp
+import msgspec
 
-from src.models import (
-    DepthDiffEvent, AggTradeEvent, LiquidationEvent, KlineEvent,
-)
+from src.models import SIDE_CODES, SIDE_UNKNOWN, DepthDiffEvent
 
 if TYPE_CHECKING:
     from src.buffer import DataBuffer
@@ -25,11 +22,80 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+# ── 바이낸스 wire 포맷 (msgspec이 JSON → 구조체로 바로 디코딩, 필요한 키만 읽음) ──
+
+class _Envelope(msgspec.Struct):
+    """combined stream 봉투 - data는 스트림 종류 확인 후 해당 타입으로 디코딩"""
+    stream: str = ""
+    data: msgspec.Raw = msgspec.Raw(b"{}")
+
+
+class _DepthPayload(msgspec.Struct):
+    event_time: int = msgspec.field(default=0, name="E")
+    first_update_id: int = msgspec.field(default=0, name="U")
+    final_update_id: int = msgspec.field(default=0, name="u")
+    bids: list[list[str]] = msgspec.field(default_factory=list, name="b")
+    asks: list[list[str]] = msgspec.field(default_factory=list, name="a")
+
+
+class _AggTradePayload(msgspec.Struct):
+    trade_id: int = msgspec.field(default=0, name="a")
+    price: str = msgspec.field(default="0", name="p")
+    quantity: str = msgspec.field(default="0", name="q")
+    first_trade_id: int = msgspec.field(default=0, name="f")
+    last_trade_id: int = msgspec.field(default=0, name="l")
+    trade_time: int = msgspec.field(default=0, name="T")
+    is_buyer_maker: bool = msgspec.field(default=False, name="m")
+
+
+class _ForceOrder(msgspec.Struct):
+    side: str = msgspec.field(default="", name="S")
+    order_type: str = msgspec.field(default="", name="o")
+    price: str = msgspec.field(default="0", name="p")
+    quantity: str = msgspec.field(default="0", name="q")
+    trade_time: int = msgspec.field(default=0, name="T")
+
+
+class _ForceOrderPayload(msgspec.Struct):
+    order: _ForceOrder = msgspec.field(default_factory=_ForceOrder, name="o")
+
+
+class _Kline(msgspec.Struct):
+    open_time: int = msgspec.field(default=0, name="t")
+    close_time: int = msgspec.field(default=0, name="T")
+    open: str = msgspec.field(default="0", name="o")
+    high: str = msgspec.field(default="0", name="h")
+    low: str = msgspec.field(default="0", name="l")
+    close: str = msgspec.field(default="0", name="c")
+    volume: str = msgspec.field(default="0", name="v")
+    quote_volume: str = msgspec.field(default="0", name="q")
+    trade_count: int = msgspec.field(default=0, name="n")
+    closed: bool = msgspec.field(default=False, name="x")
+
+
+class _KlinePayload(msgspec.Struct):
+    kline: _Kline = msgspec.field(default_factory=_Kline, name="k")
+
+
+# 바이낸스 combined stream 프레임은 항상 {"stream":"<이름>","data":{...}} 형태 (compact JSON)
+_STREAM_PREFIX = b'{"stream":"'
+_DATA_SEP = b'","data":'
+
+_ENVELOPE_DEC = msgspec.json.Decoder(_Envelope)
+_DEPTH_DEC = msgspec.json.Decoder(_DepthPayload)
+_TRADE_DEC = msgspec.json.Decoder(_AggTradePayload)
+_FORCE_ORDER_DEC = msgspec.json.Decoder(_ForceOrderPayload)
+_KLINE_DEC = msgspec.json.Decoder(_KlinePayload)
+
+
 class Collector:
     """바이낸스 WebSocket 스트림 수신기"""
 
     SPOT_WS = "wss://stream.binance.com:9443/stream"
     FUTURES_WS = "wss://fstream.binance.com/stream"
+    # 바이낸스 스트림은 이미 compact JSON → permessage-deflate 비활성화, 대형 depth 프레임 허용,
+    # decode_text=False: 텍스트 프레임도 UTF-8 디코딩 없이 bytes 그대로 디코더에 전달
+    WS_OPTIONS = {"heartbeat": 20, "max_msg_size": 2 ** 22, "compress": 0, "decode_text": False}
 
     def __init__(self, config: Config, orderbook_manager: OrderBookManager,
                  buffer: DataBuffer, integrity_logger: IntegrityLogger | None = None,
@@ -41,6 +107,20 @@ class Collector:
         self.telegram = telegram
         self.reconnect_delay = 1.0
         self._disconnect_time: float | None = None
+        self._reinit_tasks: dict[str, asyncio.Task] = {}  # 심볼별 백그라운드 스냅샷 재요청
+        # 스트림 접두사 → 대문자 심볼 (메시지마다 .upper() 할당 방지, intern으로 dict 키 비교 단축)
+        self._sym_upper = dict(zip(config.symbols, config.symbol_keys))
+        # 가격/수량 문자열 변환기 (기본 float, str(str)은 복사 없이 그대로 반환)
+        self._num = str if config.preserve_decimal_strings else float
+        # 메시지 카운터 (바운드 메서드를 한 번만 조회해 메시지마다 속성 탐색 생략)
+        self._count_message = integrity_logger.increment_message_count if integrity_logger else None
+        # 스트림 종류("btcusdt@depth@100ms" → "depth") → 핸들러
+        self._dispatch = {
+            "depth": self._on_depth,
+            "aggTrade": self._on_trade,
+            "forceOrder": self._on_liquidation,
+            "kline_1m": self._on_kline,
+        }
 
     def build_ws_url(self) -> str:
         """combined stream URL 생성 (spot: depth, aggTrade, kline_1m)"""
@@ -84,11 +164,11 @@ class Collector:
         while True:
             try:
                 url = self.build_futures_ws_url()
-                async with websockets.connect(url, ping_interval=20) as ws:
+                async with aiohttp.ClientSession() as session, \
+                        session.ws_connect(url, **self.WS_OPTIONS) as ws:
                     delay = 1.0
                     logger.info("[연결] 바이낸스 선물 WebSocket 연결 성공")
-                    async for raw_msg in ws:
-                        await self._handle_message(raw_msg)
+                    await self._receive_loop(ws)
             except Exception as e:
                 logger.error(f"[에러-선물] {e} — {delay}초 후 재연결...")
                 await asyncio.sleep(delay)
@@ -97,7 +177,8 @@ class Collector:
     async def _connect_and_collect(self) -> None:
         """WebSocket 연결 및 메시지 수신"""
         url = self.build_ws_url()
-        async with websockets.connect(url, ping_interval=20) as ws:
+        async with aiohttp.ClientSession() as session, \
+                session.ws_connect(url, **self.WS_OPTIONS) as ws:
             # 재연결 성공
             if self._disconnect_time:
                 downtime = time.time() - self._disconnect_time
@@ -106,88 +187,115 @@ class Collector:
                 self._disconnect_time = None
 
             self._reset_reconnect_delay()
-            # 오더북 스냅샷 재초기화
-            for sym in self.config.symbols:
-                await self.ob_manager.initialize(sym, self.config.orderbook_depth)
+            # 오더북 스냅샷 재초기화 (심볼별 REST 요청 동시 실행)
+            results = await asyncio.gather(
+                *(self.ob_manager.initialize(sym, self.config.orderbook_depth)
+                  for sym in self.config.symbol_keys),
+                return_exceptions=True,
+            )
+            for sym, result in zip(self.config.symbol_keys, results):
+                if isinstance(result, Exception):
+                    # 미초기화 상태로 남음 → 첫 depth diff에서 백그라운드 재초기화
+                    logger.error(f"[초기화 실패] {sym}: {result}")
             logger.info("[연결] 바이낸스 WebSocket 연결 성공")
 
-            async for raw_msg in ws:
-                await self._handle_message(raw_msg)
+            await self._receive_loop(ws)
+
+    async def _receive_loop(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        """메시지 수신 → 동기 처리. 연결이 닫히면 예외로 재연결 루프에 알림"""
+        # 수신 큐에 메시지가 쌓여 있으면 receive()는 루프에 양보하지 않고 즉시 반환하고,
+        # 메시지 처리도 동기라서 밀린 메시지는 한 번의 wakeup 안에서 연속 처리된다.
+        async for msg in ws:
+            if msg.type is aiohttp.WSMsgType.ERROR:
+                raise ws.exception() or ConnectionError("WebSocket 수신 에러")
+            self._handle_message(msg.data)
+        raise ConnectionError(f"WebSocket 연결 종료 (code={ws.close_code})")
 
-    async def _handle_message(self, raw_msg: str) -> None:
-        """수신 메시지 파싱 및 라우팅"""
+    def _handle_message(self, raw_msg: bytes) -> None:
+        """수신 메시지 파싱 및 라우팅 (동기 - 수신 루프에 await 지점 없음)"""
         recv_time = time.time()
-        data = json.loads(raw_msg)
-        stream = data.get("stream", "")
-        payload = data.get("data", {})
-
-        if "depth" in stream:
-            event = DepthDiffEvent(
-                symbol=stream.split("@")[0].upper(),
-                event_time=payload.get("E", 0),
-                recv_time=recv_time,
-                first_update_id=payload.get("U", 0),
-                final_update_id=payload.get("u", 0),
-                bids=payload.get("b", []),
-                asks=payload.get("a", []),
-            )
-            snapshot = self.ob_manager.apply_diff(event.symbol, event)
-            if snapshot:
-                await self.buffer.add_orderbook(event.symbol, asdict(snapshot))
-            else:
-                # 갭 감지 → 자동 재초기화
-                state = self.ob_manager.books.get(event.symbol)
-                if state and not state.initialized:
-                    logger.info(f"[재초기화] {event.symbol} 오더북 갭 감지, 스냅샷 재요청")
-                    try:
-                        await self.ob_manager.initialize(event.symbol, self.config.orderbook_depth)
-                    except Exception as e:
-                        logger.error(f"[재초기화 실패] {event.symbol}: {e}")
-
-        elif "aggTrade" in stream:
-            event = AggTradeEvent(
-                symbol=payload.get("s", ""),
-                trade_id=payload.get("a", 0),
-                price=payload.get("p", "0"),
-                quantity=payload.get("q", "0"),
-                first_trade_id=payload.get("f", 0),
-                last_trade_id=payload.get("l", 0),
-                trade_time=payload.get("T", 0),
-                recv_time=recv_time,
-                is_buyer_maker=payload.get("m", False),
-            )
-            await self.buffer.add_trade(event.symbol, asdict(event))
-
-        elif "forceOrder" in stream:
-            o = payload.get("o", {})
-            event = LiquidationEvent(
-                symbol=o.get("s", ""),
-                side=o.get("S", ""),
-                order_type=o.get("o", ""),
-                price=o.get("p", "0"),
-                quantity=o.get("q", "0"),
-                trade_time=o.get("T", 0),
-                recv_time=recv_time,
-            )
-            await self.buffer.add_liquidation(event.symbol, asdict(event))
-
-        elif "kline" in stream:
-            k = payload.get("k", {})
-            if k.get("x", False):  # 확정된 캔들만
-                event = KlineEvent(
-                    symbol=k.get("s", ""),
-                    open_time=k.get("t", 0),
-                    close_time=k.get("T", 0),
-                    open=k.get("o", "0"),
-                    high=k.get("h", "0"),
-                    low=k.get("l", "0"),
-                    close=k.get("c", "0"),
-                    volume=k.get("v", "0"),
-                    quote_volume=k.get("q", "0"),
-                    trade_count=k.get("n", 0),
-                    recv_time=recv_time,
-                )
-                await self.buffer.add_kline(event.symbol, asdict(event))
+        stream, data = self._split_envelope(raw_msg)
+        symbol, _, kind = stream.partition("@")
+        handler = self._dispatch.get(kind.partition("@")[0])
+        if handler:
+            upper = self._sym_upper.get(symbol) or symbol.upper()
+            if self._count_message:
+                self._count_message(upper)
+            handler(upper, data, recv_time)
+
+    @staticmethod
+    def _split_envelope(raw_msg: bytes) -> tuple[str, memoryview | msgspec.Raw]:
+        """봉투를 바이트 수준에서 분리 (stream 이름, data 슬라이스). 형태가 다르면 JSON 디코딩"""
+        if raw_msg.startswith(_STREAM_PREFIX) and raw_msg.endswith(b"}"):
+            sep = raw_msg.find(_DATA_SEP, len(_STREAM_PREFIX))
+            if sep != -1:
+                stream = raw_msg[len(_STREAM_PREFIX):sep].decode("ascii")
+                return stream, memoryview(raw_msg)[sep + len(_DATA_SEP):-1]
+        envelope = _ENVELOPE_DEC.decode(raw_msg)
+        return envelope.stream, envelope.data
+
+    def _on_depth(self, symbol: str, data: memoryview | msgspec.Raw, recv_time: float) -> None:
+        p = _DEPTH_DEC.decode(data)
+        event = DepthDiffEvent(
+            symbol=symbol,
+            event_time=p.event_time,
+            recv_time=recv_time,
+            first_update_id=p.first_update_id,
+            final_update_id=p.final_update_id,
+            bids=p.bids,
+            asks=p.asks,
+        )
+        row = self.ob_manager.apply_diff(symbol, event)
+        if row:
+            self.buffer.add_orderbook(symbol, row)
+        else:
+            # 갭 감지 → 자동 재초기화
+            state = self.ob_manager.books.get(symbol)
+            if state and not state.initialized:
+                self._schedule_reinit(symbol)
+
+    def _on_trade(self, symbol: str, data: memoryview | msgspec.Raw, recv_time: float) -> None:
+        p = _TRADE_DEC.decode(data)
+        num = self._num
+        # AggTradeEvent 필드 순서 그대로 행 구성 (중간 dataclass 생성 생략)
+        self.buffer.add_trade(symbol, (
+            symbol, p.trade_id, num(p.price), num(p.quantity), p.first_trade_id,
+            p.last_trade_id, p.trade_time, recv_time, p.is_buyer_maker,
+        ))
+
+    def _on_liquidation(self, symbol: str, data: memoryview | msgspec.Raw, recv_time: float) -> None:
+        o = _FORCE_ORDER_DEC.decode(data).order
+        num = self._num
+        # LiquidationEvent 필드 순서
+        self.buffer.add_liquidation(symbol, (
+            symbol, SIDE_CODES.get(o.side, SIDE_UNKNOWN), o.order_type,
+            num(o.price), num(o.quantity), o.trade_time, recv_time,
+        ))
+
+    def _on_kline(self, symbol: str, data: memoryview | msgspec.Raw, recv_time: float) -> None:
+        k = _KLINE_DEC.decode(data).kline
+        if not k.closed:  # 확정된 캔들만
+            return
+        num = self._num
+        # KlineEvent 필드 순서
+        self.buffer.add_kline(symbol, (
+            symbol, k.open_time, k.close_time, num(k.open), num(k.high), num(k.low),
+            num(k.close), num(k.volume), num(k.quote_volume), k.trade_count, recv_time,
+        ))
+
+    def _schedule_reinit(self, symbol: str) -> None:
+        """스냅샷 재요청을 백그라운드로 실행 (다른 심볼 수신은 계속, 심볼당 1개)"""
+        task = self._reinit_tasks.get(symbol)
+        if task and not task.done():
+            return
+        logger.info(f"[재초기화] {symbol} 오더북 갭 감지, 스냅샷 재요청")
+        self._reinit_tasks[symbol] = asyncio.create_task(self._reinitialize(symbol))
+
+    async def _reinitialize(self, symbol: str) -> None:
+        try:
+            await self.ob_manager.initialize(symbol, self.config.orderbook_depth)
+        except Exception as e:
+            logger.error(f"[재초기화 실패] {symbol}: {e}")
 
     def _reset_reconnect_delay(self) -> None:
         self.reconnect_delay = 1.0
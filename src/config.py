@@ -1,10 +1,18 @@
 """시스템 설정 모듈 - config.yaml 로드 및 Config 데이터클래스"""
 
+import html
+import sys
 from dataclasses import dataclass, field, asdict
 from pathlib import Path
 
 import yaml
 
+# LibYAML C 바인딩이 있으면 사용 (순수 파이썬 lexer/emitter 대비 수 배 빠름)
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
 
 @dataclass
 class Config:
@@ -17,11 +25,23 @@ class Config:
     cleanup_days: int = 7
     cloud_remote: str = ""
     cloud_path: str = ""
+    cloud_backend: str = "rclone"    # rclone / s3 (s3: cloud_remote=버킷, aioboto3 필요; "s3:버킷"도 s3)
+    sync_concurrency: int = 8        # 동시 업로드 수 (rclone 프로세스 / --transfers)
     orderbook_depth: int = 1000
     orderbook_top_levels: int = 20
     telegram_bot_token: str = ""
     telegram_chat_id: str = ""
     use_futures: bool = True
+    preserve_decimal_strings: bool = False  # True면 가격/수량을 float 대신 원문 문자열로 저장
+    compression: str = "zstd"        # Parquet 압축 코덱 (zstd / snappy / gzip ...)
+    compression_level: int = 1       # 레벨 지원 코덱(zstd, gzip 등)에만 적용
+
+    def __post_init__(self):
+        # 대문자 심볼 키 (버퍼/오더북/파일명용)를 로드 시 한 번만 계산 - 런타임 .upper() 제거.
+        # symbols는 스트림 이름 그대로(소문자) 유지하고, 필드가 아니므로 YAML/asdict에는 포함되지 않음
+        self.symbol_keys: list[str] = [sys.intern(s.upper()) for s in self.symbols]
+        # 텔레그램 시작 알림용 심볼 목록 HTML (재연결마다 다시 만들지 않도록)
+        self.symbols_html: str = " ".join(f"<code>{html.escape(s)}</code>" for s in self.symbol_keys)
 
     @classmethod
     def from_yaml(cls, path: str) -> "Config":
@@ -30,13 +50,23 @@ class Config:
         if not p.exists():
             return cls()
         with open(p, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f) or {}
+            return cls.from_yaml_str(f.read())
+
+    @classmethod
+    def from_yaml_str(cls, text: str) -> "Config":
+        """YAML 문자열에서 Config 객체 생성 (알 수 없는 키는 무시)"""
+        data = yaml.load(text, Loader=SafeLoader) or {}
         return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
 
     def to_yaml(self, path: str) -> None:
         """Config 객체를 YAML 파일로 저장"""
         with open(path, "w", encoding="utf-8") as f:
-            yaml.dump(asdict(self), f, default_flow_style=False, allow_unicode=True)
+            f.write(self.to_yaml_str())
+
+    def to_yaml_str(self) -> str:
+        """Config 객체를 YAML 문자열로 변환"""
+        return yaml.dump(asdict(self), Dumper=SafeDumper,
+                         default_flow_style=False, allow_unicode=True)
 
     def to_dict(self) -> dict:
         """Config를 딕셔너리로 변환"""
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import json
 import logging
 import os
 import platform
@@ -11,6 +10,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+import orjson
+
 if TYPE_CHECKING:
     from src.config import Config
 
@@ -40,8 +41,9 @@ class EnvironmentRecorder:
             "config": self._mask_sensitive_config(self.config),
         }
 
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        # orjson: UTF-8 bytes 직접 출력 (ensure_ascii=False와 동일), 메타데이터 없는 패키지의 None 키 허용
+        filepath.write_bytes(orjson.dumps(
+            metadata, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
 
         logger.info(f"[환경] 메타데이터 저장: {filepath}")
         return filepath
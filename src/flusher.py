@@ -1,27 +1,114 @@
-"""Parquet 파일 저장 모듈 - 주기적 플러시, 파일명 생성, snappy 압축"""
+"""Parquet 파일 저장 모듈 - 주기적 플러시, 파일명 생성, zstd 압축"""
 
 from __future__ import annotations
 
 import asyncio
+import functools
 import hashlib
-import json
 import logging
+import mmap
 import os
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import fields
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import TYPE_CHECKING, Callable
+from typing import TYPE_CHECKING, Callable, Iterable, Sequence
 
-import pandas as pd
+import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.models import (
+    DECIMAL_FIELDS, OrderBookSnapshot, AggTradeEvent, LiquidationEvent, KlineEvent,
+    FundingRateRecord,
+)
 
 if TYPE_CHECKING:
-    from src.buffer import DataBuffer
+    from src.buffer import ColumnBatch, DataBuffer
     from src.config import Config
     from src.integrity_logger import IntegrityLogger
     from src.syncer import Syncer
 
 logger = logging.getLogger(__name__)
 
+# 데이터타입 → 모델. Arrow 스키마를 임포트 시 한 번 만들어 저장마다 타입 추론을 생략
+_DATATYPE_MODELS = {
+    "orderbook": OrderBookSnapshot,
+    "trade": AggTradeEvent,
+    "liquidation": LiquidationEvent,
+    "kline": KlineEvent,
+    "funding": FundingRateRecord,
+}
+# 필드 타입 → Arrow 타입 (buffer의 컬럼 타입코드와 대응)
+_ARROW_TYPES = {
+    int: pa.int64(),
+    float: pa.float64(),
+    bool: pa.bool_(),
+    str: pa.string(),
+    list[list[str]]: pa.list_(pa.list_(pa.string())),
+}
+# 필드명별 예외 - 청산 side는 1바이트 코드
+_FIELD_ARROW_TYPES = {"side": pa.int8()}
+
+
+def _schema_from_model(model: type, decimal_as_str: bool) -> pa.Schema:
+    """dataclass 필드 → Arrow 스키마 (decimal_as_str면 가격/수량은 문자열)"""
+    columns = []
+    for f in fields(model):
+        if decimal_as_str and f.name in DECIMAL_FIELDS:
+            arrow_type = pa.string()
+        else:
+            arrow_type = _FIELD_ARROW_TYPES.get(f.name) or _ARROW_TYPES[f.type]
+        columns.append((f.name, arrow_type))
+    return pa.schema(columns)
+
+
+_SCHEMAS = {dt: _schema_from_model(m, False) for dt, m in _DATATYPE_MODELS.items()}
+_DECIMAL_STR_SCHEMAS = {dt: _schema_from_model(m, True) for dt, m in _DATATYPE_MODELS.items()}
+# 필드명 순서 → 모델 스키마 (레코드 리스트 저장 시 키가 모델과 같으면 추론 대신 사용)
+_SCHEMAS_BY_FIELDS = {tuple(schema.names): schema for schema in _SCHEMAS.values()}
+
+
+# 단조 증가하는 int64 시각/ID 컬럼은 델타 인코딩, 수신 시각(float)은 바이트 분할 →
+# 사전 인코딩 대비 파일이 작고 쓰기/읽기도 빠르다. 나머지 컬럼(심볼, 가격 등)은 사전 인코딩.
+_DELTA_SUFFIXES = ("_time", "_id")
+_BYTE_SPLIT_FIELDS = frozenset({"recv_time"})
+
+
+def _column_encodings(schema: pa.Schema) -> tuple[list[str], dict[str, str]]:
+    """스키마 → (사전 인코딩 컬럼 목록, 컬럼별 인코딩) - ParquetWriter 인자"""
+    encodings = {}
+    for field in schema:
+        if pa.types.is_int64(field.type) and field.name.endswith(_DELTA_SUFFIXES):
+            encodings[field.name] = "DELTA_BINARY_PACKED"
+        elif pa.types.is_float64(field.type) and field.name in _BYTE_SPLIT_FIELDS:
+            encodings[field.name] = "BYTE_STREAM_SPLIT"
+    return [name for name in schema.names if name not in encodings], encodings
+
+
+def _time_range(times: Sequence[float]) -> tuple[float, float]:
+    """float 타임스탬프 컬럼의 (최소, 최대) - 0(미기록) 제외, 없으면 (0.0, 0.0)
+
+    array('d') 위의 numpy 뷰에서 C 루프 두 번으로 계산 (파이썬 리스트 생성 없음).
+    """
+    t = np.frombuffer(times, dtype=np.float64)
+    valid = t > 0
+    if not valid.any():
+        return (0.0, 0.0)
+    return (float(t.min(where=valid, initial=np.inf)), float(t.max(where=valid, initial=0.0)))
+
+
+@functools.lru_cache(maxsize=16)
+def _file_stamp(timestamp: datetime) -> str:
+    """파일명 시각 부분 YYYYMMDD_HHMM - 한 플러시의 파일들은 같은 now를 쓰므로 strftime은 한 번"""
+    return timestamp.strftime("%Y%m%d_%H%M")
+
+
+# 플러시 데이터를 Arrow로 변환해 쓰는 단위 (행). 변환 메모리 상한 = 이 크기의 RecordBatch 하나
+STREAM_CHUNK_ROWS = 65_536
+
 
 class Flusher:
     """주기적 Parquet 파일 저장"""
@@ -35,6 +122,13 @@ class Flusher:
         self.on_file_created = on_file_created  # Syncer 연결용 콜백
         self.data_dir = Path(config.data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._schemas = (_DECIMAL_STR_SCHEMAS if config.preserve_decimal_strings
+                         else _SCHEMAS)
+        self._compression = (config.compression, config.compression_level)
+        # 파일 I/O 전용 단일 워커: 쓰기는 순서대로 직렬화, 이벤트 루프는 수신 계속
+        self._io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="flusher-io")
+        # 체크섬 append-only 로그 (첫 기록 시 열고 계속 유지, close()에서 닫음)
+        self._checksum_fp = None
 
     async def run(self) -> None:
         """주기적 플러시 루프"""
@@ -47,9 +141,10 @@ class Flusher:
 
     async def flush_now(self) -> list[Path]:
         """즉시 플러시 실행, 생성된 파일 경로 반환"""
-        data = await self.buffer.flush()
+        data = self.buffer.flush()
         now = datetime.now(timezone.utc)
         created_files = []
+        written = []  # (경로, 레코드 수, 파일 크기) - 체크섬 일괄 계산용
 
         # 심볼별 데이터 저장 (오더북, 체결, 청산, 캔들)
         for datatype in ["orderbook", "trade", "liquidation", "kline"]:
@@ -60,97 +155,215 @@ class Flusher:
                         continue
                     fname = self._generate_filename(symbol, datatype, now)
                     fpath = self.data_dir / fname
-                    count = self._save_parquet(records, fpath)
-                    file_size = fpath.stat().st_size
+                    # 저장 - I/O 스레드에서 실행
+                    count, file_size = await self._run_io(
+                        self._write_file, records, fpath,
+                        self._schemas[datatype])
                     created_files.append(fpath)
+                    written.append((fpath, count, file_size))
                     logger.info(f"[저장] {fpath} ({count}건)")
 
-                    # 체크섬 기록 (#2)
-                    sha256 = self.compute_checksum(fpath)
-                    self.record_checksum(fpath, sha256, count, file_size)
-
                     # IntegrityLogger 통보 (#3)
                     if self.integrity_logger:
-                        time_range = (0.0, 0.0)
-                        if records:
-                            times = [r.get("recv_time", 0.0) or r.get("event_time", 0.0) for r in records]
-                            times = [t for t in times if t]
-                            if times:
-                                time_range = (min(times), max(times))
                         self.integrity_logger.record_flush(
                             symbol=symbol, datatype=datatype,
                             record_count=count, file_size=file_size,
-                            time_range=time_range,
+                            time_range=_time_range(records.column("recv_time")),
                         )
 
-                    # Syncer 콜백 (#4)
-                    if self.on_file_created:
-                        self.on_file_created(fpath)
-
         # 펀딩비 (심볼 통합)
-        funding = data.get("funding", [])
+        funding = data.get("funding")
         if funding:
-            fname = f"funding_rate_{now.strftime('%Y%m%d_%H%M')}.parquet"
+            fname = f"funding_rate_{_file_stamp(now)}.parquet"
             fpath = self.data_dir / fname
-            count = self._save_parquet(funding, fpath)
-            file_size = fpath.stat().st_size
+            count, file_size = await self._run_io(self._write_file, funding, fpath,
+                                                  self._schemas["funding"])
             created_files.append(fpath)
+            written.append((fpath, count, file_size))
             logger.info(f"[저장] {fpath} ({count}건)")
 
-            sha256 = self.compute_checksum(fpath)
-            self.record_checksum(fpath, sha256, count, file_size)
+        if written:
+            # rename(디렉토리 엔트리)을 플러시당 한 번의 디렉토리 fsync로 확정
+            await self._run_io(self._fsync_dir, self.data_dir)
+            # 체크섬 일괄 계산 + 기록 (#2) - 이번 플러시 파일 전체를 한 번에
+            await self._run_io(self._record_checksums, written)
 
-            if self.on_file_created:
+        # Syncer 콜백 (#4) - 체크섬 기록이 끝난 파일만 업로드 대상
+        if self.on_file_created:
+            for fpath in created_files:
                 self.on_file_created(fpath)
 
         return created_files
 
+    async def _run_io(self, func: Callable, *args):
+        """블로킹 파일 작업을 I/O 전용 스레드에서 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_executor, func, *args)
+
+    def _write_file(self, batch: ColumnBatch, fpath: Path,
+                    schema: pa.Schema) -> tuple[int, int]:
+        """Parquet 저장 (동기), (레코드 수, 파일 크기) 반환
+
+        배치 전체를 한 번에 Arrow로 바꾸지 않고 STREAM_CHUNK_ROWS 행씩 RecordBatch로 변환해 기록.
+        """
+        chunks = (pa.RecordBatch.from_pydict(cols, schema=schema)
+                  for cols in batch.iter_chunks(STREAM_CHUNK_ROWS))
+        count = self._write_parquet(chunks, schema, fpath, *self._compression)
+        return count, fpath.stat().st_size
+
+    def _record_checksums(self, written: list[tuple[Path, int, int]]) -> None:
+        """플러시된 파일들의 체크섬을 일괄 계산해 기록 (동기)"""
+        checksums = self.compute_checksums_batch([fpath for fpath, _, _ in written])
+        for fpath, count, file_size in written:
+            self.record_checksum(fpath, checksums[fpath], count, file_size)
+
+    @staticmethod
+    def _fsync_dir(directory: Path) -> None:
+        """디렉토리 fsync - 그 안의 rename들을 한 번에 디스크에 확정 (윈도우는 미지원이라 생략)"""
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
     @staticmethod
     def _generate_filename(symbol: str, datatype: str, timestamp: datetime) -> str:
-        """파일명 생성: {SYMBOL}_{datatype}_{YYYYMMDD}_{HHMM}.parquet"""
-        return f"{symbol.upper()}_{datatype}_{timestamp.strftime('%Y%m%d_%H%M')}.parquet"
+        """파일명 생성: {SYMBOL}_{datatype}_{YYYYMMDD}_{HHMM}.parquet (symbol은 이미 대문자 키)"""
+        assert symbol == symbol.upper(), f"대문자 심볼 키가 아님: {symbol}"
+        return f"{symbol}_{datatype}_{_file_stamp(timestamp)}.parquet"
 
     @staticmethod
-    def _save_parquet(data: list[dict], filepath: Path) -> int:
-        """Parquet 저장 (snappy 압축), 레코드 수 반환. 원자적 저장."""
-        df = pd.DataFrame(data)
+    def _save_parquet(data: list[dict] | dict[str, Sequence], filepath: Path,
+                      schema: pa.Schema | None = None,
+                      compression: str = "zstd", compression_level: int | None = 1) -> int:
+        """Parquet 저장 (기본 zstd 레벨 1 압축), 레코드 수 반환. 원자적 저장.
+
+        data는 레코드 리스트 또는 컬럼명 → 컬럼 배열 dict (ColumnBatch.to_pydict()).
+        pandas를 거치지 않고 Arrow 테이블로 바로 변환, schema가 있으면 타입 추론 생략.
+        """
+        if isinstance(data, dict):
+            table = pa.Table.from_pydict(data, schema=schema)
+        else:
+            table = Flusher._table_from_records(data, schema)
+        return Flusher._write_parquet([table], table.schema, filepath,
+                                      compression, compression_level)
+
+    @staticmethod
+    def _table_from_records(records: list[dict], schema: pa.Schema | None) -> pa.Table:
+        """레코드 dict 리스트 → Arrow 테이블
+
+        스키마가 없어도 키가 모델 필드와 같으면 미리 만든 모델 스키마로 컬럼 단위 변환
+        (행마다 타입 추론 생략). 값 타입이 맞지 않으면(예: 문자열 가격) 추론으로 되돌아감.
+        """
+        if schema is None and records:
+            schema = _SCHEMAS_BY_FIELDS.get(tuple(records[0]))
+            if schema is not None:
+                try:
+                    return pa.Table.from_pydict(
+                        {name: [r[name] for r in records] for name in schema.names}, schema=schema)
+                except (pa.ArrowInvalid, pa.ArrowTypeError, KeyError):
+                    schema = None
+        return pa.Table.from_pylist(records, schema=schema)
+
+    @staticmethod
+    def _write_parquet(parts: Iterable[pa.Table | pa.RecordBatch], schema: pa.Schema,
+                       filepath: Path, compression: str = "zstd",
+                       compression_level: int | None = 1) -> int:
+        """Table/RecordBatch를 순서대로 한 Parquet 파일에 기록, 레코드 수 반환. 원자적 저장.
+
+        parts가 제너레이터면 하나씩 만들어 쓰고 버리므로 메모리에는 한 조각만 남는다.
+        """
+        if not pa.Codec.supports_compression_level(compression):
+            compression_level = None  # snappy 등은 레벨 인자를 받지 않음
+        dictionary_columns, column_encoding = _column_encodings(schema)
         # 임시 파일에 먼저 쓰고 rename (원자적 저장)
         tmp_fd, tmp_path = tempfile.mkstemp(
             suffix=".parquet.tmp", dir=filepath.parent
         )
         os.close(tmp_fd)
+        count = 0
         try:
-            df.to_parquet(tmp_path, index=False, compression="snappy")
+            with pq.ParquetWriter(tmp_path, schema, compression=compression,
+                                  compression_level=compression_level,
+                                  use_dictionary=dictionary_columns,
+                                  column_encoding=column_encoding,
+                                  data_page_size=1 << 20) as writer:
+                for part in parts:
+                    writer.write(part)
+                    count += part.num_rows
             os.replace(tmp_path, filepath)
         except Exception:
             if os.path.exists(tmp_path):
                 os.unlink(tmp_path)
             raise
-        return len(df)
+        return count
 
     @staticmethod
     def compute_checksum(filepath: Path) -> str:
-        """SHA-256 해시 계산"""
+        """SHA-256 해시 계산
+
+        파일 전체를 mmap 해 한 번에 update → 8KB 단위 파이썬 루프 없이
+        OpenSSL 블록 함수(SHA-NI 지원 CPU면 하드웨어 가속)가 연속 버퍼를 처리.
+        """
         h = hashlib.sha256()
         with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                h.update(chunk)
+            if os.fstat(f.fileno()).st_size:  # 빈 파일은 mmap 불가
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    h.update(mm)
         return h.hexdigest()
 
+    @staticmethod
+    def compute_checksums_batch(paths: list[Path]) -> dict[Path, str]:
+        """여러 파일의 SHA-256을 병렬 계산, 경로 → 해시 반환
+
+        hashlib은 큰 버퍼를 해시하는 동안 GIL을 놓으므로 파일별 스레드가 코어 수만큼 동시에 돈다.
+        """
+        if len(paths) <= 1:
+            return {p: Flusher.compute_checksum(p) for p in paths}
+        with ThreadPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1),
+                                thread_name_prefix="flusher-hash") as pool:
+            return dict(zip(paths, pool.map(Flusher.compute_checksum, paths)))
+
     def record_checksum(self, filepath: Path, sha256: str,
                         record_count: int, file_size: int) -> None:
-        """checksums.json에 체크섬 기록 추가"""
-        checksum_file = self.data_dir / "checksums.json"
-        entries = []
-        if checksum_file.exists():
-            with open(checksum_file, "r") as f:
-                entries = json.load(f)
-        entries.append({
+        """checksums.ndjson에 체크섬 한 줄 추가 (기존 내용은 다시 읽지 않음)"""
+        if self._checksum_fp is None:
+            # 버퍼 없는 바이너리 append: 한 줄 = write 한 번
+            self._checksum_fp = open(self.data_dir / "checksums.ndjson", "ab", buffering=0)
+        self._checksum_fp.write(orjson.dumps({
             "filename": filepath.name,
             "sha256": sha256,
             "record_count": record_count,
             "file_size": file_size,
             "created_at": datetime.now(timezone.utc).isoformat(),
-        })
-        with open(checksum_file, "w") as f:
-            json.dump(entries, f, indent=2)
+        }, option=orjson.OPT_APPEND_NEWLINE))
+
+    def compact_checksums(self) -> list[dict]:
+        """checksums.ndjson 전체를 checksums.json(JSON 배열) 스냅샷으로 저장, 항목 반환"""
+        log_file = self.data_dir / "checksums.ndjson"
+        entries = []
+        if log_file.exists():
+            with open(log_file, "rb") as f:
+                entries = [orjson.loads(line) for line in f if line.strip()]
+        snapshot = self.data_dir / "checksums.json"
+        tmp = snapshot.with_suffix(".json.tmp")
+        with open(tmp, "wb") as f:
+            f.write(orjson.dumps(entries, option=orjson.OPT_INDENT_2))
+        os.replace(tmp, snapshot)
+        return entries
+
+    async def snapshot_checksums(self) -> list[dict]:
+        """compact_checksums를 I/O 스레드에서 실행 (체크섬 기록과 직렬화)"""
+        return await self._run_io(self.compact_checksums)
+
+    def close(self) -> None:
+        """I/O 스레드 종료 후 체크섬 로그 닫기
+
+        대기 중인 _record_checksums가 먼저 끝나야 닫힌 파일에 쓰거나 다시 여는 일이 없다.
+        """
+        self._io_executor.shutdown(wait=True)
+        if self._checksum_fp is not None:
+            self._checksum_fp.close()
+            self._checksum_fp = None
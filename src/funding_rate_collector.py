@@ -9,6 +9,7 @@ from typing import TYPE_CHECKING
 
 import aiohttp
 
+from src.buffer import row_getter
 from src.models import FundingRateRecord
 
 if TYPE_CHECKING:
@@ -19,6 +20,7 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 FUNDING_INTERVAL = 8 * 3600  # 8시간
+_FUNDING_ROW = row_getter(FundingRateRecord)
 
 
 class FundingRateCollector:
@@ -32,39 +34,78 @@ class FundingRateCollector:
         self.buffer = buffer
         self.integrity_logger = integrity_logger
         self.max_retries = 3
+        # run() 동안 유지되는 세션 - 단건 조회도 재연결(TCP+TLS) 없이 재사용
+        self._session: aiohttp.ClientSession | None = None
 
     async def run(self) -> None:
-        """8시간 주기 펀딩비 조회 루프"""
-        while True:
-            for symbol in self.config.symbols:
-                record = await self.fetch_funding_rate(symbol)
-                if record:
-                    from dataclasses import asdict
-                    await self.buffer.add_funding_rate(asdict(record))
-            await asyncio.sleep(FUNDING_INTERVAL)
+        """8시간 주기 펀딩비 조회 루프 - 세션 하나를 계속 재사용"""
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+            self._session = session
+            try:
+                while True:
+                    for record in await self.fetch_all_funding_rates(session):
+                        self.buffer.add_funding_rate(_FUNDING_ROW(record))
+                    await asyncio.sleep(FUNDING_INTERVAL)
+            finally:
+                self._session = None
+
+    @staticmethod
+    def _to_record(sym: str, data: dict, recv_time: float) -> FundingRateRecord:
+        """premiumIndex 응답 항목 → FundingRateRecord"""
+        return FundingRateRecord(
+            symbol=sym,
+            funding_rate=str(data.get("lastFundingRate", "0")),
+            funding_time=int(data.get("time", 0)),
+            next_funding_time=int(data.get("nextFundingTime", 0)),
+            recv_time=recv_time,
+        )
+
+    async def fetch_all_funding_rates(self, session: aiohttp.ClientSession) -> list[FundingRateRecord]:
+        """설정된 전체 심볼 펀딩비를 요청 한 번으로 조회 (최대 3회 재시도)
+
+        symbol 파라미터를 생략하면 premiumIndex가 전 종목 목록을 반환 → 설정 심볼만 추림.
+        """
+        wanted = set(self.config.symbol_keys)
+        for attempt in range(self.max_retries):
+            try:
+                async with session.get(self.FUTURES_URL) as resp:
+                    if resp.status != 200:
+                        logger.warning(f"[펀딩비] HTTP {resp.status}")
+                        continue
+                    data = await resp.json()
+                recv_time = time.time()
+                return [self._to_record(entry["symbol"], entry, recv_time)
+                        for entry in data if entry.get("symbol") in wanted]
+            except Exception as e:
+                logger.warning(f"[펀딩비] 조회 실패 (시도 {attempt+1}/{self.max_retries}): {e}")
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)
+        return []
 
     async def fetch_funding_rate(self, symbol: str) -> FundingRateRecord | None:
-        """단일 심볼 펀딩비 조회 (최대 3회 재시도)"""
-        sym = symbol.upper()
+        """단일 심볼 펀딩비 조회 (최대 3회 재시도)
+
+        run() 중이면 그 세션을, 아니면 임시 세션 하나를 재시도 전체에 걸쳐 사용.
+        """
+        if self._session is not None:
+            return await self._fetch_funding_rate(self._session, symbol.upper())
+        async with aiohttp.ClientSession() as session:
+            return await self._fetch_funding_rate(session, symbol.upper())
+
+    async def _fetch_funding_rate(self, session: aiohttp.ClientSession,
+                                  sym: str) -> FundingRateRecord | None:
         for attempt in range(self.max_retries):
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(
-                        self.FUTURES_URL,
-                        params={"symbol": sym},
-                        timeout=aiohttp.ClientTimeout(total=10),
-                    ) as resp:
-                        if resp.status != 200:
-                            logger.warning(f"[펀딩비] {sym} HTTP {resp.status}")
-                            continue
-                        data = await resp.json()
-                        return FundingRateRecord(
-                            symbol=sym,
-                            funding_rate=str(data.get("lastFundingRate", "0")),
-                            funding_time=int(data.get("time", 0)),
-                            next_funding_time=int(data.get("nextFundingTime", 0)),
-                            recv_time=time.time(),
-                        )
+                async with session.get(
+                    self.FUTURES_URL,
+                    params={"symbol": sym},
+                    timeout=aiohttp.ClientTimeout(total=10),
+                ) as resp:
+                    if resp.status != 200:
+                        logger.warning(f"[펀딩비] {sym} HTTP {resp.status}")
+                        continue
+                    data = await resp.json()
+                    return self._to_record(sym, data, time.time())
             except Exception as e:
                 logger.warning(f"[펀딩비] {sym} 조회 실패 (시도 {attempt+1}/{self.max_retries}): {e}")
                 if attempt < self.max_retries - 1:
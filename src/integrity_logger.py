@@ -2,35 +2,41 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
-from collections import defaultdict
+from collections import defaultdict, deque
 from datetime import datetime, timezone
 from pathlib import Path
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 
 class IntegrityLogger:
     """데이터 무결성 로깅"""
 
-    def __init__(self, log_dir: Path | str):
+    def __init__(self, log_dir: Path | str, symbols: list[str] | None = None):
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
-        self._gaps: list[dict] = []
-        self._reconnects: list[dict] = []
-        self._flush_stats: list[dict] = []
-        self._sync_events: list[dict] = []
-        self._message_counts: dict[str, int] = defaultdict(int)
+        # 고정 길이 링 버퍼: 가득 차면 가장 오래된 항목부터 자동 제거 (append O(1))
+        self._gaps: deque[dict] = deque(maxlen=self.MAX_GAP_BUFFER)
+        self._reconnects: deque[dict] = deque(maxlen=self.MAX_GAP_BUFFER)
+        self._flush_stats: deque[dict] = deque(maxlen=self.MAX_GAP_BUFFER)
+        self._sync_events: deque[dict] = deque(maxlen=self.MAX_GAP_BUFFER)
+        # 수집 심볼 키를 미리 넣어 두어 메시지마다 += 1이 __missing__ 없이 기존 키 갱신만 하도록
+        self._symbol_keys = [s.upper() for s in symbols or ()]
+        self._message_counts: dict[str, int] = self._new_message_counts()
         self._period_start: float = 0.0
 
-    MAX_GAP_BUFFER = 10000  # 갭 기록 최대 보관 수
+    MAX_GAP_BUFFER = 10000  # 이벤트 종류별 최대 보관 수
+
+    def _new_message_counts(self) -> dict[str, int]:
+        return defaultdict(int, dict.fromkeys(self._symbol_keys, 0))
 
     def record_gap(self, symbol: str, expected_id: int, actual_id: int,
                    timestamp: float) -> None:
         """시퀀스 갭 기록"""
-        if len(self._gaps) >= self.MAX_GAP_BUFFER:
-            self._gaps = self._gaps[-self.MAX_GAP_BUFFER // 2:]
         self._gaps.append({
             "timestamp": timestamp,
             "symbol": symbol,
@@ -83,18 +89,25 @@ class IntegrityLogger:
         }
         return stats
 
+    @staticmethod
+    def _write_json(filepath: Path, data: dict) -> None:
+        """JSON 파일 쓰기 (동기, 워커 스레드에서 실행) - orjson으로 bytes 직렬화"""
+        with open(filepath, "wb") as f:
+            f.write(orjson.dumps(data, default=str,
+                                 option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+
     async def write_periodic_log(self) -> None:
         """주기적 통계 JSON 로그 작성"""
-        stats = self.get_periodic_stats()
+        stats = self.get_periodic_stats()  # 복사본 - 리셋/수신과 무관하게 스레드에서 직렬화
         now = datetime.now(timezone.utc)
         log_file = self.log_dir / f"stats_{now.strftime('%Y%m%d_%H')}.json"
-        with open(log_file, "w") as f:
-            json.dump(stats, f, indent=2, default=str)
         # 주기 통계 리셋
         self._gaps.clear()
         self._reconnects.clear()
         self._flush_stats.clear()
-        self._message_counts.clear()
+        self._message_counts = self._new_message_counts()
+        # 직렬화/파일 쓰기는 워커 스레드에서 (이벤트 루프가 수신을 멈추지 않도록)
+        await asyncio.to_thread(self._write_json, log_file, stats)
         logger.info(f"[로그] {log_file}")
 
     async def write_daily_summary(self) -> None:
@@ -107,8 +120,7 @@ class IntegrityLogger:
             "total_flushes": len(self._flush_stats),
         }
         log_file = self.log_dir / f"daily_{now.strftime('%Y%m%d')}.json"
-        with open(log_file, "w") as f:
-            json.dump(summary, f, indent=2, default=str)
+        await asyncio.to_thread(self._write_json, log_file, summary)
 
     @staticmethod
     def compute_coverage(total_seconds: float, gap_seconds: float) -> float:
@@ -123,11 +135,15 @@ class IntegrityLogger:
 
         symbol_stats: {symbol: {"total_seconds": float, "gap_seconds": float, "msg_count": int}}
         """
+        await asyncio.to_thread(self._update_coverage_file, symbol_stats)
+
+    def _update_coverage_file(self, symbol_stats: dict[str, dict] | None) -> None:
+        """coverage_summary.json 읽기-갱신-쓰기 (동기, 워커 스레드에서 실행)"""
         filepath = self.log_dir / "coverage_summary.json"
         existing = {}
         if filepath.exists():
-            with open(filepath, "r") as f:
-                existing = json.load(f)
+            with open(filepath, "rb") as f:
+                existing = orjson.loads(f.read())
 
         if symbol_stats:
             for symbol, stats in symbol_stats.items():
@@ -142,6 +158,5 @@ class IntegrityLogger:
                     "updated_at": datetime.now(timezone.utc).isoformat(),
                 }
 
-        with open(filepath, "w") as f:
-            json.dump(existing, f, indent=2, default=str)
+        self._write_json(filepath, existing)
 
@@ -6,6 +6,7 @@ import asyncio
 import logging
 import signal
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from src.config import Config
@@ -34,6 +35,9 @@ logger = logging.getLogger(__name__)
 async def main(config_path: str = "config.yaml") -> None:
     """모든 모듈 초기화 및 asyncio.gather로 동시 실행"""
     config = Config.from_yaml(config_path)
+    # asyncio.to_thread 기본 스레드풀 (로그/리포트 파일 쓰기용)
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=4, thread_name_prefix="io"))
 
     # 디렉토리 생성 (로깅 FileHandler보다 먼저)
     Path(config.data_dir).mkdir(parents=True, exist_ok=True)
@@ -49,10 +53,10 @@ async def main(config_path: str = "config.yaml") -> None:
     logging.getLogger().addHandler(file_handler)
 
     # 모듈 초기화
-    integrity_logger = IntegrityLogger(config.log_dir)
+    integrity_logger = IntegrityLogger(config.log_dir, config.symbol_keys)
     telegram = TelegramReporter(config)
-    buffer = DataBuffer(config.max_buffer_mb)
-    ob_manager = OrderBookManager(config.symbols, integrity_logger)
+    buffer = DataBuffer(config.max_buffer_mb, config.preserve_decimal_strings)
+    ob_manager = OrderBookManager(config.symbol_keys, integrity_logger)
     syncer = Syncer(config, integrity_logger)
     flusher = Flusher(config, buffer, integrity_logger,
                       on_file_created=syncer.enqueue_file)
@@ -67,7 +71,7 @@ async def main(config_path: str = "config.yaml") -> None:
     # 시작 알림
     await telegram.send_startup_report(config)
     logger.info("=== 바이낸스 데이터 수집 시스템 시작 ===")
-    logger.info(f"심볼: {[s.upper() for s in config.symbols]}")
+    logger.info(f"심볼: {config.symbol_keys}")
     logger.info(f"플러시 주기: {config.flush_interval}초")
 
     # 주기적 로그/리포트 태스크
@@ -80,8 +84,9 @@ async def main(config_path: str = "config.yaml") -> None:
         while True:
             await asyncio.sleep(86400)
             await integrity_logger.write_daily_summary()
-            stats = integrity_logger.get_periodic_stats()
-            await telegram.send_daily_report(stats)
+            await flusher.snapshot_checksums()  # checksums.json 일별 스냅샷
+            if telegram.enabled:
+                await telegram.send_daily_report(integrity_logger.get_periodic_stats())
 
     # 3분마다 실시간 시세 리포트
     async def live_ticker():
@@ -109,10 +114,13 @@ async def main(config_path: str = "config.yaml") -> None:
         time_sync.run(),
         periodic_log(),
         daily_summary(),
-        live_ticker(),
         force_flush_monitor(),
     ]
 
+    # 텔레그램 비활성화 시 티커 루프 자체를 띄우지 않음
+    if telegram.enabled:
+        tasks.append(live_ticker())
+
     # 선물 API 사용 시 펀딩비 수집 추가
     if config.use_futures:
         tasks.append(funding_collector.run())
@@ -147,10 +155,20 @@ async def main(config_path: str = "config.yaml") -> None:
         await flusher.flush_now()
     except Exception as e:
         logger.error(f"마지막 플러시 실패: {e}")
+    finally:
+        flusher.close()
+        await ob_manager.close()
+        await time_sync.aclose()
+        await telegram.aclose()
 
     logger.info("=== 시스템 종료 ===")
 
 
 if __name__ == "__main__":
     config_file = sys.argv[1] if len(sys.argv) > 1 else "config.yaml"
+    try:
+        import uvloop  # 선택: 리눅스/맥에서 이벤트 루프 가속
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main(config_file))
@@ -2,10 +2,24 @@
 
 from dataclasses import dataclass, field
 
+from sortedcontainers import SortedDict
+
+# 바이낸스가 문자열로 보내는 가격/수량 필드 - 수신 시 float 변환
+# (config.preserve_decimal_strings=True면 원문 문자열 유지)
+DECIMAL_FIELDS = frozenset({
+    "price", "quantity", "open", "high", "low", "close", "volume", "quote_volume",
+})
+
+# 청산 주문 방향 코드 (문자열 대신 1바이트 정수로 저장)
+SIDE_SELL = 0
+SIDE_BUY = 1
+SIDE_UNKNOWN = -1
+SIDE_CODES = {"SELL": SIDE_SELL, "BUY": SIDE_BUY}
+
 
 # ── 오더북 관련 ──
 
-@dataclass
+@dataclass(slots=True)
 class DepthDiffEvent:
     """바이낸스 depth_diff WebSocket 이벤트"""
     symbol: str
@@ -17,17 +31,30 @@ class DepthDiffEvent:
     asks: list[list[str]]        # [[price, qty], ...]
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderBookState:
-    """심볼별 오더북 내부 상태"""
-    bids: dict[str, str] = field(default_factory=dict)
-    asks: dict[str, str] = field(default_factory=dict)
+    """심볼별 오더북 내부 상태
+
+    float 가격 키로 정렬된 SortedDict, 값은 원문 [price, qty] (정밀도 손실 없음).
+    bids는 -가격 키라서 두 쪽 모두 앞에서부터 최우선 호가 순.
+    """
+    bids: SortedDict = field(default_factory=SortedDict)   # -float(price) → [price, qty]
+    asks: SortedDict = field(default_factory=SortedDict)   # float(price) → [price, qty]
     last_update_id: int = 0
     initialized: bool = False
     init_time: float = 0.0       # 초기화 시각 (grace period용)
 
+    # 최우선 호가는 정렬 키 자체 - 전체 순회나 문자열 재파싱 없이 맨 앞 키만 읽는다
+    @property
+    def best_bid(self) -> float:
+        return -self.bids.peekitem(0)[0]
+
+    @property
+    def best_ask(self) -> float:
+        return self.asks.peekitem(0)[0]
 
-@dataclass
+
+@dataclass(slots=True)
 class OrderBookSnapshot:
     """버퍼에 저장되는 오더북 스냅샷 레코드"""
     symbol: str
@@ -40,13 +67,13 @@ class OrderBookSnapshot:
 
 # ── 체결 관련 ──
 
-@dataclass
+@dataclass(slots=True)
 class AggTradeEvent:
     """바이낸스 aggTrade WebSocket 이벤트"""
     symbol: str
     trade_id: int
-    price: str
-    quantity: str
+    price: float
+    quantity: float
     first_trade_id: int
     last_trade_id: int
     trade_time: int              # T (ms)
@@ -56,21 +83,21 @@ class AggTradeEvent:
 
 # ── 청산 관련 ──
 
-@dataclass
+@dataclass(slots=True)
 class LiquidationEvent:
     """바이낸스 forceOrder WebSocket 이벤트"""
     symbol: str
-    side: str                    # SELL / BUY
+    side: int                    # SIDE_SELL(0) / SIDE_BUY(1)
     order_type: str
-    price: str
-    quantity: str
+    price: float
+    quantity: float
     trade_time: int              # T (ms)
     recv_time: float
 
 
 # ── 펀딩비 관련 ──
 
-@dataclass
+@dataclass(slots=True)
 class FundingRateRecord:
     """바이낸스 펀딩비 REST API 응답"""
     symbol: str
@@ -82,17 +109,28 @@ class FundingRateRecord:
 
 # ── 캔들 관련 ──
 
-@dataclass
+@dataclass(slots=True)
 class KlineEvent:
     """바이낸스 kline WebSocket 이벤트 (확정된 캔들만)"""
     symbol: str
     open_time: int               # t (ms)
     close_time: int              # T (ms)
-    open: str
-    high: str
-    low: str
-    close: str
-    volume: str
-    quote_volume: str
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    quote_volume: float
     trade_count: int
     recv_time: float
+
+
+# ── 시간 동기화 관련 ──
+
+@dataclass(slots=True, frozen=True)
+class TimeSyncRecord:
+    """NTP/바이낸스 시간 측정 1건 (time_sync_*.jsonl 한 줄)"""
+    timestamp: str               # UTC ISO 8601
+    ntp_offset_sec: float
+    binance_offset_sec: float
+    rtt_sec: float
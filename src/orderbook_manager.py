@@ -4,10 +4,12 @@ from __future__ import annotations
 
 import json
 import logging
+import sys
 import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 
 import aiohttp
+from sortedcontainers import SortedDict
 
 from src.models import DepthDiffEvent, OrderBookState, OrderBookSnapshot
 
@@ -16,6 +18,17 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# 수량 0 = 해당 가격 레벨 삭제
+_ZERO_QTYS = frozenset({"0", "0.00000000"})
+# 정렬 키 부호: bids는 -가격 키로 내림차순 저장
+BID_SIGN = -1.0
+ASK_SIGN = 1.0
+
+
+def make_book_side(levels: Iterable[list[str]], sign: float) -> SortedDict:
+    """[[price, qty], ...] → 정렬된 오더북 한쪽 (sign * float(price) → [price, qty])"""
+    return SortedDict({sign * float(level[0]): level for level in levels})
+
 
 class OrderBookManager:
     """오더북 재구성 및 시퀀스 검증"""
@@ -26,20 +39,27 @@ class OrderBookManager:
         self.symbols = symbols
         self.integrity_logger = integrity_logger
         self.books: dict[str, OrderBookState] = {
-            s.upper(): OrderBookState() for s in symbols
+            sys.intern(s.upper()): OrderBookState() for s in symbols
         }
+        # 스냅샷 REST 요청용 세션 - 첫 initialize에서 만들어 재초기화마다 재사용
+        self._session: aiohttp.ClientSession | None = None
+
+    def _key(self, symbol: str) -> str:
+        """books 키 (이미 대문자면 새 문자열 할당 없이 그대로 사용)"""
+        return symbol if symbol in self.books else symbol.upper()
 
     async def initialize(self, symbol: str, depth: int = 1000) -> None:
         """REST API로 초기 스냅샷 가져오기"""
-        sym = symbol.upper()
+        sym = self._key(symbol)
         url = f"{self.BASE_URL}/api/v3/depth?symbol={sym}&limit={depth}"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as resp:
-                data = await resp.json()
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        async with self._session.get(url) as resp:
+            data = await resp.json()
 
         state = OrderBookState(
-            bids={p: q for p, q in data.get("bids", [])},
-            asks={p: q for p, q in data.get("asks", [])},
+            bids=make_book_side(data.get("bids", []), BID_SIGN),
+            asks=make_book_side(data.get("asks", []), ASK_SIGN),
             last_update_id=data.get("lastUpdateId", 0),
             initialized=True,
             init_time=time.time(),
@@ -47,19 +67,29 @@ class OrderBookManager:
         self.books[sym] = state
         logger.info(f"[오더북] {sym} 스냅샷 초기화 완료 (lastUpdateId={state.last_update_id})")
 
+    async def close(self) -> None:
+        """스냅샷 세션 종료 (종료 시 호출)"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
     def validate_sequence(self, symbol: str, first_update_id: int,
                           final_update_id: int) -> bool:
         """lastUpdateId 연속성 검증: F <= last_update_id+1 <= L"""
-        sym = symbol.upper()
+        sym = self._key(symbol)
         state = self.books.get(sym)
         if not state or not state.initialized:
             return False
         expected = state.last_update_id + 1
         return first_update_id <= expected <= final_update_id
 
-    def apply_diff(self, symbol: str, event: DepthDiffEvent) -> OrderBookSnapshot | None:
-        """diff 적용 및 시퀀스 검증. 갭 감지 시 None 반환"""
-        sym = symbol.upper()
+    def apply_diff(self, symbol: str, event: DepthDiffEvent) -> tuple | None:
+        """diff 적용 및 시퀀스 검증. 갭 감지 시 None 반환
+
+        성공 시 OrderBookSnapshot 필드 순서의 행 튜플을 반환 → buffer.add_orderbook에 바로 전달
+        (스냅샷 객체 생성 생략).
+        """
+        sym = self._key(symbol)
         state = self.books.get(sym)
         if not state or not state.initialized:
             return None
@@ -70,8 +100,9 @@ class OrderBookManager:
         if event.final_update_id < expected:
             return None
 
-        # 시퀀스 검증
-        if not self.validate_sequence(sym, event.first_update_id, event.final_update_id):
+        # 시퀀스 검증 (validate_sequence 인라인): L >= expected는 위에서 확인했으므로
+        # F <= expected 비교 하나로 충분 - state 재조회/심볼 정규화 반복 없음
+        if event.first_update_id > expected:
             # 초기화 직후 3초 grace period: 재초기화 트리거하지 않고 skip
             if time.time() - state.init_time < 3.0:
                 return None
@@ -91,36 +122,39 @@ class OrderBookManager:
             return None
 
         # diff 적용
-        self._apply_updates(state.bids, event.bids)
-        self._apply_updates(state.asks, event.asks)
+        self._apply_updates(state.bids, event.bids, BID_SIGN)
+        self._apply_updates(state.asks, event.asks, ASK_SIGN)
         state.last_update_id = event.final_update_id
 
-        return self.get_top_levels(sym, event_time=event.event_time,
-                                   recv_time=event.recv_time)
+        return self._top_levels_row(sym, state, 20, event.event_time, event.recv_time)
 
     @staticmethod
-    def _apply_updates(book_side: dict[str, str], updates: list[list[str]]) -> None:
-        """오더북 한쪽(bids 또는 asks)에 업데이트 적용"""
-        for price, qty in updates:
-            if qty == "0" or qty == "0.00000000":
-                book_side.pop(price, None)
-            else:
-                book_side[price] = qty
+    def _apply_updates(book_side: SortedDict, updates: list[list[str]], sign: float) -> None:
+        """오더북 한쪽(bids 또는 asks)에 업데이트 적용
+
+        dict(updates)로 가격별 마지막 수량만 남긴 뒤, 가격마다 float 변환은 한 번만 하고
+        갱신은 update 한 번, 수량 0인 가격은 삭제. 값은 수신한 [price, qty] 리스트 그대로.
+        """
+        zeros = _ZERO_QTYS
+        latest = dict(updates)
+        book_side.update({sign * float(p): [p, q] for p, q in latest.items() if q not in zeros})
+        for price in [p for p, q in latest.items() if q in zeros]:
+            book_side.pop(sign * float(price), None)
 
     def get_top_levels(self, symbol: str, levels: int = 20,
                        event_time: int = 0, recv_time: float = 0.0) -> OrderBookSnapshot:
-        """상위 N호가 반환 (bids 내림차순, asks 오름차순)"""
-        sym = symbol.upper()
-        state = self.books[sym]
-
-        sorted_bids = sorted(state.bids.items(), key=lambda x: float(x[0]), reverse=True)[:levels]
-        sorted_asks = sorted(state.asks.items(), key=lambda x: float(x[0]))[:levels]
-
-        return OrderBookSnapshot(
-            symbol=sym,
-            event_time=event_time,
-            recv_time=recv_time,
-            last_update_id=state.last_update_id,
-            bids=[[p, q] for p, q in sorted_bids],
-            asks=[[p, q] for p, q in sorted_asks],
-        )
+        """상위 N호가 반환 (bids 내림차순, asks 오름차순)
+
+        두 쪽 모두 이미 정렬돼 있으므로 앞에서 N개만 잘라낸다 (전체 정렬/float 재파싱 없음).
+        레벨 리스트는 갱신 시 교체될 뿐 변경되지 않으므로 복사 없이 공유.
+        """
+        sym = self._key(symbol)
+        return OrderBookSnapshot(*self._top_levels_row(sym, self.books[sym], levels,
+                                                       event_time, recv_time))
+
+    @staticmethod
+    def _top_levels_row(sym: str, state: OrderBookState, levels: int,
+                        event_time: int, recv_time: float) -> tuple:
+        """상위 N호가 행 튜플 (OrderBookSnapshot 필드 순서)"""
+        return (sym, event_time, recv_time, state.last_update_id,
+                state.bids.values()[:levels], state.asks.values()[:levels])
@@ -1,10 +1,13 @@
-"""클라우드 동기화 및 로컬 정리 모듈 - rclone 업로드, 실패 대기열, 오래된 파일 삭제"""
+"""클라우드 동기화 및 로컬 정리 모듈 - rclone/S3 업로드, 실패 대기열, 오래된 파일 삭제"""
 
 from __future__ import annotations
 
 import asyncio
 import logging
+import os
 import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
 from pathlib import Path
 
 from src.config import Config
@@ -12,6 +15,8 @@ from src.integrity_logger import IntegrityLogger
 
 logger = logging.getLogger(__name__)
 
+S3_MULTIPART_THRESHOLD = 8 << 20  # 8MB 이상은 멀티파트 업로드
+
 
 class Syncer:
     """클라우드 동기화 및 로컬 정리"""
@@ -21,6 +26,15 @@ class Syncer:
         self.logger = integrity_logger
         self._pending_queue: list[Path] = []
         self._synced_files: set[str] = set()
+        # 동시에 실행되는 rclone 프로세스 / S3 업로드 수 제한
+        self._upload_sem = asyncio.Semaphore(config.sync_concurrency)
+        # cloud_backend="s3" 또는 cloud_remote="s3:버킷"일 때 run() 동안 유지되는
+        # aioboto3 클라이언트 (미설치면 run() 시작 시 에러 - rclone 대상으로 쓸 수 없는 이름이라)
+        remote = config.cloud_remote
+        self.use_s3 = config.cloud_backend == "s3" or remote.startswith("s3:")
+        self.s3_bucket = remote.removeprefix("s3:")
+        self._s3 = None
+        self._s3_transfer_config = None
 
     def enqueue_file(self, filepath: Path) -> None:
         """Flusher 콜백 - 새 파일을 동기화 대기열에 추가"""
@@ -28,16 +42,60 @@ class Syncer:
 
     async def run(self) -> None:
         """주기적 동기화 루프 - 대기열의 파일을 동기화하고 오래된 파일 정리"""
-        while True:
-            # 대기열에 있는 파일들 재시도
-            retry_queue = list(self._pending_queue)
-            self._pending_queue.clear()
-            for filepath in retry_queue:
-                if filepath.exists():
-                    await self.sync_file(filepath)
-
-            await self.cleanup_old_files()
-            await asyncio.sleep(self.config.flush_interval)
+        async with AsyncExitStack() as stack:
+            if self.use_s3:
+                self._s3 = await self._open_s3_client(stack)
+            try:
+                while True:
+                    # 대기열에 있는 파일들 재시도 (동시 업로드)
+                    retry_queue = [p for p in self._pending_queue if p.exists()]
+                    self._pending_queue.clear()
+                    if retry_queue:
+                        await self.sync_files(retry_queue)
+
+                    await self.cleanup_old_files()
+                    await asyncio.sleep(self.config.flush_interval)
+            finally:
+                self._s3 = None
+
+    async def _open_s3_client(self, stack: AsyncExitStack):
+        """aioboto3 S3 클라이언트를 한 번 열어 run() 동안 재사용
+
+        S3를 골랐는데 aioboto3가 없으면 RuntimeError. rclone으로 넘기면 "버킷:경로"/"s3:버킷:경로"
+        같은 잘못된 대상으로 매 주기 업로드 실패·재큐잉만 반복하므로 시작 시점에 바로 알린다.
+        """
+        try:
+            import aioboto3
+            from aiobotocore.config import AioConfig
+            from boto3.s3.transfer import TransferConfig
+        except ImportError as e:
+            logger.error("[Syncer] S3 동기화 설정이지만 aioboto3 미설치 - 동기화 중단 "
+                         "(pip install aioboto3 또는 cloud_backend: rclone)")
+            raise RuntimeError("cloud_backend=s3 requires aioboto3") from e
+        concurrency = self.config.sync_concurrency
+        self._s3_transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            max_concurrency=concurrency,
+        )
+        # 동시 업로드 수 × 파일당 멀티파트 동시성만큼 연결 풀 확보 (기본 10개면 대기 발생)
+        client_config = AioConfig(max_pool_connections=max(10, concurrency * concurrency))
+        return await stack.enter_async_context(
+            aioboto3.Session().client("s3", config=client_config))
+
+    async def sync_files(self, filepaths: list[Path]) -> None:
+        """여러 파일 동시 업로드 - 같은 디렉토리 파일은 rclone 한 번으로 묶음"""
+        if self._s3 is not None:
+            # S3는 프로세스 기동 비용이 없으므로 파일별 업로드를 그대로 동시 실행
+            await asyncio.gather(*(self.sync_file(p) for p in filepaths), return_exceptions=True)
+            return
+        groups: dict[Path, list[Path]] = defaultdict(list)
+        for filepath in filepaths:
+            groups[filepath.parent].append(filepath)
+        await asyncio.gather(
+            *(self.sync_file(files[0]) if len(files) == 1 else self.sync_batch(src_dir, files)
+              for src_dir, files in groups.items()),
+            return_exceptions=True,
+        )
 
     async def sync_file(self, filepath: Path) -> bool:
         """단일 파일 클라우드 업로드. 성공 시 True, 실패 시 False."""
@@ -48,37 +106,94 @@ class Syncer:
             logger.warning("[Syncer] cloud_remote 미설정, 동기화 건너뜀")
             return False
 
+        if self._s3 is not None:
+            return await self._upload_s3(filepath)
+
         cmd = [
             "rclone", "copy",
             str(filepath),
             f"{remote}:{cloud_path}",
         ]
+        return await self._run_rclone(cmd, [filepath])
+
+    async def sync_batch(self, src_dir: Path, filepaths: list[Path]) -> bool:
+        """같은 디렉토리의 여러 파일을 rclone 한 번으로 업로드 (파일 목록은 stdin).
+
+        프로세스 기동/설정 파싱/TLS 연결을 파일마다 반복하지 않고, 병렬 전송은 --transfers로.
+        """
+        remote = self.config.cloud_remote
+        cloud_path = self.config.cloud_path
+
+        if not remote:
+            logger.warning("[Syncer] cloud_remote 미설정, 동기화 건너뜀")
+            return False
+
+        cmd = [
+            "rclone", "copy",
+            str(src_dir),
+            f"{remote}:{cloud_path}",
+            "--files-from-raw", "-",
+            "--transfers", str(self.config.sync_concurrency),
+        ]
+        file_list = "\n".join(p.name for p in filepaths).encode()
+        return await self._run_rclone(cmd, filepaths, file_list)
 
+    async def _upload_s3(self, filepath: Path) -> bool:
+        """S3 업로드 (cloud_remote=버킷 또는 s3:버킷, cloud_path=키 접두사). 결과 기록은 rclone과 동일"""
+        key = f"{self.config.cloud_path.strip('/')}/{filepath.name}".lstrip("/")
         try:
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            stdout, stderr = await proc.communicate()
+            async with self._upload_sem:
+                await self._s3.upload_file(
+                    str(filepath), self.s3_bucket, key,
+                    Config=self._s3_transfer_config,
+                )
+        except Exception as e:
+            self._mark_failed([filepath])
+            logger.error(f"[Syncer] S3 업로드 실패: {filepath} {e}")
+            return False
+        self._mark_synced([filepath])
+        logger.info(f"[Syncer] 업로드 성공: {filepath}")
+        return True
+
+    def _mark_synced(self, filepaths: list[Path]) -> None:
+        for filepath in filepaths:
+            self._synced_files.add(str(filepath))
+            self.logger.record_sync(str(filepath), "success")
+
+    def _mark_failed(self, filepaths: list[Path]) -> None:
+        """실패한 파일은 재시도 대기열로"""
+        for filepath in filepaths:
+            self._pending_queue.append(filepath)
+            self.logger.record_sync(str(filepath), "failed")
+
+    async def _run_rclone(self, cmd: list[str], filepaths: list[Path],
+                          stdin_data: bytes | None = None) -> bool:
+        """rclone 실행 후 파일별 결과 기록. 실패한 파일은 재시도 대기열로."""
+        label = str(filepaths[0]) if len(filepaths) == 1 else f"{len(filepaths)}개 파일"
+        try:
+            async with self._upload_sem:
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdin=asyncio.subprocess.PIPE if stdin_data is not None else None,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                stdout, stderr = await proc.communicate(stdin_data)
 
             if proc.returncode == 0:
-                self._synced_files.add(str(filepath))
-                self.logger.record_sync(str(filepath), "success")
-                logger.info(f"[Syncer] 업로드 성공: {filepath}")
+                self._mark_synced(filepaths)
+                logger.info(f"[Syncer] 업로드 성공: {label}")
                 return True
             else:
-                self._pending_queue.append(filepath)
-                self.logger.record_sync(str(filepath), "failed")
+                self._mark_failed(filepaths)
                 logger.error(
-                    f"[Syncer] 업로드 실패: {filepath} "
+                    f"[Syncer] 업로드 실패: {label} "
                     f"returncode={proc.returncode} stderr={stderr.decode()}"
                 )
                 return False
         except Exception as e:
-            self._pending_queue.append(filepath)
-            self.logger.record_sync(str(filepath), "failed")
-            logger.error(f"[Syncer] 업로드 예외: {filepath} {e}")
+            self._mark_failed(filepaths)
+            logger.error(f"[Syncer] 업로드 예외: {label} {e}")
             return False
 
     async def cleanup_old_files(self) -> None:
@@ -90,12 +205,15 @@ class Syncer:
         now = time.time()
         cutoff_seconds = self.config.cleanup_days * 86400
 
-        for filepath in data_dir.glob("*.parquet"):
-            file_age = now - filepath.stat().st_mtime
-            is_old_enough = file_age >= cutoff_seconds
-            is_synced = str(filepath) in self._synced_files
+        with os.scandir(data_dir) as it:
+            entries = [e for e in it if e.name.endswith(".parquet")]
 
-            if is_old_enough and is_synced:
+        for entry in entries:
+            filepath = data_dir / entry.name
+            # 동기화 여부(set 조회)를 먼저 확인해 미동기화 파일은 stat 생략
+            if str(filepath) not in self._synced_files:
+                continue
+            if now - entry.stat().st_mtime >= cutoff_seconds:
                 try:
                     filepath.unlink()
                     logger.info(f"[Syncer] 삭제: {filepath}")
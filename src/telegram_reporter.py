@@ -1,15 +1,62 @@
 """텔레그램 봇을 통한 상태 리포트 및 알림 모듈"""
 
+import asyncio
 import logging
+import random
 import ssl
+import time
 from datetime import datetime, timezone
 
 import aiohttp
+import orjson
 
 from src.config import Config
 
 logger = logging.getLogger(__name__)
 
+MAX_MESSAGE_CHARS = 4096     # sendMessage 텍스트 상한
+BATCH_WINDOW = 0.5           # 연속 알림을 한 메시지로 묶는 대기 시간 (초)
+BATCH_MAX_MESSAGES = 20
+_JSON_HEADERS = {"Content-Type": "application/json"}
+SEND_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5       # 재시도 대기: min(30, 0.5 * 2^n) * U(0.5, 1.5)
+_NO_RETRY_STATUSES = frozenset({400, 401, 403})  # 요청/토큰 문제 → 재시도 무의미
+# 바이트 단위 표 (나눗수, 포맷) - 인덱스 = bit_length 기준 1024 거듭제곱 지수
+_SIZE_SCALES = (
+    (1, "{:.0f}B"),
+    (1024, "{:.1f}KB"),
+    (1024 ** 2, "{:.1f}MB"),
+    (1024 ** 3, "{:.2f}GB"),
+)
+
+
+class CircuitBreaker:
+    """연속 실패 시 일정 시간 호출을 차단 (CLOSED → OPEN → HALF_OPEN → CLOSED)"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.failure_threshold:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN  # 시험 호출 1회 허용
+        return self.OPEN
+
+    def record_success(self) -> None:
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        """실패 기록. 임계값 도달(또는 HALF_OPEN 시험 실패) 시 다시 OPEN"""
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
 
 
 class TelegramReporter:
@@ -19,11 +66,47 @@ class TelegramReporter:
         self.bot_token = config.telegram_bot_token
         self.chat_id = config.telegram_chat_id
         self.enabled = bool(self.bot_token and self.chat_id)
+        self._url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+        # 고정 필드(chat_id, parse_mode)는 미리 직렬화 → 전송마다 text만 인코딩해 이어 붙임
+        self._payload_prefix = (b'{"chat_id":' + orjson.dumps(self.chat_id)
+                                + b',"parse_mode":"HTML","text":')
+        # 모든 알림이 공유하는 세션 - 메시지마다 TCP+TLS 핸드셰이크 반복 방지
+        self._session: aiohttp.ClientSession | None = None
+        self._session_lock = asyncio.Lock()
+        # 심볼 → "<code>BTCUSDT   </code>" 셀 (3분 티커/플러시 리포트마다 재포맷하지 않도록)
+        self._sym_cells: dict[str, str] = {}
+        # 알림 대기열 → 백그라운드 워커가 BATCH_WINDOW 안의 메시지를 묶어 한 번에 전송
+        # (재연결 폭주/다심볼 갭 연쇄 시 POST 수와 429 감소). 긴급 알림은 대기 없이 즉시 전송
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=256)
+        self._urgent = asyncio.Event()
+        self._worker: asyncio.Task | None = None
+        # 텔레그램 장애 시 알림마다 10초 타임아웃이 쌓이지 않도록 차단
+        self._breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+        # 비활성화 시 send_*를 인스턴스 수준에서 no-op으로 바꿔 호출마다 enabled 검사/포맷팅 생략.
+        # 호출부도 비싼 인자를 만들기 전에 enabled로 먼저 거를 수 있다.
+        if not self.enabled:
+            for name in self._SEND_METHODS:
+                setattr(self, name, self._noop)
+
+    _SEND_METHODS = (
+        "send_message", "send_startup_report", "send_flush_report", "send_disconnect_alert",
+        "send_reconnect_alert", "send_gap_alert", "send_daily_report", "send_live_ticker",
+    )
+
+    @staticmethod
+    async def _noop(*args, **kwargs) -> None:
+        return None
 
     @staticmethod
     def _now_str() -> str:
         return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
 
+    def _sym_cell(self, symbol: str) -> str:
+        cell = self._sym_cells.get(symbol)
+        if cell is None:
+            cell = self._sym_cells[symbol] = f"<code>{symbol:<10}</code>"
+        return cell
+
     @staticmethod
     def _bar(ratio: float, length: int = 10) -> str:
         """비율(0~1)을 시각적 프로그레스 바로 변환"""
@@ -32,39 +115,128 @@ class TelegramReporter:
 
     @staticmethod
     def _format_bytes(size_bytes: float) -> str:
-        """바이트를 사람이 읽기 쉬운 단위로 변환"""
-        if size_bytes < 1024:
-            return f"{size_bytes:.0f}B"
-        elif size_bytes < 1024 ** 2:
-            return f"{size_bytes / 1024:.1f}KB"
-        elif size_bytes < 1024 ** 3:
-            return f"{size_bytes / 1024 ** 2:.1f}MB"
-        return f"{size_bytes / 1024 ** 3:.2f}GB"
+        """바이트를 사람이 읽기 쉬운 단위로 변환 (비교 분기 대신 bit_length로 단위 선택)"""
+        idx = min(max(0, (int(size_bytes).bit_length() - 1) // 10), 3)
+        divisor, fmt = _SIZE_SCALES[idx]
+        return fmt.format(size_bytes / divisor)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """공유 세션 반환 (첫 전송 시 생성, 닫혔으면 재생성)"""
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                ssl_ctx = ssl.create_default_context()
+                ssl_ctx.check_hostname = False
+                ssl_ctx.verify_mode = ssl.CERT_NONE
+                conn = aiohttp.TCPConnector(ssl=ssl_ctx, limit=4,
+                                            keepalive_timeout=75, ttl_dns_cache=300)
+                self._session = aiohttp.ClientSession(
+                    connector=conn, timeout=aiohttp.ClientTimeout(total=10))
+            return self._session
+
+    async def aclose(self) -> None:
+        """대기 중인 알림을 모두 보낸 뒤 워커와 공유 세션 종료 (종료 시 호출)"""
+        if self._worker is not None:
+            self._urgent.set()
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=15)
+            except asyncio.TimeoutError:
+                logger.warning("[텔레그램] 종료 시 미전송 알림 %d건", self._queue.qsize())
+            self._worker.cancel()
+            self._worker = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
     async def send_message(self, text: str) -> None:
-        """텔레그램 메시지 전송 (실패 시 로깅만, 수집에 영향 없음)"""
-        if not self.enabled:
-            return
+        """텔레그램 메시지 전송 예약 (대기열에 넣고 즉시 반환, 수집에 영향 없음)"""
         try:
-            url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-            payload = {"chat_id": self.chat_id, "text": text, "parse_mode": "HTML"}
-            ssl_ctx = ssl.create_default_context()
-            ssl_ctx.check_hostname = False
-            ssl_ctx.verify_mode = ssl.CERT_NONE
-            conn = aiohttp.TCPConnector(ssl=ssl_ctx)
-            async with aiohttp.ClientSession(connector=conn) as session:
-                async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                    if resp.status != 200:
-                        body = await resp.text()
-                        logger.warning("텔레그램 전송 실패 (status=%d): %s", resp.status, body)
-        except Exception:
-            logger.warning("텔레그램 메시지 전송 중 예외 발생", exc_info=True)
+            self._queue.put_nowait(text)
+        except asyncio.QueueFull:
+            logger.warning("[텔레그램] 전송 대기열 가득 참, 알림 버림")
+            return
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain_loop())
+
+    async def _send_urgent(self, text: str) -> None:
+        """묶음 대기 없이 바로 전송 (이미 모인 알림과 함께)"""
+        self._urgent.set()
+        await self.send_message(text)
+
+    async def _drain_loop(self) -> None:
+        """대기열 소비: 첫 알림 후 BATCH_WINDOW 동안 더 모아 묶음 전송"""
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < BATCH_MAX_MESSAGES and not self._urgent.is_set():
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=BATCH_WINDOW))
+                except asyncio.TimeoutError:
+                    break
+            while len(batch) < BATCH_MAX_MESSAGES and not queue.empty():
+                batch.append(queue.get_nowait())
+            self._urgent.clear()
+            for text in self._coalesce(batch):
+                await self._post_message(text)
+            for _ in batch:
+                queue.task_done()
+            if self._breaker.state == CircuitBreaker.OPEN:
+                self._drop_pending()
+
+    def _drop_pending(self) -> None:
+        """차단 중 쌓인 알림 폐기 (장애가 길어져도 대기열이 밀리지 않도록)"""
+        dropped = 0
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+            dropped += 1
+        if dropped:
+            logger.warning("[텔레그램] 전송 차단 중, 대기 알림 %d건 폐기", dropped)
+
+    @staticmethod
+    def _coalesce(texts: list[str]) -> list[str]:
+        """메시지들을 빈 줄로 이어 붙이되 MAX_MESSAGE_CHARS를 넘지 않게 나눔"""
+        merged: list[str] = []
+        for text in texts:
+            if merged and len(merged[-1]) + 2 + len(text) <= MAX_MESSAGE_CHARS:
+                merged[-1] = f"{merged[-1]}\n\n{text}"
+            else:
+                merged.append(text)
+        return merged
+
+    async def _post_message(self, text: str) -> None:
+        """sendMessage 호출 - 일시 장애(429/5xx/타임아웃/연결)는 지터 백오프로 최대 3회.
+
+        실패는 로깅만 하고 호출자에게 전파하지 않는다. 서킷이 열려 있으면 바로 버림.
+        """
+        breaker = self._breaker
+        body = self._payload_prefix + orjson.dumps(text) + b"}"
+        for attempt in range(SEND_ATTEMPTS):
+            if breaker.state == CircuitBreaker.OPEN:
+                logger.warning("[텔레그램] 전송 차단 중 (연속 실패 %d회), 알림 버림", breaker.failures)
+                return
+            try:
+                session = await self._get_session()
+                async with session.post(self._url, data=body, headers=_JSON_HEADERS) as resp:
+                    if resp.status == 200:
+                        breaker.record_success()
+                        return
+                    detail = await resp.text()
+                    logger.warning("텔레그램 전송 실패 (status=%d): %s", resp.status, detail)
+                    if resp.status in _NO_RETRY_STATUSES:
+                        return
+            except (asyncio.TimeoutError, aiohttp.ClientError, OSError) as e:
+                logger.warning(f"[텔레그램] 전송 오류 (시도 {attempt + 1}/{SEND_ATTEMPTS}): {e!r}")
+            except Exception:
+                logger.warning("텔레그램 메시지 전송 중 예외 발생", exc_info=True)
+                return
+            breaker.record_failure()
+            if attempt < SEND_ATTEMPTS - 1:
+                await asyncio.sleep(min(30.0, RETRY_BASE_DELAY * 2 ** attempt)
+                                    * random.uniform(0.5, 1.5))
 
     async def send_startup_report(self, config: Config) -> None:
         """시스템 시작 알림 — 대시보드 스타일"""
-        if not self.enabled:
-            return
-        sym_list = " ".join(f"<code>{s.upper()}</code>" for s in config.symbols)
+        sym_list = config.symbols_html
         cloud_status = f"✅ {config.cloud_remote}" if config.cloud_remote else "⛔ 미설정"
         futures_status = "✅ ON" if config.use_futures else "⛔ OFF"
         text = (
@@ -91,26 +263,21 @@ class TelegramReporter:
 
     async def send_flush_report(self, stats: dict) -> None:
         """플러시 완료 리포트 — 심볼별 테이블"""
-        if not self.enabled:
-            return
-        total_records = 0
-        total_size = 0
-        total_gaps = 0
-        rows = []
-        for symbol, info in stats.items():
-            rc = info.get("record_count", 0)
-            fs = info.get("file_size", 0)
-            gp = info.get("gaps", 0)
-            total_records += rc
-            total_size += fs
-            total_gaps += gp
-            gap_icon = "🔴" if gp > 0 else "🟢"
-            rows.append(
-                f"  {gap_icon} <code>{symbol:<10}</code> "
-                f"<code>{rc:>7,}</code>건  "
-                f"<code>{self._format_bytes(fs):>7}</code>"
-            )
-
+        # (심볼, 건수, 크기, 갭)을 한 번 추출 → 합계는 sum, 행은 컴프리헨션 한 번
+        items = [(symbol, info.get("record_count", 0), info.get("file_size", 0), info.get("gaps", 0))
+                 for symbol, info in stats.items()]
+        total_records = sum(t[1] for t in items)
+        total_size = sum(t[2] for t in items)
+        total_gaps = sum(t[3] for t in items)
+        fmt = self._format_bytes
+        rows = [
+            f"  {'🔴' if gp > 0 else '🟢'} {self._sym_cell(symbol)} "
+            f"<code>{rc:>7,}</code>건  <code>{fmt(fs):>7}</code>"
+            for symbol, rc, fs, gp in items
+        ]
+
+        # 행 블록도 f-string 조각으로 넣어 메시지 전체를 BUILD_STRING 한 번(최종 길이로 1회 할당)에 생성
+        table = "\n".join(rows)
         text = (
             "━━━━━━━━━━━━━━━━━━━━\n"
             "📊 <b>FLUSH COMPLETE</b>\n"
@@ -124,7 +291,7 @@ class TelegramReporter:
             "┌──────────────────────────┐\n"
             "│  상태  심볼        건수     크기  │\n"
             "├──────────────────────────┤\n"
-            + "\n".join(rows) + "\n"
+            f"{table}\n"
             "└──────────────────────────┘\n"
             "━━━━━━━━━━━━━━━━━━━━"
         )
@@ -132,8 +299,6 @@ class TelegramReporter:
 
     async def send_disconnect_alert(self, reason: str) -> None:
         """WebSocket 연결 끊김 — 긴급 알림 스타일"""
-        if not self.enabled:
-            return
         text = (
             "🔴🔴🔴🔴🔴🔴🔴🔴🔴🔴\n"
             "⚠️ <b>CONNECTION LOST</b>\n"
@@ -146,12 +311,10 @@ class TelegramReporter:
             "🔄 자동 재연결 시도 중...\n"
             "━━━━━━━━━━━━━━━━━━━━"
         )
-        await self.send_message(text)
+        await self._send_urgent(text)
 
     async def send_reconnect_alert(self, downtime_seconds: float) -> None:
         """재연결 성공 — 복구 알림"""
-        if not self.enabled:
-            return
         if downtime_seconds < 5:
             severity = "🟢 경미"
         elif downtime_seconds < 30:
@@ -176,8 +339,6 @@ class TelegramReporter:
 
     async def send_gap_alert(self, symbol: str, expected_id: int, actual_id: int) -> None:
         """데이터 갭 감지 — 경고 알림"""
-        if not self.enabled:
-            return
         missed = actual_id - expected_id
         text = (
             "━━━━━━━━━━━━━━━━━━━━\n"
@@ -198,8 +359,6 @@ class TelegramReporter:
 
     async def send_daily_report(self, daily_stats: dict) -> None:
         """일별 종합 리포트 — 풀 대시보드"""
-        if not self.enabled:
-            return
         total_records = daily_stats.get("total_records", 0)
         coverage = daily_stats.get("coverage", 0)
         disk_usage = daily_stats.get("disk_usage_mb", 0)
@@ -246,19 +405,23 @@ class TelegramReporter:
 
     async def send_live_ticker(self, ob_manager, buffer) -> None:
         """3분마다 실시간 시세 + 스프레드 + 수집 현황 리포트"""
-        if not self.enabled:
+        # 부팅 직후 초기화된 오더북이 없으면 짧은 알림만 (버퍼 집계/메모리 추정 생략)
+        if not any(state.initialized for state in ob_manager.books.values()):
+            await self.send_message(
+                "⏳ <b>WARMING UP</b>\n"
+                f"🕐 {self._now_str()}\n"
+                "오더북 스냅샷 초기화 중..."
+            )
             return
 
         rows = []
         for sym_upper, state in ob_manager.books.items():
             if not state.initialized or not state.bids or not state.asks:
-                rows.append(f"  ⚪ <code>{sym_upper:<10}</code> 초기화 중...")
+                rows.append(f"  ⚪ {self._sym_cell(sym_upper)} 초기화 중...")
                 continue
 
-            best_bid = max(state.bids.keys(), key=float)
-            best_ask = min(state.asks.keys(), key=float)
-            bid_f = float(best_bid)
-            ask_f = float(best_ask)
+            bid_f = state.best_bid
+            ask_f = state.best_ask
             spread = ask_f - bid_f
             spread_bps = (spread / ask_f) * 10000 if ask_f else 0
             mid = (bid_f + ask_f) / 2
@@ -272,7 +435,7 @@ class TelegramReporter:
                 sp_icon = "🔴"
 
             rows.append(
-                f"  {sp_icon} <code>{sym_upper:<10}</code> "
+                f"  {sp_icon} {self._sym_cell(sym_upper)} "
                 f"<b>${mid:>10,.2f}</b>  "
                 f"sp:<code>{spread_bps:.1f}bp</code>"
             )
@@ -281,6 +444,7 @@ class TelegramReporter:
         ob_total = sum(len(v) for v in buffer._orderbook_data.values())
         tr_total = sum(len(v) for v in buffer._trade_data.values())
         mem_mb = buffer.estimate_memory_usage() / (1024 * 1024)
+        table = "\n".join(rows)
 
         text = (
             "━━━━━━━━━━━━━━━━━━━━\n"
@@ -289,7 +453,7 @@ class TelegramReporter:
             f"🕐 {self._now_str()}\n"
             "\n"
             "┌── 💱 시세 / 스프레드 ──┐\n"
-            + "\n".join(rows) + "\n"
+            f"{table}\n"
             "└────────────────────────┘\n"
             "\n"
             "┌── 📊 버퍼 현황 ───────┐\n"
@@ -1,16 +1,19 @@
-"""시간 동기화 및 레이턴시 측정 모듈 - NTP 오프셋, 바이낸스 RTT"""
+"""시간 동기화 및 레이턴시 측정 모듈 - SNTP 오프셋, 바이낸스 RTT"""
 
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
+import struct
 import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import TYPE_CHECKING
 
 import aiohttp
+import orjson
+
+from src.models import TimeSyncRecord
 
 if TYPE_CHECKING:
     from src.config import Config
@@ -21,6 +24,41 @@ logger = logging.getLogger(__name__)
 
 MEASURE_INTERVAL = 600  # 10분
 NTP_ALERT_THRESHOLD = 0.1  # 100ms
+# 같은 종류 경고 재전송 최소 간격 - 측정 주기(10분)보다 길어야 시계가 계속 틀어져 있을 때 매 측정마다 보내지 않음
+ALERT_COOLDOWN = 3600
+NTP_SERVER = "pool.ntp.org"
+NTP_TIMEOUT = 5.0
+NTP_EPOCH_DELTA = 2208988800  # 1900-01-01 → 1970-01-01 (초)
+# SNTP 요청: LI=0, VN=3, Mode=3(client), 나머지 0 (48바이트)
+_SNTP_REQUEST = b"\x1b" + bytes(47)
+_NTP_TIMESTAMPS = struct.Struct("!IIII")  # 수신(T2), 송신(T3) 타임스탬프 (40바이트 오프셋 32~48)
+
+
+def _ntp_to_unix(seconds: int, fraction: int) -> float:
+    return seconds - NTP_EPOCH_DELTA + fraction / 2 ** 32
+
+
+def sntp_offset(response: bytes, t1: float, t4: float) -> float:
+    """SNTP 응답 → 로컬 시계 오프셋 (초): ((T2 - T1) + (T3 - T4)) / 2"""
+    rx_sec, rx_frac, tx_sec, tx_frac = _NTP_TIMESTAMPS.unpack_from(response, 32)
+    t2 = _ntp_to_unix(rx_sec, rx_frac)
+    t3 = _ntp_to_unix(tx_sec, tx_frac)
+    return ((t2 - t1) + (t3 - t4)) / 2.0
+
+
+class _SNTPProtocol(asyncio.DatagramProtocol):
+    """응답 패킷 하나를 (데이터, 수신 시각)으로 future에 전달"""
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if not self.future.done():
+            self.future.set_result((data, time.time()))
+
+    def error_received(self, exc: Exception) -> None:
+        if not self.future.done():
+            self.future.set_exception(exc)
 
 
 class TimeSyncMonitor:
@@ -35,38 +73,63 @@ class TimeSyncMonitor:
         self.telegram = telegram
         self.log_dir = Path(config.log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._migrate_legacy_files()
+        # 오늘 측정 파일 (UTC 날짜, 경로) - 날짜가 바뀔 때만 경로 생성
+        self._log_day: str | None = None
+        self._log_path: Path | None = None
+        # 경고 키 → 마지막 전송 시각 (time.monotonic)
+        self._alert_sent_at: dict[str, float] = {}
+        # 측정마다 재사용하는 keep-alive 세션 - RTT에 DNS/TCP/TLS 핸드셰이크가 섞이지 않도록
+        self._session: aiohttp.ClientSession | None = None
 
     async def run(self) -> None:
-        """10분 주기 측정 루프"""
+        """10분 주기 측정 루프 - 절대 마감 시각 기준이라 측정 소요 시간만큼 주기가 밀리지 않음"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
         while True:
             try:
-                ntp_offset = await self.measure_ntp_offset()
-                binance_offset, rtt = await self.measure_binance_offset()
+                # NTP/바이낸스 측정은 서로 독립 → 동시 실행 (둘 다 느려도 대기 시간이 겹침)
+                ntp_offset, (binance_offset, rtt) = await asyncio.gather(
+                    self.measure_ntp_offset(), self.measure_binance_offset())
                 await self.save_measurement(ntp_offset, binance_offset, rtt)
 
                 if abs(ntp_offset) > NTP_ALERT_THRESHOLD:
                     logger.warning(f"[시간동기화] NTP 오프셋 경고: {ntp_offset:.3f}초")
-                    if self.telegram:
-                        await self.telegram.send_message(
-                            f"⏰ NTP 오프셋 경고: {ntp_offset*1000:.1f}ms"
-                        )
+                    await self._maybe_alert("ntp_offset", f"⏰ NTP 오프셋 경고: {ntp_offset*1000:.1f}ms")
             except Exception as e:
                 logger.error(f"[시간동기화] 측정 실패: {e}")
-            await asyncio.sleep(MEASURE_INTERVAL)
+            deadline += MEASURE_INTERVAL
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+
+    async def _maybe_alert(self, key: str, text: str) -> None:
+        """텔레그램 경고 전송 - 같은 key는 ALERT_COOLDOWN 안에 한 번만"""
+        if not self.telegram:
+            return
+        now = time.monotonic()
+        last = self._alert_sent_at.get(key)
+        if last is not None and now - last < ALERT_COOLDOWN:
+            return
+        self._alert_sent_at[key] = now
+        await self.telegram.send_message(text)
 
     async def measure_ntp_offset(self) -> float:
-        """NTP 서버와 로컬 시계 오프셋 측정 (초). ntplib 없으면 0.0 반환."""
+        """NTP 서버와 로컬 시계 오프셋 측정 (초). 실패 시 0.0 반환.
+
+        48바이트 SNTP 요청/응답을 이벤트 루프의 UDP 엔드포인트로 직접 주고받는다
+        (스레드 풀 왕복/ntplib 불필요).
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
         try:
-            import ntplib
-            client = ntplib.NTPClient()
-            loop = asyncio.get_running_loop()
-            response = await loop.run_in_executor(
-                None, lambda: client.request("pool.ntp.org", version=3)
-            )
-            return response.offset
-        except ImportError:
-            logger.warning("[시간동기화] ntplib 미설치, NTP 오프셋 측정 건너뜀")
-            return 0.0
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _SNTPProtocol(future), remote_addr=(NTP_SERVER, 123))
+            try:
+                t1 = time.time()
+                transport.sendto(_SNTP_REQUEST)
+                data, t4 = await asyncio.wait_for(future, timeout=NTP_TIMEOUT)
+            finally:
+                transport.close()
+            return sntp_offset(data, t1, t4)
         except Exception as e:
             logger.warning(f"[시간동기화] NTP 측정 실패: {e}")
             return 0.0
@@ -74,41 +137,72 @@ class TimeSyncMonitor:
     async def measure_binance_offset(self) -> tuple[float, float]:
         """바이낸스 서버 시간 차이 및 ping RTT 측정. (offset_sec, rtt_sec)"""
         try:
-            async with aiohttp.ClientSession() as session:
-                t1 = time.time()
-                async with session.get(
-                    self.BINANCE_TIME_URL,
-                    timeout=aiohttp.ClientTimeout(total=5),
-                ) as resp:
-                    t2 = time.time()
-                    data = await resp.json()
-                    server_time = data.get("serverTime", 0) / 1000.0
-                    rtt = t2 - t1
-                    local_mid = (t1 + t2) / 2.0
-                    offset = server_time - local_mid
-                    return offset, rtt
+            if self._session is None or self._session.closed:
+                self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(
+                    limit=2, keepalive_timeout=MEASURE_INTERVAL + 60, ttl_dns_cache=600))
+            # RTT는 monotonic 시계로 - 측정 대상인 벽시계 보정(slew/step)에 영향받지 않음
+            # 벽시계는 요청 직전 한 번만 읽고 중간 시각 = 그 시각 + RTT/2
+            wall1 = time.time_ns()
+            mono1 = time.monotonic_ns()
+            async with self._session.get(
+                self.BINANCE_TIME_URL,
+                timeout=aiohttp.ClientTimeout(total=5),
+            ) as resp:
+                rtt_ns = time.monotonic_ns() - mono1
+                data = await resp.json()
+                # 정수 ns로 계산 후 마지막에만 초 변환 (float 에폭 시각끼리 빼는 반올림 오차 없음)
+                server_ns = int(data.get("serverTime", 0)) * 1_000_000
+                offset_ns = server_ns - (wall1 + rtt_ns // 2)
+                return offset_ns / 1e9, rtt_ns / 1e9
         except Exception as e:
             logger.warning(f"[시간동기화] 바이낸스 측정 실패: {e}")
             return 0.0, 0.0
 
+    async def aclose(self) -> None:
+        """측정 세션 종료 (종료 시 호출)"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
     async def save_measurement(self, ntp_offset: float,
                                binance_offset: float, rtt: float) -> None:
-        """측정 결과를 time_sync_{YYYYMMDD}.json에 저장"""
+        """측정 결과를 time_sync_{YYYYMMDD}.jsonl에 한 줄 추가 (파일 전체 재작성 없음)"""
         now = datetime.now(timezone.utc)
-        filename = f"time_sync_{now.strftime('%Y%m%d')}.json"
-        filepath = self.log_dir / filename
-
-        entry = {
-            "timestamp": now.isoformat(),
-            "ntp_offset_sec": ntp_offset,
-            "binance_offset_sec": binance_offset,
-            "rtt_sec": rtt,
-        }
-
-        entries = []
-        if filepath.exists():
-            with open(filepath, "r") as f:
-                entries = json.load(f)
-        entries.append(entry)
-        with open(filepath, "w") as f:
-            json.dump(entries, f, indent=2)
+        filepath = self._measurement_path(now)
+
+        record = TimeSyncRecord(now.isoformat(), ntp_offset, binance_offset, rtt)
+
+        # 10분에 한 줄(< PIPE_BUF)이라 O_APPEND 단일 write로 충분
+        # orjson이 slots 데이터클래스를 필드 순서 그대로 직렬화 (중간 dict 없음)
+        with open(filepath, "ab") as f:
+            f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+
+    def _measurement_path(self, now: datetime) -> Path:
+        """now(UTC) 날짜의 측정 파일 경로 - 날짜가 바뀐 첫 저장에서만 새로 만듦"""
+        day = now.strftime("%Y%m%d")
+        if day != self._log_day:
+            self._log_day, self._log_path = day, self.log_dir / f"time_sync_{day}.jsonl"
+        return self._log_path
+
+    def _migrate_legacy_files(self) -> None:
+        """log_dir의 이전 형식 time_sync_*.json(JSON 배열)을 날짜와 상관없이 전부 JSONL로 변환 (시작 시 1회)"""
+        for legacy in sorted(self.log_dir.glob("time_sync_*.json")):
+            self._migrate_legacy(legacy, legacy.with_suffix(".jsonl"))
+
+    @staticmethod
+    def _migrate_legacy(legacy: Path, jsonl_path: Path) -> None:
+        """이전 형식(JSON 배열) 파일을 JSONL 앞부분으로 옮기고 삭제 (1회)"""
+        with open(legacy, "rb") as f:
+            entries = orjson.loads(f.read() or b"[]")
+        existing = jsonl_path.read_bytes() if jsonl_path.exists() else b""
+        with open(jsonl_path, "wb") as f:
+            f.write(b"".join(orjson.dumps(e, option=orjson.OPT_APPEND_NEWLINE) for e in entries))
+            f.write(existing)
+        legacy.unlink()
+        logger.info(f"[시간동기화] {legacy.name} → {jsonl_path.name} 변환 ({len(entries)}건)")
+
+    @staticmethod
+    def read_measurements(filepath: Path) -> list[dict]:
+        """JSONL 측정 파일 읽기 (한 줄 = 측정 1건)"""
+        with open(filepath, "rb") as f:
+            return [orjson.loads(line) for line in f if line.strip()]
@@ -0,0 +1,54 @@
+"""공용 pytest 픽스처"""
+
+import asyncio
+import functools
+import os
+import tempfile
+
+import pytest
+from hypothesis import settings
+
+# Hypothesis 프로파일 (HYP_PROFILE로 선택) - 예제 수 조정은 여기 한 곳에서
+#   fast(10회): 스모크, dev(20회, 기본): 로컬, ci(100회): CI, full(200회, 데드라인 없음): 야간
+# 개별 @settings(max_examples=...)가 없는 속성 테스트에 적용
+settings.register_profile("fast", max_examples=10)
+settings.register_profile("dev", max_examples=20)
+settings.register_profile("ci", max_examples=100)
+settings.register_profile("full", max_examples=200, deadline=None)
+settings.load_profile(os.environ.get("HYP_PROFILE", "dev"))
+
+
+@pytest.fixture(scope="session")
+def pd_mod():
+    """pandas 지연 import - 필요한 테스트에서만 로드 (수집 단계/워커 기동 비용 절감)"""
+    import pandas as pd
+    return pd
+
+
+@pytest.fixture(scope="module")
+def loop():
+    """모듈 단위로 공유하는 이벤트 루프 (asyncio.run마다 루프 생성/정리 비용 제거)
+
+    Python 3.12+면 eager 태스크 팩토리로 동기 완료되는 코루틴은 스케줄러를 거치지 않는다.
+    """
+    loop = asyncio.new_event_loop()
+    eager_task_factory = getattr(asyncio, "eager_task_factory", None)
+    if eager_task_factory is not None:
+        loop.set_task_factory(eager_task_factory)
+    yield loop
+    loop.close()
+
+
+def _shm_dir() -> str | None:
+    """쓰기 가능한 tmpfs(/dev/shm)가 있으면 그 경로, 없으면 None (기본 임시 디렉토리)"""
+    shm = "/dev/shm"
+    return shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else None
+
+
+@pytest.fixture(scope="session")
+def fast_tmpdir():
+    """tmpfs 위 TemporaryDirectory 생성기 - 디스크 쓰기 없는 임시 파일용
+
+    세션 스코프 callable이라 Hypothesis 속성 테스트에서도 예제마다 새 디렉토리를 만들 수 있다.
+    """
+    return functools.partial(tempfile.TemporaryDirectory, dir=_shm_dir())
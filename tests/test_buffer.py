@@ -4,21 +4,30 @@ Property 6: 버퍼 데이터 격리
 Property 7: 플러시 후 버퍼 비움
 """
 
-import asyncio
+from dataclasses import asdict
+
 import pytest
 from hypothesis import given, strategies as st, settings
 
-from src.buffer import DataBuffer
+from src.buffer import ColumnBatch, DataBuffer, row_getter
+from src.models import AggTradeEvent, OrderBookSnapshot
 
 
 # ── 전략 ──
 
 symbol_st = st.sampled_from(["BTCUSDT", "ETHUSDT", "XRPUSDT"])
-record_st = st.fixed_dictionaries({"ts": st.floats(min_value=1.0, max_value=2e9), "val": st.integers()})
-
+int_st = st.integers(min_value=0, max_value=2 ** 62)
+time_st = st.floats(min_value=1.0, max_value=2e9)
+level_st = st.lists(st.lists(st.from_regex(r"\d{1,5}\.\d{1,4}", fullmatch=True), min_size=2, max_size=2), max_size=5)
+record_st = st.builds(OrderBookSnapshot, symbol=symbol_st, event_time=int_st,
+                      recv_time=time_st, last_update_id=int_st, bids=level_st, asks=level_st)
+trade_st = st.builds(AggTradeEvent, symbol=symbol_st, trade_id=int_st,
+                     price=st.just(100.0), quantity=st.just(0.5),
+                     first_trade_id=int_st, last_trade_id=int_st, trade_time=int_st,
+                     recv_time=time_st, is_buyer_maker=st.booleans())
 
-def run_async(coro):
-    return asyncio.run(coro)
+OB_ROW = row_getter(OrderBookSnapshot)
+TRADE_ROW = row_getter(AggTradeEvent)
 
 
 # ── Property 6: 버퍼 데이터 격리 ──
@@ -29,31 +38,32 @@ class TestBufferIsolation:
     @given(
         symbol=symbol_st,
         ob_record=record_st,
-        trade_record=record_st,
+        trade_record=trade_st,
     )
     @settings(max_examples=100)
     def test_data_isolation(self, symbol, ob_record, trade_record):
         """심볼 S, 데이터타입 T의 레코드는 해당 버퍼에만 존재"""
         buf = DataBuffer()
-        run_async(buf.add_orderbook(symbol, ob_record))
-        run_async(buf.add_trade(symbol, trade_record))
+        buf.add_orderbook(symbol, OB_ROW(ob_record))
+        buf.add_trade(symbol, TRADE_ROW(trade_record))
 
         other_symbols = [s for s in ["BTCUSDT", "ETHUSDT", "XRPUSDT"] if s != symbol]
 
         # 오더북: 해당 심볼에만 존재
         assert len(buf._orderbook_data[symbol]) == 1
-        assert buf._orderbook_data[symbol][0] == ob_record
+        assert buf._orderbook_data[symbol][0] == asdict(ob_record)
         for other in other_symbols:
             assert len(buf._orderbook_data[other]) == 0
 
         # 체결: 해당 심볼에만 존재
         assert len(buf._trade_data[symbol]) == 1
-        assert buf._trade_data[symbol][0] == trade_record
+        assert buf._trade_data[symbol][0] == asdict(trade_record)
         for other in other_symbols:
             assert len(buf._trade_data[other]) == 0
 
-        # 크로스 타입: 오더북 레코드가 체결에 없고 그 반대도 마찬가지
-        assert ob_record not in buf._trade_data[symbol] or ob_record == trade_record
+        # 크로스 타입: 체결 컬럼과 오더북 컬럼은 서로 다른 스키마
+        assert "bids" not in buf._trade_data[symbol].names
+        assert "trade_id" not in buf._orderbook_data[symbol].names
 
 
 # ── Property 7: 플러시 후 버퍼 비움 ──
@@ -65,7 +75,6 @@ class TestBufferFlush:
         symbols=st.lists(symbol_st, min_size=1, max_size=3),
         records=st.lists(record_st, min_size=1, max_size=20),
     )
-    @settings(max_examples=100)
     def test_flush_returns_all_and_clears(self, symbols, records):
         """flush 후 반환 데이터는 모든 레코드 포함, 버퍼는 비어있어야 함"""
         buf = DataBuffer()
@@ -73,10 +82,10 @@ class TestBufferFlush:
 
         for i, rec in enumerate(records):
             sym = symbols[i % len(symbols)]
-            run_async(buf.add_orderbook(sym, rec))
+            buf.add_orderbook(sym, OB_ROW(rec))
             expected_counts[sym] = expected_counts.get(sym, 0) + 1
 
-        result = run_async(buf.flush())
+        result = buf.flush()
 
         # 반환된 데이터에 모든 레코드 포함
         total_returned = sum(len(v) for v in result["orderbook"].values())
@@ -99,12 +108,46 @@ class TestBufferUnit:
 
     def test_force_flush_threshold(self):
         buf = DataBuffer(max_memory_mb=0)  # 0MB = 항상 초과
-        run_async(buf.add_orderbook("BTCUSDT", {"ts": 1.0}))
+        buf.add_orderbook("BTCUSDT", ("BTCUSDT", 1, 1.0, 1, [], []))
         assert buf.needs_force_flush()
 
     def test_empty_flush(self):
         buf = DataBuffer()
-        result = run_async(buf.flush())
+        result = buf.flush()
         assert result["orderbook"] == {}
         assert result["trade"] == {}
-        assert result["funding"] == []
+        assert len(result["funding"]) == 0
+
+    def test_memory_estimate_scales_with_record_count(self):
+        buf = DataBuffer()
+        empty = buf.estimate_memory_usage()
+        row = ("BTCUSDT", 1, 1.0, 1.0, 1, 1, 1, 1.0, False)
+        buf.add_trade("BTCUSDT", row)
+        one = buf.estimate_memory_usage()
+        for _ in range(9):
+            buf.add_trade("BTCUSDT", row)
+        ten = buf.estimate_memory_usage()
+        assert empty < one < ten
+
+    def test_column_batch_typed_columns(self):
+        """정수/실수 필드는 타입 배열, 그 외는 list 컬럼"""
+        batch = ColumnBatch(AggTradeEvent)
+        batch.append(("BTCUSDT", 7, 1.5, 2.0, 5, 9, 1700000000000, 1.25, True))
+        cols = batch.to_pydict()
+        assert str(cols["trade_id"].dtype) == "int64"
+        assert str(cols["recv_time"].dtype) == "float64"
+        assert str(cols["price"].dtype) == "float64"
+        assert cols["symbol"] == ["BTCUSDT"]
+        assert cols["is_buyer_maker"].dtype == bool
+        assert cols["is_buyer_maker"].tolist() == [True]
+        assert len(batch) == 1
+        assert batch[0]["trade_time"] == 1700000000000
+
+    def test_preserve_decimal_strings(self):
+        """preserve_decimal_strings=True면 가격/수량 컬럼은 문자열 list"""
+        buf = DataBuffer(preserve_decimal_strings=True)
+        buf.add_trade("BTCUSDT", ("BTCUSDT", 7, "1.50", "2.0", 5, 9, 1700000000000, 1.25, True))
+        cols = buf.flush()["trade"]["BTCUSDT"].to_pydict()
+        assert cols["price"] == ["1.50"]
+        assert cols["quantity"] == ["2.0"]
+        assert str(cols["trade_id"].dtype) == "int64"
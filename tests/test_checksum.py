@@ -1,7 +1,7 @@
 """파일 체크섬 테스트 - Task 13
 Feature: binance-data-collector
 Property 14: 체크섬 일관성
-SHA-256 계산, checksums.json 누적 저장 검증
+SHA-256 계산, checksums.ndjson 누적 저장 검증
 """
 
 import json
@@ -20,7 +20,7 @@ from src.flusher import Flusher
 
 class TestProperty14ChecksumConsistency:
     """Property 14: 체크섬 일관성
-    *For any* 저장된 Parquet 파일에 대해, checksums.json에 기록된 SHA-256 해시를
+    *For any* 저장된 Parquet 파일에 대해, checksums.ndjson에 기록된 SHA-256 해시를
     파일에서 다시 계산한 해시와 비교하면 동일해야 한다.
     Validates: Requirements 12.1, 12.2
     """
@@ -48,16 +48,17 @@ class TestProperty14ChecksumConsistency:
 
             sha = Flusher.compute_checksum(fpath)
             flusher.record_checksum(fpath, sha, len(data), fpath.stat().st_size)
+            flusher.close()
 
             # 재계산
             sha_recomputed = Flusher.compute_checksum(fpath)
             assert sha == sha_recomputed
 
-            # checksums.json 확인
-            checksum_file = Path(tmpdir) / "checksums.json"
+            # checksums.ndjson 확인
+            checksum_file = Path(tmpdir) / "checksums.ndjson"
             assert checksum_file.exists()
             with open(checksum_file) as f:
-                entries = json.load(f)
+                entries = [json.loads(line) for line in f]
             assert len(entries) == 1
             assert entries[0]["sha256"] == sha_recomputed
 
@@ -78,8 +79,8 @@ class TestChecksumUnit:
             assert h1 == h2
             assert len(h1) == 64  # SHA-256 hex
 
-    def test_checksums_json_accumulates(self):
-        """checksums.json에 여러 파일 체크섬 누적"""
+    def test_checksums_log_accumulates(self):
+        """checksums.ndjson에 여러 파일 체크섬 누적"""
         with tempfile.TemporaryDirectory() as tmpdir:
             config = Config(data_dir=tmpdir)
             buf = DataBuffer()
@@ -90,12 +91,52 @@ class TestChecksumUnit:
                 Flusher._save_parquet([{"x": i}], fpath)
                 sha = Flusher.compute_checksum(fpath)
                 flusher.record_checksum(fpath, sha, 1, fpath.stat().st_size)
+            flusher.close()
 
-            checksum_file = Path(tmpdir) / "checksums.json"
+            checksum_file = Path(tmpdir) / "checksums.ndjson"
             with open(checksum_file) as f:
-                entries = json.load(f)
+                entries = [json.loads(line) for line in f]
             assert len(entries) == 3
 
+    def test_close_waits_for_queued_checksum_writes(self):
+        """close()는 I/O 스레드에 남은 체크섬 기록이 끝난 뒤 로그를 닫음 (닫힌 파일 쓰기/재오픈 없음)"""
+        import time
+        with tempfile.TemporaryDirectory() as tmpdir:
+            flusher = Flusher(Config(data_dir=tmpdir), DataBuffer())
+            fpath = Path(tmpdir) / "late.parquet"
+            Flusher._save_parquet([{"x": 1}], fpath)
+
+            def late_record():
+                time.sleep(0.1)  # 진행 중인 주기 플러시의 _record_checksums 흉내
+                flusher.record_checksum(fpath, Flusher.compute_checksum(fpath), 1,
+                                        fpath.stat().st_size)
+
+            job = flusher._io_executor.submit(late_record)
+            flusher.close()
+
+            assert job.done() and job.exception() is None
+            assert flusher._checksum_fp is None
+            with open(Path(tmpdir) / "checksums.ndjson") as f:
+                assert [json.loads(line)["filename"] for line in f] == ["late.parquet"]
+
+    def test_compact_checksums_snapshot(self):
+        """compact_checksums는 로그 전체를 checksums.json 배열로 저장"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            flusher = Flusher(Config(data_dir=tmpdir), DataBuffer())
+            for i in range(2):
+                fpath = Path(tmpdir) / f"file_{i}.parquet"
+                Flusher._save_parquet([{"x": i}], fpath)
+                flusher.record_checksum(fpath, Flusher.compute_checksum(fpath),
+                                        1, fpath.stat().st_size)
+
+            entries = flusher.compact_checksums()
+            flusher.close()
+
+            with open(Path(tmpdir) / "checksums.json") as f:
+                snapshot = json.load(f)
+            assert snapshot == entries
+            assert [e["filename"] for e in snapshot] == ["file_0.parquet", "file_1.parquet"]
+
     def test_different_files_different_checksums(self):
         """다른 내용의 파일은 다른 해시"""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -105,3 +146,29 @@ class TestChecksumUnit:
             Flusher._save_parquet([{"x": 999}], f2)
 
             assert Flusher.compute_checksum(f1) != Flusher.compute_checksum(f2)
+
+    def test_matches_hashlib_and_handles_empty_file(self):
+        """mmap 해시 결과는 hashlib 전체 해시와 동일, 빈 파일도 처리"""
+        import hashlib
+        with tempfile.TemporaryDirectory() as tmpdir:
+            f1 = Path(tmpdir) / "big.bin"
+            payload = bytes(range(256)) * 5000
+            f1.write_bytes(payload)
+            assert Flusher.compute_checksum(f1) == hashlib.sha256(payload).hexdigest()
+
+            f2 = Path(tmpdir) / "empty.bin"
+            f2.write_bytes(b"")
+            assert Flusher.compute_checksum(f2) == hashlib.sha256(b"").hexdigest()
+
+    def test_batch_checksums_match_single(self):
+        """일괄 계산 결과는 파일별 compute_checksum과 동일"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = []
+            for i in range(4):
+                fpath = Path(tmpdir) / f"file_{i}.parquet"
+                Flusher._save_parquet([{"x": i}], fpath)
+                paths.append(fpath)
+
+            result = Flusher.compute_checksums_batch(paths)
+            assert result == {p: Flusher.compute_checksum(p) for p in paths}
+            assert Flusher.compute_checksums_batch([]) == {}
@@ -117,3 +117,162 @@ class TestCollectorUnit:
         assert collector.reconnect_delay == 4.0
         collector._reset_reconnect_delay()
         assert collector.reconnect_delay == 1.0
+
+    def test_handle_message_routes_trade_synchronously(self):
+        """aggTrade 메시지는 await 없이 바로 체결 버퍼에 적재"""
+        from src.config import Config
+        from src.orderbook_manager import OrderBookManager
+        from src.buffer import DataBuffer
+
+        config = Config(symbols=["btcusdt"])
+        mgr = OrderBookManager(symbols=config.symbols)
+        buf = DataBuffer()
+        collector = Collector(config, mgr, buf)
+
+        raw = json.dumps({
+            "stream": "btcusdt@aggTrade",
+            "data": {"s": "BTCUSDT", "a": 1, "p": "43000.1", "q": "0.5",
+                     "f": 10, "l": 12, "T": 1700000000000, "m": True},
+        }).encode()
+        collector._handle_message(raw)
+
+        assert len(buf._trade_data["BTCUSDT"]) == 1
+        assert buf._trade_data["BTCUSDT"][0]["price"] == 43000.1
+
+    def test_handle_message_skips_open_kline(self):
+        """미확정 캔들(x=false)은 버리고 확정 캔들만 적재"""
+        from src.config import Config
+        from src.orderbook_manager import OrderBookManager
+        from src.buffer import DataBuffer
+
+        config = Config(symbols=["btcusdt"])
+        collector = Collector(config, OrderBookManager(symbols=config.symbols), DataBuffer())
+
+        def kline_msg(closed):
+            return json.dumps({
+                "stream": "btcusdt@kline_1m",
+                "data": {"e": "kline", "s": "BTCUSDT", "k": {
+                    "t": 1700000000000, "T": 1700000059999, "s": "BTCUSDT",
+                    "o": "1", "h": "2", "l": "0.5", "c": "1.5", "v": "10",
+                    "q": "15", "n": 42, "x": closed}},
+            }).encode()
+
+        collector._handle_message(kline_msg(False))
+        assert len(collector.buffer._kline_data["BTCUSDT"]) == 0
+        collector._handle_message(kline_msg(True))
+        row = collector.buffer._kline_data["BTCUSDT"][0]
+        assert row["trade_count"] == 42
+        assert row["close"] == 1.5
+
+    def test_handle_message_liquidation_row_matches_model(self):
+        """forceOrder 행은 LiquidationEvent 필드 순서와 일치"""
+        from dataclasses import asdict
+        from src.config import Config
+        from src.orderbook_manager import OrderBookManager
+        from src.buffer import DataBuffer
+        from src.models import SIDE_SELL, LiquidationEvent
+
+        config = Config(symbols=["btcusdt"])
+        collector = Collector(config, OrderBookManager(symbols=config.symbols), DataBuffer())
+        raw = json.dumps({
+            "stream": "btcusdt@forceOrder",
+            "data": {"e": "forceOrder", "o": {
+                "s": "BTCUSDT", "S": "SELL", "o": "LIMIT", "q": "0.01",
+                "p": "43000", "T": 1700000000123}},
+        }).encode()
+        collector._handle_message(raw)
+
+        row = collector.buffer._liquidation_data["BTCUSDT"][0]
+        expected = asdict(LiquidationEvent("BTCUSDT", SIDE_SELL, "LIMIT", 43000.0, 0.01,
+                                           1700000000123, row["recv_time"]))
+        assert row == expected
+
+    def test_handle_message_preserves_decimal_strings(self):
+        """preserve_decimal_strings=True면 가격/수량 원문 문자열 유지"""
+        from src.config import Config
+        from src.orderbook_manager import OrderBookManager
+        from src.buffer import DataBuffer
+
+        config = Config(symbols=["btcusdt"], preserve_decimal_strings=True)
+        buf = DataBuffer(preserve_decimal_strings=True)
+        collector = Collector(config, OrderBookManager(symbols=config.symbols), buf)
+        raw = json.dumps({
+            "stream": "btcusdt@aggTrade",
+            "data": {"s": "BTCUSDT", "a": 1, "p": "43000.10", "q": "0.500",
+                     "f": 10, "l": 12, "T": 1700000000000, "m": False},
+        }).encode()
+        collector._handle_message(raw)
+
+        row = buf._trade_data["BTCUSDT"][0]
+        assert row["price"] == "43000.10"
+        assert row["quantity"] == "0.500"
+
+    def test_split_envelope_fast_path_matches_json_decode(self):
+        """compact 프레임은 바이트 분리, 그 외 형태는 JSON 디코딩 - 결과 동일"""
+        msg = {"stream": "btcusdt@aggTrade",
+               "data": {"s": "BTCUSDT", "a": 1, "p": "1.5", "q": "2", "T": 3, "m": True}}
+        compact = json.dumps(msg, separators=(",", ":")).encode()
+        spaced = json.dumps(msg).encode()
+
+        stream_a, data_a = Collector._split_envelope(compact)
+        stream_b, data_b = Collector._split_envelope(spaced)
+
+        assert isinstance(data_a, memoryview)
+        assert stream_a == stream_b == "btcusdt@aggTrade"
+        assert json.loads(bytes(data_a)) == json.loads(bytes(data_b)) == msg["data"]
+
+    def test_receive_loop_raises_when_stream_closes(self):
+        """수신 중 연결이 닫히면 재연결 루프가 처리하도록 예외 발생"""
+        import aiohttp
+        from src.config import Config
+        from src.orderbook_manager import OrderBookManager
+        from src.buffer import DataBuffer
+
+        class FakeWS:
+            close_code = 1006
+
+            def __init__(self, frames):
+                self._frames = iter(frames)
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                try:
+                    data = next(self._frames)
+                except StopIteration:
+                    raise StopAsyncIteration
+                return aiohttp.WSMessage(aiohttp.WSMsgType.TEXT, data, None)
+
+        config = Config(symbols=["btcusdt"])
+        buf = DataBuffer()
+        collector = Collector(config, OrderBookManager(symbols=config.symbols), buf)
+        frame = (b'{"stream":"btcusdt@aggTrade","data":{"a":1,"p":"1.5","q":"2",'
+                 b'"f":1,"l":1,"T":3,"m":true}}')
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(collector._receive_loop(FakeWS([frame, frame])))
+        assert len(buf._trade_data["BTCUSDT"]) == 2
+
+    def test_handle_message_counts_messages_per_symbol(self):
+        """라우팅된 메시지는 IntegrityLogger 심볼별 카운트에 반영"""
+        import tempfile
+        from src.config import Config
+        from src.orderbook_manager import OrderBookManager
+        from src.buffer import DataBuffer
+        from src.integrity_logger import IntegrityLogger
+
+        config = Config(symbols=["btcusdt", "ethusdt"])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            il = IntegrityLogger(tmpdir, config.symbols)
+            collector = Collector(config, OrderBookManager(symbols=config.symbols),
+                                  DataBuffer(), il)
+            raw = json.dumps({
+                "stream": "btcusdt@aggTrade",
+                "data": {"s": "BTCUSDT", "a": 1, "p": "1", "q": "1",
+                         "f": 1, "l": 1, "T": 1, "m": False},
+            }).encode()
+            collector._handle_message(raw)
+            collector._handle_message(raw)
+
+            assert il.get_periodic_stats()["message_counts"] == {"BTCUSDT": 2, "ETHUSDT": 0}
@@ -18,6 +18,10 @@ symbol_st = st.text(
     min_size=3, max_size=10,
 )
 
+# from_regex 대신 고정 알파벳 text - 생성/축소(shrink) 비용이 작다
+_LOWER_DIGITS = "abcdefghijklmnopqrstuvwxyz0123456789"
+_TOKEN_CHARS = _LOWER_DIGITS + "ABCDEFGHIJKLMNOPQRSTUVWXYZ:_-"
+
 config_st = st.builds(
     Config,
     symbols=st.lists(symbol_st, min_size=1, max_size=5),
@@ -26,12 +30,12 @@ config_st = st.builds(
     log_dir=st.just("./logs"),
     max_buffer_mb=st.integers(min_value=50, max_value=2000),
     cleanup_days=st.integers(min_value=1, max_value=90),
-    cloud_remote=st.from_regex(r"[a-z0-9]{0,20}", fullmatch=True),
-    cloud_path=st.from_regex(r"[a-z0-9/]{0,50}", fullmatch=True),
+    cloud_remote=st.text(alphabet=_LOWER_DIGITS, max_size=20),
+    cloud_path=st.text(alphabet=_LOWER_DIGITS + "/", max_size=50),
     orderbook_depth=st.sampled_from([100, 500, 1000, 5000]),
     orderbook_top_levels=st.integers(min_value=5, max_value=50),
-    telegram_bot_token=st.from_regex(r"[a-zA-Z0-9:_\-]{0,50}", fullmatch=True),
-    telegram_chat_id=st.from_regex(r"[0-9\-]{0,20}", fullmatch=True),
+    telegram_bot_token=st.text(alphabet=_TOKEN_CHARS, max_size=50),
+    telegram_chat_id=st.text(alphabet="0123456789-", max_size=20),
     use_futures=st.booleans(),
 )
 
@@ -45,15 +49,8 @@ class TestConfigYamlRoundtrip:
     @settings(max_examples=100)
     def test_yaml_roundtrip(self, config: Config):
         """For any valid Config, YAML serialize then deserialize produces identical Config."""
-        with tempfile.NamedTemporaryFile(suffix=".yaml", delete=False, mode="w") as f:
-            tmp_path = f.name
-
-        try:
-            config.to_yaml(tmp_path)
-            restored = Config.from_yaml(tmp_path)
-            assert config == restored, f"Roundtrip failed: {config} != {restored}"
-        finally:
-            os.unlink(tmp_path)
+        restored = Config.from_yaml_str(config.to_yaml_str())
+        assert config == restored, f"Roundtrip failed: {config} != {restored}"
 
 
 # ── 단위 테스트 ──
@@ -70,6 +67,16 @@ class TestConfigUnit:
         c = Config.from_yaml("/nonexistent/path.yaml")
         assert c == Config()
 
+    def test_file_roundtrip(self):
+        c = Config(symbols=["solusdt"], compression="snappy")
+        with tempfile.NamedTemporaryFile(suffix=".yaml", delete=False, mode="w") as f:
+            tmp_path = f.name
+        try:
+            c.to_yaml(tmp_path)
+            assert Config.from_yaml(tmp_path) == c
+        finally:
+            os.unlink(tmp_path)
+
     def test_from_yaml_ignores_unknown_keys(self):
         with tempfile.NamedTemporaryFile(suffix=".yaml", delete=False, mode="w") as f:
             f.write("symbols: [btcusdt]\nunknown_key: 42\n")
@@ -79,3 +86,15 @@ class TestConfigUnit:
             assert c.symbols == ["btcusdt"]
         finally:
             os.unlink(tmp_path)
+
+    def test_symbol_keys_uppercased_once(self):
+        """대문자 심볼 키는 로드 시 계산, 스트림 이름(symbols)과 직렬화 결과는 그대로"""
+        c = Config(symbols=["btcusdt", "ethusdt"])
+        assert c.symbol_keys == ["BTCUSDT", "ETHUSDT"]
+        assert c.symbols == ["btcusdt", "ethusdt"]
+        assert "symbol_keys" not in c.to_dict()
+
+    def test_symbols_html_precomputed(self):
+        c = Config(symbols=["btcusdt", "a<b"])
+        assert c.symbols_html == "<code>BTCUSDT</code> <code>A&lt;B</code>"
+        assert "symbols_html" not in c.to_dict()
@@ -3,9 +3,7 @@ Feature: binance-data-collector
 커버리지 계산, 누적 통계 갱신 검증
 """
 
-import asyncio
 import json
-import tempfile
 from pathlib import Path
 
 import pytest
@@ -13,47 +11,61 @@ import pytest
 from src.integrity_logger import IntegrityLogger
 
 
+@pytest.fixture(scope="module")
+def tmp_log_dir(fast_tmpdir):
+    with fast_tmpdir() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture(scope="module")
+def il(tmp_log_dir):
+    """모듈 전체에서 공유하는 IntegrityLogger (디렉토리 생성 1회)"""
+    return IntegrityLogger(tmp_log_dir)
+
+
+@pytest.fixture
+def summary_path(tmp_log_dir):
+    """테스트마다 빈 상태에서 시작하도록 coverage_summary.json 제거"""
+    path = tmp_log_dir / "coverage_summary.json"
+    path.unlink(missing_ok=True)
+    yield path
+    path.unlink(missing_ok=True)
+
+
 class TestCoverageSummary:
     """coverage_summary.json 누적 갱신 검증"""
 
-    def test_creates_coverage_summary(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            il = IntegrityLogger(tmpdir)
-            stats = {
-                "BTCUSDT": {"total_seconds": 3600, "gap_seconds": 60, "msg_count": 35000},
-                "ETHUSDT": {"total_seconds": 3600, "gap_seconds": 0, "msg_count": 30000},
-            }
-            asyncio.run(il.update_coverage_summary(stats))
-
-            filepath = Path(tmpdir) / "coverage_summary.json"
-            assert filepath.exists()
-            with open(filepath) as f:
-                data = json.load(f)
-            assert "BTCUSDT" in data
-            assert "ETHUSDT" in data
-            assert 0.0 <= data["BTCUSDT"]["coverage"] <= 1.0
-            assert data["ETHUSDT"]["coverage"] == 1.0
-
-    def test_updates_existing_summary(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            il = IntegrityLogger(tmpdir)
-
-            # 첫 번째 갱신
-            asyncio.run(il.update_coverage_summary({
-                "BTCUSDT": {"total_seconds": 3600, "gap_seconds": 100, "msg_count": 35000},
-            }))
-
-            # 두 번째 갱신 (다른 심볼 추가)
-            asyncio.run(il.update_coverage_summary({
-                "ETHUSDT": {"total_seconds": 3600, "gap_seconds": 0, "msg_count": 30000},
-            }))
-
-            filepath = Path(tmpdir) / "coverage_summary.json"
-            with open(filepath) as f:
-                data = json.load(f)
-            # 두 심볼 모두 존재
-            assert "BTCUSDT" in data
-            assert "ETHUSDT" in data
+    def test_creates_coverage_summary(self, loop, il, summary_path):
+        stats = {
+            "BTCUSDT": {"total_seconds": 3600, "gap_seconds": 60, "msg_count": 35000},
+            "ETHUSDT": {"total_seconds": 3600, "gap_seconds": 0, "msg_count": 30000},
+        }
+        loop.run_until_complete(il.update_coverage_summary(stats))
+
+        assert summary_path.exists()
+        with open(summary_path) as f:
+            data = json.load(f)
+        assert "BTCUSDT" in data
+        assert "ETHUSDT" in data
+        assert 0.0 <= data["BTCUSDT"]["coverage"] <= 1.0
+        assert data["ETHUSDT"]["coverage"] == 1.0
+
+    def test_updates_existing_summary(self, loop, il, summary_path):
+        # 첫 번째 갱신
+        loop.run_until_complete(il.update_coverage_summary({
+            "BTCUSDT": {"total_seconds": 3600, "gap_seconds": 100, "msg_count": 35000},
+        }))
+
+        # 두 번째 갱신 (다른 심볼 추가)
+        loop.run_until_complete(il.update_coverage_summary({
+            "ETHUSDT": {"total_seconds": 3600, "gap_seconds": 0, "msg_count": 30000},
+        }))
+
+        with open(summary_path) as f:
+            data = json.load(f)
+        # 두 심볼 모두 존재
+        assert "BTCUSDT" in data
+        assert "ETHUSDT" in data
 
     def test_coverage_calculation_accuracy(self):
         """커버리지 = (total - gap) / total"""
@@ -62,13 +74,10 @@ class TestCoverageSummary:
         assert IntegrityLogger.compute_coverage(3600, 3600) == 0.0
         assert IntegrityLogger.compute_coverage(0, 0) == 0.0
 
-    def test_empty_stats_creates_empty_file(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            il = IntegrityLogger(tmpdir)
-            asyncio.run(il.update_coverage_summary(None))
+    def test_empty_stats_creates_empty_file(self, loop, il, summary_path):
+        loop.run_until_complete(il.update_coverage_summary(None))
 
-            filepath = Path(tmpdir) / "coverage_summary.json"
-            assert filepath.exists()
-            with open(filepath) as f:
-                data = json.load(f)
-            assert data == {}
+        assert summary_path.exists()
+        with open(summary_path) as f:
+            data = json.load(f)
+        assert data == {}
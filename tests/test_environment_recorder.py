@@ -24,11 +24,32 @@ class TestProperty15SensitiveMasking:
     Validates: Requirements 13.3
     """
 
+    @pytest.mark.parametrize("token,chat_id", [
+        ("abc", "123"),
+        ("", ""),
+        ("123456:ABC-DEF_ghi", ""),
+        ("", "-1001234567890"),
+        ("t" * 100, "c" * 50),
+        ("日本語", "한글"),
+        (" ", "\t"),
+        ("***", "*"),
+    ])
+    def test_mask_matrix(self, token, chat_id):
+        """값이 있으면 '***'로 마스킹, 빈 값은 그대로 (동치류별 결정적 케이스)"""
+        config = Config(telegram_bot_token=token, telegram_chat_id=chat_id)
+        masked = EnvironmentRecorder._mask_sensitive_config(config)
+
+        assert masked["telegram_bot_token"] == ("***" if token else "")
+        assert masked["telegram_chat_id"] == ("***" if chat_id else "")
+
     @given(
-        token=st.text(min_size=1, max_size=100).filter(lambda x: x.strip()),
-        chat_id=st.text(min_size=1, max_size=50).filter(lambda x: x.strip()),
+        # '*'만으로 된 값은 마스크 문자열의 부분 문자열이 되므로 제외 (matrix에서 별도 검증)
+        token=st.text(alphabet=st.characters(blacklist_characters="*"),
+                      min_size=1, max_size=100).filter(lambda x: x.strip()),
+        chat_id=st.text(alphabet=st.characters(blacklist_characters="*"),
+                        min_size=1, max_size=50).filter(lambda x: x.strip()),
     )
-    @settings(max_examples=100)
+    @settings(max_examples=10)
     def test_token_never_in_output(self, token, chat_id):
         """원본 토큰이 마스킹된 config에 절대 나타나지 않아야 함"""
         config = Config(telegram_bot_token=token, telegram_chat_id=chat_id)
@@ -43,10 +64,9 @@ class TestProperty15SensitiveMasking:
     @given(
         token=st.text(min_size=10, max_size=100, alphabet=st.characters(whitelist_categories=("L", "N"))),
     )
-    @settings(max_examples=100)
-    def test_token_not_in_saved_json(self, token):
+    def test_token_not_in_saved_json(self, fast_tmpdir, token):
         """저장된 JSON 파일의 config.telegram_bot_token 필드가 마스킹되어야 함"""
-        with tempfile.TemporaryDirectory() as tmpdir:
+        with fast_tmpdir() as tmpdir:
             config = Config(telegram_bot_token=token, telegram_chat_id="test_chat_99999")
             recorder = EnvironmentRecorder(config, tmpdir)
             filepath = recorder.record()
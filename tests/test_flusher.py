@@ -4,17 +4,20 @@ Property 8: 파일명 형식 준수
 Property 14: 체크섬 일관성
 """
 
+import asyncio
 import re
-import tempfile
 import os
 from datetime import datetime
 from pathlib import Path
 
 import pytest
 import pyarrow.parquet as pq
-from hypothesis import given, strategies as st, settings
+from hypothesis import given, strategies as st
 
+from src.buffer import DataBuffer, row_getter
+from src.config import Config
 from src.flusher import Flusher
+from src.models import AggTradeEvent
 
 
 # ── 전략 ──
@@ -23,6 +26,8 @@ symbol_st = st.from_regex(r"[A-Z]{3,10}", fullmatch=True)
 datatype_st = st.sampled_from(["orderbook", "trade", "liquidation", "kline"])
 dt_st = st.datetimes(min_value=datetime(2020, 1, 1), max_value=datetime(2030, 12, 31))
 
+_FNAME_RE = re.compile(r"^[A-Z]+_[a-z]+_\d{8}_\d{4}\.parquet$")
+
 
 # ── Property 8: 파일명 형식 준수 ──
 
@@ -30,12 +35,10 @@ class TestFilenameFormat:
     """Validates: Requirements 4.2"""
 
     @given(symbol=symbol_st, datatype=datatype_st, timestamp=dt_st)
-    @settings(max_examples=200)
     def test_filename_pattern(self, symbol, datatype, timestamp):
         """파일명은 {SYMBOL}_{datatype}_{YYYYMMDD}_{HHMM}.parquet 형식"""
         fname = Flusher._generate_filename(symbol, datatype, timestamp)
-        pattern = r"^[A-Z]+_[a-z]+_\d{8}_\d{4}\.parquet$"
-        assert re.match(pattern, fname), f"Bad filename: {fname}"
+        assert _FNAME_RE.match(fname), f"Bad filename: {fname}"
 
         # 날짜/시간 부분 검증
         parts = fname.replace(".parquet", "").split("_")
@@ -49,21 +52,32 @@ class TestFilenameFormat:
 
 class TestFlusherUnit:
 
-    def test_snappy_compression(self):
-        """Parquet 파일이 snappy 압축으로 저장되는지 확인"""
-        with tempfile.TemporaryDirectory() as tmpdir:
+    def test_zstd_compression(self, fast_tmpdir):
+        """Parquet 파일이 기본 zstd 압축으로 저장되는지 확인"""
+        with fast_tmpdir() as tmpdir:
             fpath = Path(tmpdir) / "test.parquet"
             data = [{"price": "100.0", "qty": "1.0"} for _ in range(10)]
             Flusher._save_parquet(data, fpath)
 
             meta = pq.read_metadata(fpath)
-            # snappy 압축 확인
+            # zstd 압축 확인
             col_meta = meta.row_group(0).column(0)
+            assert col_meta.compression == "ZSTD"
+
+    def test_snappy_fallback(self, fast_tmpdir):
+        """compression=snappy 설정 시 레벨 인자 없이 snappy로 저장"""
+        with fast_tmpdir() as tmpdir:
+            buf = DataBuffer()
+            buf.add_trade("BTCUSDT", ("BTCUSDT", 1, 1.0, 1.0, 1, 1, 1, 1.0, False))
+            config = Config(data_dir=tmpdir, compression="snappy")
+            files = asyncio.run(Flusher(config, buf).flush_now())
+
+            col_meta = pq.read_metadata(files[0]).row_group(0).column(0)
             assert col_meta.compression == "SNAPPY"
 
-    def test_checksum_consistency(self):
+    def test_checksum_consistency(self, fast_tmpdir):
         """저장된 파일의 SHA-256이 재계산과 일치"""
-        with tempfile.TemporaryDirectory() as tmpdir:
+        with fast_tmpdir() as tmpdir:
             fpath = Path(tmpdir) / "test.parquet"
             data = [{"val": i} for i in range(100)]
             Flusher._save_parquet(data, fpath)
@@ -73,12 +87,121 @@ class TestFlusherUnit:
             assert hash1 == hash2
             assert len(hash1) == 64  # SHA-256 hex length
 
-    def test_atomic_save_on_error(self):
+    def test_atomic_save_on_error(self, fast_tmpdir):
         """저장 실패 시 임시 파일이 남지 않아야 함"""
-        with tempfile.TemporaryDirectory() as tmpdir:
+        with fast_tmpdir() as tmpdir:
             fpath = Path(tmpdir) / "test.parquet"
             # 빈 리스트는 빈 DataFrame을 만들어 정상 저장됨
             # 대신 잘못된 경로로 테스트
             bad_path = Path("/nonexistent/dir/test.parquet")
             with pytest.raises(Exception):
                 Flusher._save_parquet([{"a": 1}], bad_path)
+
+    def test_flush_now_writes_column_batches(self, fast_tmpdir):
+        """버퍼의 컬럼 배열이 타입을 유지한 채 Parquet으로 저장"""
+        with fast_tmpdir() as tmpdir:
+            buf = DataBuffer()
+            trade = AggTradeEvent("BTCUSDT", 1, 43000.1, 0.5, 10, 12,
+                                  1700000000000, 1700000000.5, True)
+            buf.add_trade("BTCUSDT", row_getter(AggTradeEvent)(trade))
+            flusher = Flusher(Config(data_dir=tmpdir), buf)
+
+            files = asyncio.run(flusher.flush_now())
+
+            assert len(files) == 1
+            table = pq.read_table(files[0])
+            assert table.num_rows == 1
+            assert str(table.schema.field("trade_time").type) == "int64"
+            assert str(table.schema.field("is_buyer_maker").type) == "bool"
+            assert table.column("is_buyer_maker").to_pylist() == [True]
+            assert table.column("price").to_pylist() == [43000.1]
+
+    def test_flush_uses_model_schema(self, fast_tmpdir):
+        """저장 스키마는 모델에서 만든 스키마와 동일, 문자열 보존 모드는 가격이 문자열"""
+        from src.flusher import _SCHEMAS
+        row = ("BTCUSDT", 1, "43000.10", "0.5", 10, 12, 1700000000000, 1700000000.5, False)
+        for preserve, price_type in [(False, "double"), (True, "string")]:
+            with fast_tmpdir() as tmpdir:
+                buf = DataBuffer(preserve_decimal_strings=preserve)
+                buf.add_trade("BTCUSDT", row if preserve else
+                              row[:2] + (43000.1, 0.5) + row[4:])
+                config = Config(data_dir=tmpdir, preserve_decimal_strings=preserve)
+                files = asyncio.run(Flusher(config, buf).flush_now())
+
+                schema = pq.read_schema(files[0])
+                assert str(schema.field("price").type) == price_type
+                if not preserve:
+                    assert schema.remove_metadata().equals(_SCHEMAS["trade"])
+
+    def test_flush_fsyncs_data_dir_once(self, fast_tmpdir):
+        """여러 파일을 저장해도 디렉토리 fsync는 플러시당 한 번"""
+        from unittest.mock import patch
+        with fast_tmpdir() as tmpdir:
+            buf = DataBuffer()
+            row = ("BTCUSDT", 1, 1.0, 1.0, 1, 1, 1, 1.0, False)
+            buf.add_trade("BTCUSDT", row)
+            buf.add_trade("ETHUSDT", ("ETHUSDT",) + row[1:])
+            flusher = Flusher(Config(data_dir=tmpdir), buf)
+
+            with patch.object(Flusher, "_fsync_dir") as fsync_dir:
+                files = asyncio.run(flusher.flush_now())
+
+            assert len(files) == 2
+            fsync_dir.assert_called_once_with(Path(tmpdir))
+
+    def test_flush_streams_large_batch_in_chunks(self, fast_tmpdir):
+        """STREAM_CHUNK_ROWS보다 큰 배치도 순서/개수 그대로 한 파일에 저장"""
+        from unittest.mock import patch
+        with fast_tmpdir() as tmpdir:
+            buf = DataBuffer()
+            for i in range(10):
+                buf.add_trade("BTCUSDT", ("BTCUSDT", i, 1.0, 1.0, i, i, i, 1.0 + i, i % 2 == 0))
+            flusher = Flusher(Config(data_dir=tmpdir), buf)
+
+            with patch("src.flusher.STREAM_CHUNK_ROWS", 3):
+                files = asyncio.run(flusher.flush_now())
+
+            meta = pq.read_metadata(files[0])
+            assert meta.num_rows == 10
+            assert meta.num_row_groups == 4
+            table = pq.read_table(files[0])
+            assert table.column("trade_id").to_pylist() == list(range(10))
+            assert table.column("is_buyer_maker").to_pylist() == [i % 2 == 0 for i in range(10)]
+
+    def test_time_range_ignores_unset_times(self):
+        """time_range는 0을 제외한 최소/최대, 값이 없으면 (0.0, 0.0)"""
+        from array import array
+        from src.flusher import _time_range
+        assert _time_range(array("d", [5.0, 0.0, 2.5, 9.0])) == (2.5, 9.0)
+        assert _time_range(array("d", [0.0])) == (0.0, 0.0)
+        assert _time_range(array("d")) == (0.0, 0.0)
+
+    def test_record_list_uses_model_schema(self):
+        """레코드 키가 모델 필드와 같으면 모델 스키마 사용, 타입이 다르면 추론으로 저장"""
+        from dataclasses import asdict
+        from src.models import FundingRateRecord
+        rec = asdict(FundingRateRecord("BTCUSDT", "0.0001", 1, 2, 1.5))
+        table = Flusher._table_from_records([rec], None)
+        assert str(table.schema.field("funding_time").type) == "int64"
+
+        rec["recv_time"] = "not-a-float"
+        table = Flusher._table_from_records([rec], None)
+        assert str(table.schema.field("recv_time").type) == "string"
+
+    def test_time_and_id_columns_use_delta_encoding(self, fast_tmpdir):
+        """int64 시각/ID 컬럼은 DELTA_BINARY_PACKED, recv_time은 BYTE_STREAM_SPLIT, 나머지는 사전 인코딩"""
+        from dataclasses import asdict
+        records = [asdict(AggTradeEvent("BTCUSDT", i, 100.0 + i, 1.0, i, i, 1700000000000 + i,
+                                        1700000000.0 + i, False)) for i in range(100)]
+        with fast_tmpdir() as tmpdir:
+            fpath = Path(tmpdir) / "BTCUSDT_trade.parquet"
+            assert Flusher._save_parquet(records, fpath) == 100
+
+            rg = pq.read_metadata(fpath).row_group(0)
+            cols = {rg.column(i).path_in_schema: rg.column(i) for i in range(rg.num_columns)}
+            assert cols["trade_time"].compression == "ZSTD"
+            assert "DELTA_BINARY_PACKED" in cols["trade_time"].encodings
+            assert "DELTA_BINARY_PACKED" in cols["trade_id"].encodings
+            assert "BYTE_STREAM_SPLIT" in cols["recv_time"].encodings
+            assert "RLE_DICTIONARY" in cols["symbol"].encodings
+            assert pq.read_table(fpath).column("trade_time").to_pylist()[-1] == 1700000000099
@@ -3,17 +3,16 @@ Feature: binance-data-collector
 FundingRateCollector 조회, 재시도, Parquet 저장 검증
 """
 
-import asyncio
 import tempfile
 from pathlib import Path
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock
 from dataclasses import asdict
 
+import aiohttp
 import pytest
-import pandas as pd
 
 from src.config import Config
-from src.buffer import DataBuffer
+from src.buffer import DataBuffer, row_getter
 from src.integrity_logger import IntegrityLogger
 from src.flusher import Flusher
 from src.funding_rate_collector import FundingRateCollector
@@ -35,82 +34,106 @@ def collector(config, buffer):
     return FundingRateCollector(config, buffer)
 
 
+def _mock_session(status: int = 200, json_payload=None, get_side_effect=None) -> MagicMock:
+    """get()이 (status, json_payload) 응답 하나를 async with로 돌려주는 세션 mock
+
+    get_side_effect를 주면 get() 호출 자체가 그 예외를 낸다.
+    """
+    mock_resp = MagicMock(spec=aiohttp.ClientResponse)
+    mock_resp.status = status
+    mock_resp.json = AsyncMock(return_value=json_payload)
+    mock_resp.__aenter__.return_value = mock_resp
+    mock_resp.__aexit__.return_value = False  # 기본 MagicMock 반환값은 참 → 예외를 삼킴
+
+    mock_session = MagicMock(spec=aiohttp.ClientSession)
+    mock_session.get = MagicMock(return_value=mock_resp, side_effect=get_side_effect)
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.__aexit__.return_value = False
+    return mock_session
+
+
+@pytest.fixture
+def patch_client_session(monkeypatch):
+    """patch(session) → aiohttp.ClientSession()이 session을 돌려주도록 패치, 클래스 mock 반환
+
+    세션을 직접 주입하는 테스트는 _mock_session만 쓰고 이 픽스처는 필요 없다.
+    """
+    def patch_(session: MagicMock) -> MagicMock:
+        session_cls = MagicMock(return_value=session)
+        monkeypatch.setattr("aiohttp.ClientSession", session_cls)
+        return session_cls
+    return patch_
+
+
 class TestFetchFundingRate:
     """펀딩비 REST 조회 검증"""
 
-    def test_successful_fetch(self, collector):
+    def test_successful_fetch(self, collector, loop, patch_client_session):
         """정상 응답 시 FundingRateRecord 반환"""
-        mock_data = {
+        patch_client_session(_mock_session(200, {
             "symbol": "BTCUSDT",
             "lastFundingRate": "0.00010000",
             "time": 1700000000000,
             "nextFundingTime": 1700028800000,
-        }
-
-        mock_resp = MagicMock()
-        mock_resp.status = 200
-        mock_resp.json = AsyncMock(return_value=mock_data)
-        mock_resp.__aenter__ = AsyncMock(return_value=mock_resp)
-        mock_resp.__aexit__ = AsyncMock(return_value=False)
-
-        mock_session = MagicMock()
-        mock_session.get = MagicMock(return_value=mock_resp)
-        mock_session.__aenter__ = AsyncMock(return_value=mock_session)
-        mock_session.__aexit__ = AsyncMock(return_value=False)
+        }))
 
-        async def run():
-            with patch("aiohttp.ClientSession", return_value=mock_session):
-                return await collector.fetch_funding_rate("btcusdt")
-
-        result = asyncio.run(run())
+        result = loop.run_until_complete(collector.fetch_funding_rate("btcusdt"))
         assert result is not None
         assert result.symbol == "BTCUSDT"
         assert result.funding_rate == "0.00010000"
 
-    def test_retry_on_failure(self, collector):
-        """실패 시 최대 3회 재시도"""
-        call_count = 0
+    def test_retry_on_failure(self, collector, loop, monkeypatch, patch_client_session):
+        """실패 시 최대 3회 재시도 - 세션은 한 번만 생성, 시도 사이 백오프 대기는 2회"""
+        mock_sleep = AsyncMock(return_value=None)
+        monkeypatch.setattr("src.funding_rate_collector.asyncio.sleep", mock_sleep)
+        mock_session = _mock_session(get_side_effect=ConnectionError("timeout"))
+        session_cls = patch_client_session(mock_session)
 
-        mock_session_ctx = MagicMock()
+        result = loop.run_until_complete(collector.fetch_funding_rate("btcusdt"))
+        assert result is None
+        assert session_cls.call_count == 1
+        assert mock_session.get.call_count == 3
+        assert mock_sleep.await_count == mock_session.get.call_count - 1
 
-        def make_session(*args, **kwargs):
-            nonlocal call_count
-            call_count += 1
-            raise ConnectionError("timeout")
+    def test_uses_run_session(self, collector, loop, patch_client_session):
+        """run() 중에는 공유 세션으로 조회 (새 세션 생성 없음)"""
+        collector._session = _mock_session(200, {"lastFundingRate": "0.0001"})
+        session_cls = patch_client_session(_mock_session())
 
-        # ClientSession() 자체가 예외를 던지도록
-        async def run():
-            with patch("aiohttp.ClientSession", side_effect=make_session):
-                return await collector.fetch_funding_rate("btcusdt")
+        assert loop.run_until_complete(collector.fetch_funding_rate("ethusdt")).symbol == "ETHUSDT"
+        session_cls.assert_not_called()
 
-        result = asyncio.run(run())
+    def test_returns_none_on_http_error(self, collector, loop, patch_client_session):
+        """HTTP 에러 시 None 반환"""
+        patch_client_session(_mock_session(429))
+
+        result = loop.run_until_complete(collector.fetch_funding_rate("btcusdt"))
         assert result is None
-        assert call_count == 3
 
-    def test_returns_none_on_http_error(self, collector):
-        """HTTP 에러 시 None 반환"""
-        mock_resp = MagicMock()
-        mock_resp.status = 429
-        mock_resp.__aenter__ = AsyncMock(return_value=mock_resp)
-        mock_resp.__aexit__ = AsyncMock(return_value=False)
 
-        mock_session = MagicMock()
-        mock_session.get = MagicMock(return_value=mock_resp)
-        mock_session.__aenter__ = AsyncMock(return_value=mock_session)
-        mock_session.__aexit__ = AsyncMock(return_value=False)
+class TestFetchAllFundingRates:
+    """전 종목 일괄 조회 검증"""
 
-        async def run():
-            with patch("aiohttp.ClientSession", return_value=mock_session):
-                return await collector.fetch_funding_rate("btcusdt")
+    def test_filters_configured_symbols(self, collector, loop):
+        """응답 중 설정된 심볼만 레코드로 변환, symbol 파라미터 없이 1회 요청"""
+        mock_data = [
+            {"symbol": "BTCUSDT", "lastFundingRate": "0.0001", "time": 1, "nextFundingTime": 2},
+            {"symbol": "DOGEUSDT", "lastFundingRate": "0.0003", "time": 1, "nextFundingTime": 2},
+            {"symbol": "ETHUSDT", "lastFundingRate": "-0.0002", "time": 1, "nextFundingTime": 2},
+        ]
+        mock_session = _mock_session(200, mock_data)
 
-        result = asyncio.run(run())
-        assert result is None
+        records = loop.run_until_complete(collector.fetch_all_funding_rates(mock_session))
+
+        assert [r.symbol for r in records] == ["BTCUSDT", "ETHUSDT"]
+        assert records[1].funding_rate == "-0.0002"
+        mock_session.get.assert_called_once_with(FundingRateCollector.FUTURES_URL)
 
 
 class TestFundingRateParquet:
     """펀딩비 Parquet 저장 검증"""
 
-    def test_save_funding_rate_parquet(self):
+    def test_save_funding_rate_parquet(self, pd_mod):
         with tempfile.TemporaryDirectory() as tmpdir:
             records = [
                 asdict(FundingRateRecord("BTCUSDT", "0.0001", 1700000000000, 1700028800000, 1.0)),
@@ -120,19 +143,15 @@ class TestFundingRateParquet:
             count = Flusher._save_parquet(records, fpath)
 
             assert count == 2
-            df = pd.read_parquet(fpath)
+            df = pd_mod.read_parquet(fpath)
             assert "funding_rate" in df.columns
             assert len(df) == 2
 
     def test_funding_data_in_flush(self):
         """Buffer flush에 펀딩비 데이터 포함"""
         buf = DataBuffer()
-        record = asdict(FundingRateRecord("BTCUSDT", "0.0001", 1700000000000, 1700028800000, 1.0))
-
-        async def run():
-            await buf.add_funding_rate(record)
-            return await buf.flush()
-
-        data = asyncio.run(run())
+        record = FundingRateRecord("BTCUSDT", "0.0001", 1700000000000, 1700028800000, 1.0)
+        buf.add_funding_rate(row_getter(FundingRateRecord)(record))
+        data = buf.flush()
         assert len(data["funding"]) == 1
         assert data["funding"][0]["symbol"] == "BTCUSDT"
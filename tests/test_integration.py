@@ -3,8 +3,8 @@ Feature: binance-data-collector
 모듈 간 연결 및 초기화 흐름 검증
 """
 
-import tempfile
 from pathlib import Path
+from typing import NamedTuple
 
 import pytest
 
@@ -21,34 +21,68 @@ from src.time_sync_monitor import TimeSyncMonitor
 from src.environment_recorder import EnvironmentRecorder
 
 
+class Modules(NamedTuple):
+    """main.py와 같은 순서로 연결한 모듈 그래프"""
+    il: IntegrityLogger
+    telegram: TelegramReporter
+    buffer: DataBuffer
+    ob: OrderBookManager
+    syncer: Syncer
+    flusher: Flusher
+    collector: Collector
+    funding: FundingRateCollector
+    time_sync: TimeSyncMonitor
+    env_recorder: EnvironmentRecorder
+
+
+@pytest.fixture(scope="class")
+def config(tmp_path_factory):
+    """클래스 전체에서 공유 (테스트마다 디렉토리를 새로 만들지 않음)"""
+    tmp_path = tmp_path_factory.mktemp("init")
+    return Config(
+        data_dir=str(tmp_path / "data"),
+        log_dir=str(tmp_path / "logs"),
+        symbols=["btcusdt", "ethusdt"],
+    )
+
+
+@pytest.fixture(scope="class")
+def modules(config):
+    """main.py와 같은 순서/인자로 연결한 모듈 그래프를 클래스당 한 번만 생성
+
+    테스트는 생성 직후 상태만 읽는다.
+    """
+    il = IntegrityLogger(config.log_dir, config.symbol_keys)
+    telegram = TelegramReporter(config)
+    buffer = DataBuffer(config.max_buffer_mb, config.preserve_decimal_strings)
+    ob = OrderBookManager(config.symbol_keys, il)
+    syncer = Syncer(config, il)
+    flusher = Flusher(config, buffer, il, on_file_created=syncer.enqueue_file)
+    modules = Modules(
+        il=il,
+        telegram=telegram,
+        buffer=buffer,
+        ob=ob,
+        syncer=syncer,
+        flusher=flusher,
+        collector=Collector(config, ob, buffer, il, telegram),
+        funding=FundingRateCollector(config, buffer, il),
+        time_sync=TimeSyncMonitor(config, il, telegram),
+        env_recorder=EnvironmentRecorder(config, config.log_dir),
+    )
+    yield modules
+    flusher.close()
+
+
 class TestModuleInitialization:
     """모든 모듈이 올바르게 초기화되는지 검증"""
 
-    @pytest.fixture
-    def config(self, tmp_path):
-        return Config(
-            data_dir=str(tmp_path / "data"),
-            log_dir=str(tmp_path / "logs"),
-            symbols=["btcusdt", "ethusdt"],
-        )
-
-    def test_all_modules_initialize(self, config):
+    def test_all_modules_initialize(self, modules):
         """모든 모듈이 예외 없이 초기화"""
-        il = IntegrityLogger(config.log_dir)
-        telegram = TelegramReporter(config)
-        buffer = DataBuffer(config.max_buffer_mb)
-        ob_manager = OrderBookManager(config.symbols, il)
-        flusher = Flusher(config, buffer, il)
-        collector = Collector(config, ob_manager, buffer, il, telegram)
-        syncer = Syncer(config, il)
-        funding = FundingRateCollector(config, buffer, il)
-        time_sync = TimeSyncMonitor(config, il, telegram)
-        env_recorder = EnvironmentRecorder(config, config.log_dir)
-
-        assert collector is not None
-        assert flusher is not None
-        assert syncer is not None
-        assert telegram.enabled is False  # 토큰 미설정
+        assert modules.collector is not None
+        assert modules.flusher is not None
+        assert modules.syncer is not None
+        assert modules.telegram.enabled is False  # 토큰 미설정
 
     def test_config_from_yaml(self, tmp_path):
         """config.yaml 로드 검증"""
@@ -60,20 +94,15 @@ class TestModuleInitialization:
         assert loaded.symbols == ["btcusdt"]
         assert loaded.flush_interval == 1800
 
-    def test_environment_recorder_saves_metadata(self, config):
+    def test_environment_recorder_saves_metadata(self, modules):
         """환경 메타데이터 저장 검증"""
-        recorder = EnvironmentRecorder(config, config.log_dir)
-        filepath = recorder.record()
+        filepath = modules.env_recorder.record()
         assert filepath.exists()
         assert filepath.suffix == ".json"
 
-    def test_collector_builds_urls(self, config):
+    def test_collector_builds_urls(self, modules):
         """Collector가 WebSocket URL을 올바르게 생성"""
-        il = IntegrityLogger(config.log_dir)
-        buffer = DataBuffer()
-        ob = OrderBookManager(config.symbols, il)
-        collector = Collector(config, ob, buffer, il)
-
+        collector = modules.collector
         url = collector.build_ws_url()
         assert "btcusdt@depth@100ms" in url
         assert "ethusdt@aggTrade" in url
@@ -82,20 +111,15 @@ class TestModuleInitialization:
         futures_url = collector.build_futures_ws_url()
         assert "forceOrder" in futures_url
 
-    def test_flusher_creates_data_dir(self, config):
+    def test_flusher_creates_data_dir(self, config, modules):
         """Flusher가 data_dir을 자동 생성"""
-        buffer = DataBuffer()
-        flusher = Flusher(config, buffer)
         assert Path(config.data_dir).exists()
 
-    def test_integrity_logger_creates_log_dir(self, config):
+    def test_integrity_logger_creates_log_dir(self, config, modules):
         """IntegrityLogger가 log_dir을 자동 생성"""
-        il = IntegrityLogger(config.log_dir)
         assert Path(config.log_dir).exists()
 
-    def test_orderbook_manager_has_all_symbols(self, config):
+    def test_orderbook_manager_has_all_symbols(self, modules):
         """OrderBookManager가 모든 심볼을 관리"""
-        il = IntegrityLogger(config.log_dir)
-        ob = OrderBookManager(config.symbols, il)
-        assert "BTCUSDT" in ob.books
-        assert "ETHUSDT" in ob.books
+        assert "BTCUSDT" in modules.ob.books
+        assert "ETHUSDT" in modules.ob.books
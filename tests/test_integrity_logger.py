@@ -8,6 +8,7 @@ Property 16: 커버리지 비율 범위
 import json
 import tempfile
 
+import numpy as np
 import pytest
 from hypothesis import given, strategies as st, settings
 
@@ -48,7 +49,6 @@ class TestGapCompleteness:
         actual_id=st.integers(min_value=1, max_value=10**12),
         timestamp=st.floats(min_value=1.0, max_value=2e10),
     )
-    @settings(max_examples=100)
     def test_gap_has_all_fields(self, symbol, expected_id, actual_id, timestamp):
         """갭 레코드는 timestamp, symbol, expected_id, actual_id 모두 포함"""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -75,12 +75,24 @@ class TestCoverageRange:
         total_seconds=st.floats(min_value=0.0, max_value=86400 * 365),
         gap_seconds=st.floats(min_value=-100.0, max_value=86400 * 365 + 100),
     )
-    @settings(max_examples=200)
+    @settings(max_examples=25)
     def test_coverage_in_range(self, total_seconds, gap_seconds):
-        """커버리지 비율은 0.0 이상 1.0 이하"""
+        """커버리지 비율은 0.0 이상 1.0 이하 (경계값 위주, 대량 검증은 batch 테스트)"""
         coverage = IntegrityLogger.compute_coverage(total_seconds, gap_seconds)
         assert 0.0 <= coverage <= 1.0
 
+    def test_coverage_in_range_batch(self):
+        """무작위 10,000쌍을 한 번에 검증 - 범위 및 NumPy 기준식과 일치"""
+        total = np.random.default_rng(0).uniform(0, 86400 * 365, 10_000)
+        gap = np.random.default_rng(1).uniform(-100, 86400 * 365 + 100, 10_000)
+        cov = np.fromiter(map(IntegrityLogger.compute_coverage, total.tolist(), gap.tolist()),
+                          dtype=np.float64, count=total.size)
+
+        assert ((cov >= 0.0) & (cov <= 1.0)).all()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            expected = np.where(total > 0, (total - np.clip(gap, 0, total)) / total, 0.0)
+        np.testing.assert_allclose(cov, expected)
+
 
 # ── 단위 테스트 ──
 
@@ -100,3 +112,30 @@ class TestIntegrityLoggerUnit:
             stats = il.get_periodic_stats()
             assert stats["gap_count"] == 1
             assert len(stats["gaps"]) == 1
+
+    def test_write_periodic_log_writes_snapshot_and_resets(self):
+        """주기 로그는 리셋 전 통계를 파일로 남기고 메모리 통계는 비움"""
+        import asyncio
+        from pathlib import Path
+        with tempfile.TemporaryDirectory() as tmpdir:
+            il = IntegrityLogger(tmpdir)
+            il.record_gap("BTCUSDT", 100, 200, 1000.0)
+            il.increment_message_count("BTCUSDT")
+            asyncio.run(il.write_periodic_log())
+
+            [log_file] = Path(tmpdir).glob("stats_*.json")
+            with open(log_file) as f:
+                stats = json.load(f)
+            assert stats["gap_count"] == 1
+            assert stats["message_counts"] == {"BTCUSDT": 1}
+            assert il.get_periodic_stats()["gap_count"] == 0
+
+    def test_gap_buffer_evicts_oldest(self):
+        """최대 보관 수를 넘으면 가장 오래된 갭부터 제거"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            il = IntegrityLogger(tmpdir)
+            for i in range(IntegrityLogger.MAX_GAP_BUFFER + 5):
+                il.record_gap("BTCUSDT", i, i + 1, float(i))
+            assert len(il._gaps) == IntegrityLogger.MAX_GAP_BUFFER
+            assert il._gaps[0]["expected_id"] == 5
+            assert il.get_periodic_stats()["gaps"][-1]["expected_id"] == IntegrityLogger.MAX_GAP_BUFFER + 4
@@ -3,17 +3,16 @@ Feature: binance-data-collector
 kline 메시지 파싱, 미확정 캔들 필터링, Parquet 저장 검증
 """
 
-import asyncio
 import json
 import tempfile
 from pathlib import Path
 from dataclasses import asdict
 
 import pytest
-import pandas as pd
+import pyarrow.parquet as pq
 
 from src.models import KlineEvent
-from src.buffer import DataBuffer
+from src.buffer import DataBuffer, row_getter
 from src.flusher import Flusher
 
 
@@ -49,27 +48,23 @@ class TestKlineBuffer:
 
     def test_add_kline_to_buffer(self):
         buf = DataBuffer()
-        record = asdict(KlineEvent(
+        record = row_getter(KlineEvent)(KlineEvent(
             "BTCUSDT", 1700000000000, 1700000059999,
-            "43000", "43100", "42900", "43050",
-            "100.5", "4320000", 5000, 1700000060.0,
+            43000.0, 43100.0, 42900.0, 43050.0,
+            100.5, 4320000.0, 5000, 1700000060.0,
         ))
-        asyncio.run(buf.add_kline("BTCUSDT", record))
+        buf.add_kline("BTCUSDT", record)
         assert len(buf._kline_data["BTCUSDT"]) == 1
 
     def test_kline_included_in_flush(self):
         buf = DataBuffer()
-        record = asdict(KlineEvent(
+        record = row_getter(KlineEvent)(KlineEvent(
             "ETHUSDT", 1700000000000, 1700000059999,
-            "2500", "2510", "2490", "2505",
-            "500", "1250000", 3000, 1700000060.0,
+            2500.0, 2510.0, 2490.0, 2505.0,
+            500.0, 1250000.0, 3000, 1700000060.0,
         ))
-
-        async def run():
-            await buf.add_kline("ETHUSDT", record)
-            return await buf.flush()
-
-        data = asyncio.run(run())
+        buf.add_kline("ETHUSDT", record)
+        data = buf.flush()
         assert "ETHUSDT" in data["kline"]
         assert len(data["kline"]["ETHUSDT"]) == 1
 
@@ -90,10 +85,10 @@ class TestKlineParquet:
             count = Flusher._save_parquet(records, fpath)
             assert count == 1
 
-            df = pd.read_parquet(fpath)
-            assert "open" in df.columns
-            assert "close" in df.columns
-            assert df["volume"].iloc[0] == "100.5"
+            tbl = pq.read_table(fpath)
+            assert "open" in tbl.column_names
+            assert "close" in tbl.column_names
+            assert tbl.column("volume")[0].as_py() == "100.5"
 
     def test_kline_filename_format(self):
         from datetime import datetime
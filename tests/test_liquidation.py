@@ -3,19 +3,18 @@ Feature: binance-data-collector
 forceOrder 메시지 파싱, Buffer 적재, Parquet 저장 검증
 """
 
-import asyncio
 import json
 import tempfile
 from pathlib import Path
 from dataclasses import asdict
 
 import pytest
-import pandas as pd
+import pyarrow.parquet as pq
 
-from src.models import LiquidationEvent
-from src.buffer import DataBuffer
+from src.models import SIDE_BUY, SIDE_CODES, SIDE_SELL, AggTradeEvent, LiquidationEvent
+from src.buffer import DataBuffer, row_getter
 from src.config import Config
-from src.flusher import Flusher
+from src.flusher import _SCHEMAS, Flusher
 
 
 class TestForceOrderParsing:
@@ -47,7 +46,7 @@ class TestForceOrderParsing:
         o = payload["o"]
         event = LiquidationEvent(
             symbol=o["s"],
-            side=o["S"],
+            side=SIDE_CODES[o["S"]],
             order_type=o["o"],
             price=o["p"],
             quantity=o["q"],
@@ -55,7 +54,7 @@ class TestForceOrderParsing:
             recv_time=1700000000.5,
         )
         assert event.symbol == "BTCUSDT"
-        assert event.side == "SELL"
+        assert event.side == SIDE_SELL
         assert event.price == "43000.00"
         assert event.quantity == "0.014"
         assert event.trade_time == 1700000000123
@@ -63,7 +62,7 @@ class TestForceOrderParsing:
     def test_liquidation_event_to_dict(self):
         """LiquidationEvent가 dict로 변환 가능"""
         event = LiquidationEvent(
-            symbol="ETHUSDT", side="BUY", order_type="LIMIT",
+            symbol="ETHUSDT", side=SIDE_BUY, order_type="LIMIT",
             price="2500.00", quantity="1.5",
             trade_time=1700000000000, recv_time=1700000000.1,
         )
@@ -77,40 +76,29 @@ class TestLiquidationBuffer:
 
     def test_add_liquidation_to_buffer(self):
         buf = DataBuffer()
-        record = {"symbol": "BTCUSDT", "side": "SELL", "price": "43000",
-                  "quantity": "0.01", "trade_time": 1700000000000, "recv_time": 1.0}
+        record = LiquidationEvent("BTCUSDT", SIDE_SELL, "LIMIT", 43000.0, 0.01,
+                                  1700000000000, 1.0)
 
-        asyncio.run(buf.add_liquidation("BTCUSDT", record))
+        buf.add_liquidation("BTCUSDT", row_getter(LiquidationEvent)(record))
 
         assert len(buf._liquidation_data["BTCUSDT"]) == 1
-        assert buf._liquidation_data["BTCUSDT"][0]["price"] == "43000"
+        assert buf._liquidation_data["BTCUSDT"][0]["price"] == 43000.0
 
     def test_liquidation_isolated_from_other_data(self):
         buf = DataBuffer()
-        liq = {"symbol": "BTCUSDT", "side": "SELL", "price": "43000",
-               "quantity": "0.01", "trade_time": 1, "recv_time": 1.0}
-        trade = {"symbol": "BTCUSDT", "trade_id": 1, "price": "43000",
-                 "quantity": "0.01", "trade_time": 1, "recv_time": 1.0}
-
-        async def run():
-            await buf.add_liquidation("BTCUSDT", liq)
-            await buf.add_trade("BTCUSDT", trade)
-
-        asyncio.run(run())
+        liq = LiquidationEvent("BTCUSDT", SIDE_SELL, "LIMIT", 43000.0, 0.01, 1, 1.0)
+        trade = AggTradeEvent("BTCUSDT", 1, 43000.0, 0.01, 1, 1, 1, 1.0, False)
+        buf.add_liquidation("BTCUSDT", row_getter(LiquidationEvent)(liq))
+        buf.add_trade("BTCUSDT", row_getter(AggTradeEvent)(trade))
 
         assert len(buf._liquidation_data["BTCUSDT"]) == 1
         assert len(buf._trade_data["BTCUSDT"]) == 1
 
     def test_liquidation_included_in_flush(self):
         buf = DataBuffer()
-        record = {"symbol": "BTCUSDT", "side": "SELL", "price": "43000",
-                  "quantity": "0.01", "trade_time": 1, "recv_time": 1.0}
-
-        async def run():
-            await buf.add_liquidation("BTCUSDT", record)
-            return await buf.flush()
-
-        data = asyncio.run(run())
+        record = LiquidationEvent("BTCUSDT", SIDE_SELL, "LIMIT", 43000.0, 0.01, 1, 1.0)
+        buf.add_liquidation("BTCUSDT", row_getter(LiquidationEvent)(record))
+        data = buf.flush()
         assert "BTCUSDT" in data["liquidation"]
         assert len(data["liquidation"]["BTCUSDT"]) == 1
 
@@ -139,13 +127,26 @@ class TestLiquidationParquet:
             assert count == 2
             assert fpath.exists()
 
-            df = pd.read_parquet(fpath)
-            assert len(df) == 2
-            assert "side" in df.columns
-            assert df["side"].iloc[0] == "SELL"
+            cols = pq.read_table(fpath).to_pydict()
+            assert len(cols["side"]) == 2
+            assert cols["side"][0] == "SELL"
 
     def test_liquidation_filename_format(self):
         from datetime import datetime
         fname = Flusher._generate_filename("BTCUSDT", "liquidation",
                                            datetime(2024, 1, 15, 10, 30))
         assert fname == "BTCUSDT_liquidation_20240115_1030.parquet"
+
+    def test_flushed_side_is_int8(self, loop):
+        """청산 side는 1바이트 코드 컬럼으로 저장"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            buf = DataBuffer()
+            record = LiquidationEvent("BTCUSDT", SIDE_BUY, "LIMIT", 43000.0, 0.01, 1, 1.0)
+            buf.add_liquidation("BTCUSDT", row_getter(LiquidationEvent)(record))
+            files = loop.run_until_complete(Flusher(Config(data_dir=tmpdir), buf).flush_now())
+
+            table = pq.read_table(files[0])
+            # 임포트 시 만든 모델 스키마 그대로 기록 (추론/드리프트 없음)
+            assert pq.read_schema(files[0]).equals(_SCHEMAS["liquidation"])
+            assert str(table.schema.field("side").type) == "int8"
+            assert table.column("side").to_pylist() == [SIDE_BUY]
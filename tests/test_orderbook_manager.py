@@ -5,11 +5,12 @@ Property 4: diff 적용 정확성
 Property 5: 상위 N호가 정렬
 """
 
+import numpy as np
 import pytest
 from hypothesis import given, strategies as st, settings, assume
 
-from src.orderbook_manager import OrderBookManager
-from src.models import DepthDiffEvent, OrderBookState
+from src.orderbook_manager import ASK_SIGN, BID_SIGN, OrderBookManager, make_book_side
+from src.models import DepthDiffEvent, OrderBookSnapshot, OrderBookState
 
 
 # ── 공통 전략 ──
@@ -19,6 +20,26 @@ qty_st = st.decimals(min_value=0.001, max_value=1000, places=3).map(str)
 price_qty_st = st.tuples(price_st, qty_st).map(list)
 update_id_st = st.integers(min_value=1, max_value=10**12)
 
+# 결정적 배치 퍼즈 - 시드별 numpy 난수로 케이스 생성 (Hypothesis 생성/축소 비용 없음)
+FUZZ_SEEDS = range(50)
+
+
+PRICE_TICK = 0.25
+
+
+def tick_price(ticks: np.ndarray | list[int]) -> list[str]:
+    """정수 틱 → 가격 문자열 (0.25 격자라 %.2f 표현이 정확)"""
+    return np.char.mod("%.2f", np.asarray(ticks) * PRICE_TICK).tolist()
+
+
+def random_levels(rng: np.random.Generator, n: int, zero_ratio: float = 0.0,
+                  ticks: np.ndarray | None = None) -> list[list[str]]:
+    """[[price, qty], ...] n개 - 가격은 0.25 격자(겹치는 가격이 자주 나오도록), 일부 수량은 "0" """
+    prices = tick_price(rng.integers(1, 400, n) if ticks is None else ticks)
+    qtys = np.char.mod("%.3f", rng.uniform(0.001, 1000, n))
+    qtys[rng.random(n) < zero_ratio] = "0"
+    return [[p, q] for p, q in zip(prices, qtys.tolist())]
+
 
 def make_manager_with_state(symbol: str, bids: dict, asks: dict,
                             last_update_id: int) -> OrderBookManager:
@@ -26,7 +47,8 @@ def make_manager_with_state(symbol: str, bids: dict, asks: dict,
     mgr = OrderBookManager(symbols=[symbol])
     sym = symbol.upper()
     mgr.books[sym] = OrderBookState(
-        bids=dict(bids), asks=dict(asks),
+        bids=make_book_side([[p, q] for p, q in bids.items()], BID_SIGN),
+        asks=make_book_side([[p, q] for p, q in asks.items()], ASK_SIGN),
         last_update_id=last_update_id, initialized=True,
     )
     return mgr
@@ -37,23 +59,21 @@ def make_manager_with_state(symbol: str, bids: dict, asks: dict,
 class TestSequenceValidation:
     """Validates: Requirements 2.2"""
 
-    @given(
-        last_id=st.integers(min_value=1, max_value=10**9),
-        first_id=st.integers(min_value=1, max_value=10**9),
-        span=st.integers(min_value=0, max_value=100),
-    )
-    @settings(max_examples=200)
-    def test_sequence_continuity(self, last_id: int, first_id: int, span: int):
-        """F <= last_update_id+1 <= L 일 때만 유효"""
-        final_id = first_id + span
-        mgr = make_manager_with_state("BTCUSDT", {}, {}, last_id)
+    @pytest.mark.parametrize("seed", FUZZ_SEEDS)
+    def test_sequence_continuity(self, seed: int):
+        """F <= last_update_id+1 <= L 일 때만 유효 (경계 부근 F/L을 집중 생성)"""
+        rng = np.random.default_rng(seed)
+        last_id = int(rng.integers(1, 10**9))
         expected = last_id + 1
-        is_valid = mgr.validate_sequence("BTCUSDT", first_id, final_id)
+        mgr = make_manager_with_state("BTCUSDT", {}, {}, last_id)
+        first_ids = expected + rng.integers(-60, 60, 200)
+        final_ids = first_ids + rng.integers(0, 100, 200)
+        should_be_valid = (first_ids <= expected) & (expected <= final_ids)
 
-        if first_id <= expected <= final_id:
-            assert is_valid, f"Should be valid: F={first_id} <= {expected} <= L={final_id}"
-        else:
-            assert not is_valid, f"Should be invalid: F={first_id}, expected={expected}, L={final_id}"
+        for first_id, final_id, valid in zip(first_ids.tolist(), final_ids.tolist(),
+                                             should_be_valid.tolist()):
+            assert mgr.validate_sequence("BTCUSDT", first_id, final_id) is valid, \
+                f"F={first_id}, expected={expected}, L={final_id}"
 
 
 # ── Property 4: diff 적용 정확성 ──
@@ -66,17 +86,24 @@ class TestDiffApplication:
         update_prices=st.lists(price_qty_st, min_size=1, max_size=10),
         zero_removals=st.lists(price_st, min_size=0, max_size=5),
     )
-    @settings(max_examples=200)
+    @settings(max_examples=10)
     def test_diff_correctness(self, existing_prices, update_prices, zero_removals):
-        """diff 적용 후: 0 qty는 제거, 비-0 qty는 갱신, 미포함 가격은 불변"""
+        """diff 적용 후: 0 qty는 제거, 비-0 qty는 갱신, 미포함 가격은 불변 (생성형 스모크)"""
+        bid_updates = list(update_prices) + [[p, "0"] for p in zero_removals]
+        self._check_diff(dict(existing_prices), bid_updates)
+
+    @pytest.mark.parametrize("seed", FUZZ_SEEDS)
+    def test_diff_correctness_fuzz(self, seed: int):
+        """시드별 결정적 케이스 - 기존 호가와 겹치는 갱신/삭제 포함"""
+        rng = np.random.default_rng(seed)
+        existing = dict(random_levels(rng, int(rng.integers(1, 21))))
+        bid_updates = random_levels(rng, int(rng.integers(1, 16)), zero_ratio=0.3)
+        self._check_diff(existing, bid_updates)
+
+    @staticmethod
+    def _check_diff(original_bids: dict[str, str], bid_updates: list[list[str]]) -> None:
         last_id = 100
-        mgr = make_manager_with_state("BTCUSDT", dict(existing_prices), {}, last_id)
-        original_bids = dict(existing_prices)
-
-        # diff 구성: 업데이트 + 제거
-        bid_updates = list(update_prices)
-        for p in zero_removals:
-            bid_updates.append([p, "0"])
+        mgr = make_manager_with_state("BTCUSDT", original_bids, {}, last_id)
 
         event = DepthDiffEvent(
             symbol="BTCUSDT", event_time=1000, recv_time=1.0,
@@ -95,13 +122,14 @@ class TestDiffApplication:
                 expected_bids[p] = q
 
         # 검증: 실제 상태가 기대 상태와 일치
-        assert state.bids == expected_bids
+        actual_bids = {p: q for p, q in state.bids.values()}
+        assert actual_bids == expected_bids
 
         # 미포함 가격은 불변
         updated_prices = {p for p, _ in bid_updates}
         for p, q in original_bids.items():
             if p not in updated_prices:
-                assert state.bids.get(p) == q, f"Untouched price {p} changed"
+                assert actual_bids.get(p) == q, f"Untouched price {p} changed"
 
 
 # ── Property 5: 상위 N호가 정렬 ──
@@ -109,30 +137,27 @@ class TestDiffApplication:
 class TestTopLevelsSorting:
     """Validates: Requirements 2.5"""
 
-    @given(
-        bids=st.dictionaries(price_st, qty_st, min_size=1, max_size=50),
-        asks=st.dictionaries(price_st, qty_st, min_size=1, max_size=50),
-        levels=st.integers(min_value=1, max_value=30),
-    )
-    @settings(max_examples=200)
-    def test_top_levels_sorted(self, bids, asks, levels):
+    @pytest.mark.parametrize("seed", FUZZ_SEEDS)
+    def test_top_levels_sorted(self, seed: int):
         """bids는 내림차순, asks는 오름차순, 각각 최대 N개"""
+        rng = np.random.default_rng(seed)
+        bid_ticks = rng.integers(1, 400, int(rng.integers(1, 51)))
+        ask_ticks = rng.integers(1, 400, int(rng.integers(1, 51)))
+        bids = dict(random_levels(rng, bid_ticks.size, ticks=bid_ticks))
+        asks = dict(random_levels(rng, ask_ticks.size, ticks=ask_ticks))
+        levels = int(rng.integers(1, 31))
         mgr = make_manager_with_state("BTCUSDT", bids, asks, 100)
         snap = mgr.get_top_levels("BTCUSDT", levels=levels)
 
-        # 개수 제한
-        assert len(snap.bids) <= levels
-        assert len(snap.asks) <= levels
-
-        # bids 내림차순
-        if len(snap.bids) > 1:
-            bid_prices = [float(p) for p, _ in snap.bids]
-            assert bid_prices == sorted(bid_prices, reverse=True)
+        # 정수 틱으로 기대값 계산 - 가격 문자열 재파싱/부동소수 비교 없이 선택과 순서를 모두 검증
+        best_bids = sorted(set(bid_ticks.tolist()), reverse=True)[:levels]
+        best_asks = sorted(set(ask_ticks.tolist()))[:levels]
+        assert [p for p, _ in snap.bids] == tick_price(best_bids)
+        assert [p for p, _ in snap.asks] == tick_price(best_asks)
 
-        # asks 오름차순
-        if len(snap.asks) > 1:
-            ask_prices = [float(p) for p, _ in snap.asks]
-            assert ask_prices == sorted(ask_prices)
+        # 공개 API 관점: 가격 문자열 기준 정렬 방향
+        assert [p for p, _ in snap.bids] == sorted((p for p, _ in snap.bids), key=float, reverse=True)
+        assert [p for p, _ in snap.asks] == sorted((p for p, _ in snap.asks), key=float)
 
 
 # ── 단위 테스트 ──
@@ -158,3 +183,20 @@ class TestOrderBookManagerUnit:
         result = mgr.apply_diff("BTCUSDT", event)
         assert result is not None
         assert mgr.books["BTCUSDT"].last_update_id == 105
+
+    def test_top_levels_keep_price_strings(self):
+        """정렬은 float 기준이지만 저장 값은 원문 가격 문자열"""
+        mgr = make_manager_with_state("BTCUSDT", {"99.50": "1", "100.00": "2", "9.75": "3"},
+                                      {"101.10": "1", "100.90": "2"}, 100)
+        event = DepthDiffEvent("BTCUSDT", 1000, 1.0, 101, 101,
+                               [["100.00", "0"], ["99.90", "5"]], [["100.95", "4"]])
+        snap = OrderBookSnapshot(*mgr.apply_diff("BTCUSDT", event))
+        assert snap.bids == [["99.90", "5"], ["99.50", "1"], ["9.75", "3"]]
+        assert snap.asks == [["100.90", "2"], ["100.95", "4"], ["101.10", "1"]]
+
+    def test_best_bid_ask_from_sorted_keys(self):
+        mgr = make_manager_with_state("btcusdt", {"99.5": "1", "100.0": "2"},
+                                      {"101.0": "1", "100.5": "3"}, 10)
+        state = mgr.books["BTCUSDT"]
+        assert state.best_bid == 100.0
+        assert state.best_ask == 100.5
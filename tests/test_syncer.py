@@ -41,6 +41,13 @@ def syncer(config, integrity_logger):
     return Syncer(config, integrity_logger)
 
 
+@pytest.fixture(scope="class")
+def cleanup_syncer(tmp_path_factory):
+    """클래스 전체에서 공유 - get_files_to_delete는 상태를 바꾸지 않는 순수 함수"""
+    logger = IntegrityLogger(log_dir=tmp_path_factory.mktemp("logs"))
+    return Syncer(Config(cleanup_days=7), logger)
+
+
 # ---------------------------------------------------------------------------
 # Hypothesis strategies
 # ---------------------------------------------------------------------------
@@ -75,16 +82,12 @@ class TestProperty9FileDeletionCondition:
 
     @given(files=unique_file_list_strategy())
     @settings(max_examples=200)
-    def test_only_old_and_synced_files_are_deleted(self, files):
+    def test_only_old_and_synced_files_are_deleted(self, cleanup_syncer, files):
         """**Validates: Requirements 5.3**
 
         삭제 대상은 age_days >= cleanup_days AND synced == True인 파일만이어야 한다.
         """
-        config = Config(cleanup_days=7)
-        logger = IntegrityLogger(log_dir="/tmp/test_logs")
-        syncer = Syncer(config, logger)
-
-        to_delete = syncer.get_files_to_delete(files)
+        to_delete = cleanup_syncer.get_files_to_delete(files)
         to_delete_set = set(to_delete)
 
         for f in files:
@@ -100,16 +103,12 @@ class TestProperty9FileDeletionCondition:
 
     @given(files=unique_file_list_strategy())
     @settings(max_examples=200)
-    def test_not_old_enough_files_never_deleted(self, files):
+    def test_not_old_enough_files_never_deleted(self, cleanup_syncer, files):
         """**Validates: Requirements 5.3**
 
         cleanup_days 미만 파일은 동기화 여부와 관계없이 삭제되지 않아야 한다.
         """
-        config = Config(cleanup_days=7)
-        logger = IntegrityLogger(log_dir="/tmp/test_logs")
-        syncer = Syncer(config, logger)
-
-        to_delete = set(syncer.get_files_to_delete(files))
+        to_delete = set(cleanup_syncer.get_files_to_delete(files))
 
         for f in files:
             if f["age_days"] < 7:
@@ -117,16 +116,12 @@ class TestProperty9FileDeletionCondition:
 
     @given(files=unique_file_list_strategy())
     @settings(max_examples=200)
-    def test_unsynced_files_never_deleted(self, files):
+    def test_unsynced_files_never_deleted(self, cleanup_syncer, files):
         """**Validates: Requirements 5.3**
 
         동기화되지 않은 파일은 경과일과 관계없이 삭제되지 않아야 한다.
         """
-        config = Config(cleanup_days=7)
-        logger = IntegrityLogger(log_dir="/tmp/test_logs")
-        syncer = Syncer(config, logger)
-
-        to_delete = set(syncer.get_files_to_delete(files))
+        to_delete = set(cleanup_syncer.get_files_to_delete(files))
 
         for f in files:
             if not f["synced"]:
@@ -300,3 +295,188 @@ class TestCleanupOldFiles:
     def test_no_deletion_when_data_dir_missing(self, syncer):
         """data_dir이 존재하지 않으면 에러 없이 종료되어야 한다."""
         asyncio.run(syncer.cleanup_old_files())  # 예외 없이 완료
+
+
+# ---------------------------------------------------------------------------
+# 단위 테스트: 일괄 업로드
+# ---------------------------------------------------------------------------
+
+class TestBatchSync:
+    """같은 디렉토리 파일은 rclone 한 번으로 묶어 업로드"""
+
+    def test_sync_files_batches_same_directory(self, syncer, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir(parents=True, exist_ok=True)
+        files = []
+        for i in range(3):
+            f = data_dir / f"file_{i}.parquet"
+            f.write_bytes(b"data")
+            files.append(f)
+
+        calls = []
+
+        async def mock_subprocess(*cmd, **kwargs):
+            proc = MagicMock()
+            proc.returncode = 0
+
+            async def communicate(stdin_data=None):
+                calls.append((cmd, stdin_data))
+                return b"", b""
+            proc.communicate = communicate
+            return proc
+
+        async def run_test():
+            with patch("asyncio.create_subprocess_exec", side_effect=mock_subprocess):
+                await syncer.sync_files(files)
+
+        asyncio.run(run_test())
+
+        assert len(calls) == 1
+        cmd, stdin_data = calls[0]
+        assert cmd[:4] == ("rclone", "copy", str(data_dir), "myremote:backup/data")
+        assert "--files-from-raw" in cmd
+        assert stdin_data.decode().split("\n") == [f.name for f in files]
+        assert syncer._synced_files == {str(f) for f in files}
+
+    def test_sync_files_runs_in_parallel(self, syncer, tmp_path):
+        """디렉토리가 다른 파일은 rclone 프로세스를 동시에 실행 (첫 프로세스 종료 전 둘 다 시작)"""
+        files = []
+        for d in ("spot", "futures"):
+            (tmp_path / d).mkdir()
+            f = tmp_path / d / "file.parquet"
+            f.write_bytes(b"data")
+            files.append(f)
+
+        started = 0
+        all_started = asyncio.Event()
+
+        async def mock_subprocess(*cmd, **kwargs):
+            proc = MagicMock()
+            proc.returncode = 0
+
+            async def communicate(stdin_data=None):
+                nonlocal started
+                started += 1
+                if started == len(files):
+                    all_started.set()
+                # 순차 실행이면 두 번째 프로세스가 시작되지 않아 타임아웃 → 업로드 실패
+                await asyncio.wait_for(all_started.wait(), timeout=1.0)
+                return b"", b""
+            proc.communicate = communicate
+            return proc
+
+        async def run_test():
+            with patch("asyncio.create_subprocess_exec", side_effect=mock_subprocess):
+                await syncer.sync_files(files)
+
+        asyncio.run(run_test())
+
+        assert started == 2
+        assert syncer._synced_files == {str(f) for f in files}
+        assert syncer._pending_queue == []
+
+    def test_failed_batch_requeues_every_file(self, syncer, tmp_path):
+        files = [tmp_path / "a.parquet", tmp_path / "b.parquet"]
+        for f in files:
+            f.write_bytes(b"data")
+
+        async def mock_subprocess(*cmd, **kwargs):
+            proc = MagicMock()
+            proc.returncode = 1
+            proc.communicate = AsyncMock(return_value=(b"", b"error"))
+            return proc
+
+        async def run_test():
+            with patch("asyncio.create_subprocess_exec", side_effect=mock_subprocess):
+                return await syncer.sync_batch(tmp_path, files)
+
+        assert asyncio.run(run_test()) is False
+        assert syncer._pending_queue == files
+
+
+# ---------------------------------------------------------------------------
+# 단위 테스트: S3 백엔드
+# ---------------------------------------------------------------------------
+
+class TestS3Backend:
+    """S3 클라이언트가 열려 있으면 rclone 대신 upload_file 사용"""
+
+    def test_sync_files_uploads_each_file_to_bucket(self, syncer, tmp_path):
+        files = [tmp_path / "a.parquet", tmp_path / "b.parquet"]
+        for f in files:
+            f.write_bytes(b"data")
+        syncer._s3 = MagicMock()
+        syncer._s3.upload_file = AsyncMock()
+
+        async def run_test():
+            with patch("asyncio.create_subprocess_exec") as mock_exec:
+                await syncer.sync_files(files)
+                mock_exec.assert_not_called()
+
+        asyncio.run(run_test())
+
+        keys = sorted(c.args[1:3] for c in syncer._s3.upload_file.call_args_list)
+        assert keys == [("myremote", "backup/data/a.parquet"),
+                        ("myremote", "backup/data/b.parquet")]
+        assert syncer._synced_files == {str(f) for f in files}
+
+    def test_s3_failure_requeues_file(self, syncer, tmp_path):
+        f = tmp_path / "a.parquet"
+        f.write_bytes(b"data")
+        syncer._s3 = MagicMock()
+        syncer._s3.upload_file = AsyncMock(side_effect=OSError("denied"))
+
+        assert asyncio.run(syncer.sync_file(f)) is False
+        assert syncer._pending_queue == [f]
+        assert str(f) not in syncer._synced_files
+
+    def test_s3_prefixed_remote_selects_s3_bucket(self, tmp_path, integrity_logger):
+        """cloud_remote="s3:버킷"이면 backend 설정 없이도 S3, 버킷 이름은 접두사 제거"""
+        syncer = Syncer(Config(cloud_remote="s3:ticks", cloud_path="raw"), integrity_logger)
+        assert syncer.use_s3 is True
+        f = tmp_path / "a.parquet"
+        f.write_bytes(b"data")
+        syncer._s3 = MagicMock()
+        syncer._s3.upload_file = AsyncMock()
+
+        assert asyncio.run(syncer.sync_file(f)) is True
+        assert syncer._s3.upload_file.call_args.args[1:3] == ("ticks", "raw/a.parquet")
+
+    def test_rclone_remote_does_not_select_s3(self, syncer):
+        assert syncer.use_s3 is False
+
+    def test_s3_without_aioboto3_fails_at_start(self, integrity_logger):
+        """S3 설정인데 aioboto3가 없으면 rclone("s3:버킷:경로")으로 넘기지 않고 run() 시작 시 에러"""
+        import sys
+        syncer = Syncer(Config(cloud_remote="s3:ticks", cloud_path="raw"), integrity_logger)
+        with patch.dict(sys.modules, {"aioboto3": None}), \
+                patch.object(syncer, "_run_rclone", new=AsyncMock()) as run_rclone:
+            with pytest.raises(RuntimeError, match="aioboto3"):
+                asyncio.run(syncer.run())
+        run_rclone.assert_not_called()
+
+    def test_s3_client_pool_sized_for_concurrency(self, tmp_path, integrity_logger):
+        """S3 클라이언트 연결 풀 = 동시 업로드 수 × 멀티파트 동시성"""
+        import sys
+        from contextlib import AsyncExitStack
+        session = MagicMock()
+        client_cm = MagicMock()
+        client_cm.__aenter__ = AsyncMock(return_value="client")
+        client_cm.__aexit__ = AsyncMock(return_value=False)
+        session.client = MagicMock(return_value=client_cm)
+        fake_modules = {
+            "aioboto3": MagicMock(Session=MagicMock(return_value=session)),
+            "aiobotocore.config": MagicMock(AioConfig=lambda **kw: kw),
+            "boto3.s3.transfer": MagicMock(TransferConfig=lambda **kw: kw),
+        }
+        syncer = Syncer(Config(cloud_backend="s3", cloud_remote="b", sync_concurrency=8),
+                        integrity_logger)
+
+        async def run_test():
+            async with AsyncExitStack() as stack:
+                return await syncer._open_s3_client(stack)
+
+        with patch.dict(sys.modules, fake_modules):
+            assert asyncio.run(run_test()) == "client"
+        session.client.assert_called_once_with("s3", config={"max_pool_connections": 64})
+        assert syncer._s3_transfer_config["max_concurrency"] == 8
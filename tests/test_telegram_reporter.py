@@ -1,13 +1,15 @@
 """TelegramReporter 테스트 - Property 13 (전송 실패 격리) + 단위 테스트"""
 
 import asyncio
+import json
 from unittest.mock import AsyncMock, patch, MagicMock
 
+import aiohttp
 import pytest
-from hypothesis import given, strategies as st, settings
+from hypothesis import given, strategies as st
 
 from src.config import Config
-from src.telegram_reporter import TelegramReporter
+from src.telegram_reporter import CircuitBreaker, TelegramReporter
 
 
 # --- Fixtures ---
@@ -34,16 +36,57 @@ def disabled_reporter(config_without_token):
     return TelegramReporter(config_without_token)
 
 
+def _mock_session(status: int = 200) -> MagicMock:
+    """post()가 status 응답(async with)을 돌려주는 세션 mock (에러 본문 text()는 "err")"""
+    mock_resp = MagicMock()
+    mock_resp.status = status
+    mock_resp.text = AsyncMock(return_value="err")
+    mock_resp.__aenter__ = AsyncMock(return_value=mock_resp)
+    mock_resp.__aexit__ = AsyncMock(return_value=False)
+    mock_session = MagicMock()
+    mock_session.closed = False
+    mock_session.post = MagicMock(return_value=mock_resp)
+    mock_session.close = AsyncMock()
+    return mock_session
+
+
 # --- Property 13: 텔레그램 전송 실패 격리 ---
 # **Validates: Requirements 7.8**
 
+# 예외 계층별 대표 6종 (aiohttp 전송 오류, 타임아웃, OS/연결 오류, 일반 런타임 오류)
 exception_types = st.sampled_from([
-    ConnectionError, TimeoutError, ValueError, RuntimeError,
-    OSError, IOError, Exception, TypeError, AttributeError,
-    KeyError, IndexError, PermissionError, BrokenPipeError,
+    aiohttp.ClientConnectionError, TimeoutError, ConnectionError,
+    OSError, ValueError, RuntimeError,
 ])
 
 
+class _FailingPost:
+    """post() 컨텍스트 - 진입 시 설정된 예외 발생"""
+
+    def __init__(self, exc: BaseException):
+        self._exc = exc
+
+    async def __aenter__(self):
+        raise self._exc
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class _FailingSession:
+    """MagicMock 대신 쓰는 가짜 세션 - 속성 조회 프록시 없이 POST마다 예외"""
+
+    closed = False
+
+    def __init__(self, exc: BaseException):
+        self._exc = exc
+        self.post_count = 0
+
+    def post(self, *args, **kwargs):
+        self.post_count += 1
+        return _FailingPost(self._exc)
+
+
 class TestProperty13TelegramFailureIsolation:
     """Property 13: 텔레그램 전송 실패 격리
     *For any* 텔레그램 메시지 전송 시도에서 예외가 발생하더라도,
@@ -55,45 +98,39 @@ class TestProperty13TelegramFailureIsolation:
         message=st.text(min_size=0, max_size=200),
         exc_msg=st.text(min_size=0, max_size=100),
     )
-    @settings(max_examples=100)
-    def test_send_message_never_raises_on_http_exception(self, exc_type, message, exc_msg):
+    def test_send_message_never_raises_on_http_exception(self, loop, exc_type, message, exc_msg):
         """**Validates: Requirements 7.8**
-        send_message는 aiohttp 세션에서 어떤 예외가 발생해도 전파하지 않는다."""
+        send_message는 aiohttp 세션 생성에서 어떤 예외가 발생해도 전파하지 않는다."""
         config = Config(telegram_bot_token="tok", telegram_chat_id="123")
         reporter = TelegramReporter(config)
 
-        mock_session = MagicMock()
-        mock_session.__aenter__ = AsyncMock(side_effect=exc_type(exc_msg))
-        mock_session.__aexit__ = AsyncMock(return_value=False)
+        async def failing_get_session():
+            raise exc_type(exc_msg)
 
-        with patch("aiohttp.ClientSession", return_value=mock_session):
+        reporter._get_session = failing_get_session
+        with patch("src.telegram_reporter.RETRY_BASE_DELAY", 0):
             # Must not raise
-            asyncio.run(reporter.send_message(message))
+            loop.run_until_complete(reporter._post_message(message))
 
     @given(
         exc_type=exception_types,
         exc_msg=st.text(min_size=0, max_size=100),
     )
-    @settings(max_examples=100)
-    def test_send_message_never_raises_on_post_exception(self, exc_type, exc_msg):
+    def test_send_message_never_raises_on_post_exception(self, loop, exc_type, exc_msg):
         """**Validates: Requirements 7.8**
         send_message는 POST 요청 중 어떤 예외가 발생해도 전파하지 않는다."""
         config = Config(telegram_bot_token="tok", telegram_chat_id="123")
         reporter = TelegramReporter(config)
+        session = _FailingSession(exc_type(exc_msg))
 
-        mock_resp_ctx = MagicMock()
-        mock_resp_ctx.__aenter__ = AsyncMock(side_effect=exc_type(exc_msg))
-        mock_resp_ctx.__aexit__ = AsyncMock(return_value=False)
-
-        mock_session_instance = MagicMock()
-        mock_session_instance.post = MagicMock(return_value=mock_resp_ctx)
-        mock_session_ctx = MagicMock()
-        mock_session_ctx.__aenter__ = AsyncMock(return_value=mock_session_instance)
-        mock_session_ctx.__aexit__ = AsyncMock(return_value=False)
+        async def get_session():
+            return session
 
-        with patch("aiohttp.ClientSession", return_value=mock_session_ctx):
+        reporter._get_session = get_session
+        with patch("src.telegram_reporter.RETRY_BASE_DELAY", 0):
             # Must not raise
-            asyncio.run(reporter.send_message("test message"))
+            loop.run_until_complete(reporter._post_message("test message"))
+        assert session.post_count >= 1
 
 
 # --- 단위 테스트: 봇 토큰 미설정 시 비활성화 ---
@@ -119,43 +156,143 @@ class TestDisabledWhenNoToken:
         reporter = TelegramReporter(config_with_token)
         assert reporter.enabled is True
 
-    def test_send_message_returns_immediately_when_disabled(self, disabled_reporter):
+    def test_send_message_returns_immediately_when_disabled(self, loop, disabled_reporter):
         """비활성화 상태에서 send_message는 HTTP 요청 없이 즉시 반환"""
         with patch("aiohttp.ClientSession") as mock_cls:
-            asyncio.run(disabled_reporter.send_message("hello"))
+            loop.run_until_complete(disabled_reporter.send_message("hello"))
             mock_cls.assert_not_called()
 
-    def test_send_startup_report_noop_when_disabled(self, disabled_reporter, config_without_token):
+    def test_send_startup_report_noop_when_disabled(self, loop, disabled_reporter, config_without_token):
         with patch("aiohttp.ClientSession") as mock_cls:
-            asyncio.run(disabled_reporter.send_startup_report(config_without_token))
+            loop.run_until_complete(disabled_reporter.send_startup_report(config_without_token))
             mock_cls.assert_not_called()
 
-    def test_send_flush_report_noop_when_disabled(self, disabled_reporter):
+    def test_send_flush_report_noop_when_disabled(self, loop, disabled_reporter):
         with patch("aiohttp.ClientSession") as mock_cls:
-            asyncio.run(disabled_reporter.send_flush_report({"BTC": {"record_count": 10}}))
+            loop.run_until_complete(disabled_reporter.send_flush_report({"BTC": {"record_count": 10}}))
             mock_cls.assert_not_called()
 
-    def test_send_disconnect_alert_noop_when_disabled(self, disabled_reporter):
+    def test_send_disconnect_alert_noop_when_disabled(self, loop, disabled_reporter):
         with patch("aiohttp.ClientSession") as mock_cls:
-            asyncio.run(disabled_reporter.send_disconnect_alert("timeout"))
+            loop.run_until_complete(disabled_reporter.send_disconnect_alert("timeout"))
             mock_cls.assert_not_called()
 
-    def test_send_reconnect_alert_noop_when_disabled(self, disabled_reporter):
+    def test_send_reconnect_alert_noop_when_disabled(self, loop, disabled_reporter):
         with patch("aiohttp.ClientSession") as mock_cls:
-            asyncio.run(disabled_reporter.send_reconnect_alert(5.0))
+            loop.run_until_complete(disabled_reporter.send_reconnect_alert(5.0))
             mock_cls.assert_not_called()
 
-    def test_send_gap_alert_noop_when_disabled(self, disabled_reporter):
+    def test_send_gap_alert_noop_when_disabled(self, loop, disabled_reporter):
         with patch("aiohttp.ClientSession") as mock_cls:
-            asyncio.run(disabled_reporter.send_gap_alert("BTCUSDT", 100, 105))
+            loop.run_until_complete(disabled_reporter.send_gap_alert("BTCUSDT", 100, 105))
             mock_cls.assert_not_called()
 
-    def test_send_daily_report_noop_when_disabled(self, disabled_reporter):
+    def test_send_methods_bound_to_noop_when_disabled(self, disabled_reporter, reporter):
+        for name in TelegramReporter._SEND_METHODS:
+            assert getattr(disabled_reporter, name) == TelegramReporter._noop
+            assert getattr(reporter, name) != TelegramReporter._noop
+
+    def test_send_daily_report_noop_when_disabled(self, loop, disabled_reporter):
         with patch("aiohttp.ClientSession") as mock_cls:
-            asyncio.run(disabled_reporter.send_daily_report({"total_records": 1000}))
+            loop.run_until_complete(disabled_reporter.send_daily_report({"total_records": 1000}))
             mock_cls.assert_not_called()
 
 
+# --- 단위 테스트: 세션 재사용 / 알림 묶음 전송 ---
+
+class TestBatchedSend:
+    """연속 알림은 세션 하나로, 한 메시지로 묶어 전송"""
+
+    def test_burst_coalesced_into_one_post(self, loop, reporter):
+        mock_session = _mock_session()
+
+        async def run():
+            with patch("aiohttp.ClientSession", return_value=mock_session) as mock_cls:
+                await reporter.send_message("one")
+                await reporter.send_message("two")
+                await reporter.aclose()
+                return mock_cls.call_count
+
+        assert loop.run_until_complete(run()) == 1
+        mock_session.post.assert_called_once()
+        url = mock_session.post.call_args.args[0]
+        assert url.endswith("/bottest-bot-token/sendMessage")
+        payload = json.loads(mock_session.post.call_args.kwargs["data"])
+        assert payload == {"chat_id": "12345", "parse_mode": "HTML", "text": "one\n\ntwo"}
+        mock_session.close.assert_awaited_once()
+
+    def test_urgent_alert_skips_batch_window(self, loop, reporter):
+        mock_session = _mock_session()
+
+        async def run():
+            with patch("aiohttp.ClientSession", return_value=mock_session):
+                await reporter.send_disconnect_alert("reset")
+                await asyncio.wait_for(reporter._queue.join(), timeout=0.2)
+                await reporter.aclose()
+
+        loop.run_until_complete(run())
+        assert "reset" in json.loads(mock_session.post.call_args.kwargs["data"])["text"]
+
+    def test_coalesce_respects_length_limit(self):
+        texts = ["a" * 3000, "b" * 1000, "c" * 200]
+        merged = TelegramReporter._coalesce(texts)
+        assert merged == ["a" * 3000 + "\n\n" + "b" * 1000, "c" * 200]
+
+
+# --- 단위 테스트: 재시도 / 서킷 브레이커 ---
+
+class TestRetryAndBreaker:
+    """일시 장애는 재시도, 영구 오류는 즉시 포기, 연속 실패 시 차단"""
+
+    def _post(self, loop, reporter, mock_session):
+        # 공유 세션 getter를 직접 대체 - 실제 커넥터(SSL 컨텍스트/DNS 캐시) 생성 없음
+        with patch.object(reporter, "_get_session", AsyncMock(return_value=mock_session)), \
+                patch("src.telegram_reporter.RETRY_BASE_DELAY", 0):
+            loop.run_until_complete(reporter._post_message("hi"))
+
+    def test_server_error_retried(self, loop, reporter):
+        session = _mock_session(502)
+        self._post(loop, reporter, session)
+        assert session.post.call_count == 3
+
+    def test_auth_error_not_retried(self, loop, reporter):
+        session = _mock_session(401)
+        self._post(loop, reporter, session)
+        assert session.post.call_count == 1
+        assert reporter._breaker.failures == 0
+
+    def test_breaker_opens_and_short_circuits(self, loop, reporter):
+        session = _mock_session(500)
+        self._post(loop, reporter, session)
+        self._post(loop, reporter, session)  # 누적 5회 실패 → OPEN
+        assert reporter._breaker.state == CircuitBreaker.OPEN
+        calls = session.post.call_count
+        self._post(loop, reporter, session)
+        assert session.post.call_count == calls
+
+    def test_breaker_half_open_after_timeout(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.0)
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+# --- 단위 테스트: 바이트 단위 변환 ---
+
+class TestFormatBytes:
+
+    @pytest.mark.parametrize("size,expected", [
+        (0, "0B"), (1023, "1023B"), (1024, "1.0KB"), (1536, "1.5KB"),
+        (1024 ** 2 - 1, "1024.0KB"), (1024 ** 2, "1.0MB"),
+        (5 * 1024 ** 3, "5.00GB"), (3 * 1024 ** 4, "3072.00GB"),
+    ])
+    def test_unit_boundaries(self, size, expected):
+        assert TelegramReporter._format_bytes(size) == expected
+
+
 # --- 단위 테스트: 메시지 포맷 검증 ---
 
 class TestMessageFormat:
@@ -173,53 +310,53 @@ class TestMessageFormat:
         reporter.send_message = capture
         self.reporter = reporter
 
-    def test_startup_report_contains_symbols(self, config_with_token):
-        asyncio.run(self.reporter.send_startup_report(config_with_token))
+    def test_startup_report_contains_symbols(self, loop, config_with_token):
+        loop.run_until_complete(self.reporter.send_startup_report(config_with_token))
         assert len(self.sent_messages) == 1
         msg = self.sent_messages[0]
-        assert "시작" in msg
+        assert "SYSTEM ONLINE" in msg
         assert "BTCUSDT" in msg
         assert "ETHUSDT" in msg
         assert "XRPUSDT" in msg
 
-    def test_startup_report_contains_flush_interval(self, config_with_token):
-        asyncio.run(self.reporter.send_startup_report(config_with_token))
+    def test_startup_report_contains_flush_interval(self, loop, config_with_token):
+        loop.run_until_complete(self.reporter.send_startup_report(config_with_token))
         msg = self.sent_messages[0]
         assert str(config_with_token.flush_interval) in msg
 
-    def test_flush_report_contains_symbol_stats(self):
+    def test_flush_report_contains_symbol_stats(self, loop):
         stats = {
             "BTCUSDT": {"record_count": 1000, "file_size": 51200, "gaps": 2},
             "ETHUSDT": {"record_count": 500, "file_size": 25600, "gaps": 0},
         }
-        asyncio.run(self.reporter.send_flush_report(stats))
+        loop.run_until_complete(self.reporter.send_flush_report(stats))
         msg = self.sent_messages[0]
         assert "BTCUSDT" in msg
-        assert "1000" in msg
+        assert "1,000" in msg
         assert "ETHUSDT" in msg
         assert "갭" in msg
 
-    def test_disconnect_alert_contains_reason(self):
-        asyncio.run(self.reporter.send_disconnect_alert("connection reset"))
+    def test_disconnect_alert_contains_reason(self, loop):
+        loop.run_until_complete(self.reporter.send_disconnect_alert("connection reset"))
         msg = self.sent_messages[0]
-        assert "끊김" in msg
+        assert "CONNECTION LOST" in msg
         assert "connection reset" in msg
 
-    def test_reconnect_alert_contains_downtime(self):
-        asyncio.run(self.reporter.send_reconnect_alert(12.5))
+    def test_reconnect_alert_contains_downtime(self, loop):
+        loop.run_until_complete(self.reporter.send_reconnect_alert(12.5))
         msg = self.sent_messages[0]
-        assert "재연결" in msg
+        assert "RECONNECTED" in msg
         assert "12.5" in msg
 
-    def test_gap_alert_contains_ids(self):
-        asyncio.run(self.reporter.send_gap_alert("BTCUSDT", 100, 105))
+    def test_gap_alert_contains_ids(self, loop):
+        loop.run_until_complete(self.reporter.send_gap_alert("BTCUSDT", 100, 105))
         msg = self.sent_messages[0]
-        assert "갭" in msg
+        assert "GAP DETECTED" in msg
         assert "BTCUSDT" in msg
         assert "100" in msg
         assert "105" in msg
 
-    def test_daily_report_contains_stats(self):
+    def test_daily_report_contains_stats(self, loop):
         daily = {
             "total_records": 50000,
             "coverage": 0.985,
@@ -228,8 +365,48 @@ class TestMessageFormat:
             "gap_count": 3,
             "reconnect_count": 1,
         }
-        asyncio.run(self.reporter.send_daily_report(daily))
+        loop.run_until_complete(self.reporter.send_daily_report(daily))
         msg = self.sent_messages[0]
         assert "50,000" in msg
-        assert "98.5%" in msg
+        assert "98.50%" in msg
         assert "120.5" in msg
+
+    def test_symbol_cell_cached(self):
+        cell = self.reporter._sym_cell("BTCUSDT")
+        assert cell == "<code>BTCUSDT   </code>"
+        assert self.reporter._sym_cell("BTCUSDT") is cell
+
+    def test_flush_report_totals(self, loop):
+        stats = {
+            "BTCUSDT": {"record_count": 1000, "file_size": 2048, "gaps": 2},
+            "ETHUSDT": {"record_count": 500, "file_size": 1024},
+        }
+        loop.run_until_complete(self.reporter.send_flush_report(stats))
+        msg = self.sent_messages[0]
+        assert "총 <b>1,500</b>건" in msg
+        assert "<b>3.0KB</b>" in msg
+        assert "갭 <b>2</b>회" in msg
+        assert "🔴 <code>BTCUSDT   </code>" in msg
+        assert "🟢 <code>ETHUSDT   </code>" in msg
+
+    def test_live_ticker_warming_up_skips_buffer_scan(self, loop):
+        from src.orderbook_manager import OrderBookManager
+        mgr = OrderBookManager(["btcusdt"])
+        buffer = MagicMock()
+        loop.run_until_complete(self.reporter.send_live_ticker(mgr, buffer))
+        assert "WARMING UP" in self.sent_messages[0]
+        buffer.estimate_memory_usage.assert_not_called()
+
+    def test_live_ticker_reports_initialized_books(self, loop):
+        from src.buffer import DataBuffer
+        from src.orderbook_manager import ASK_SIGN, BID_SIGN, OrderBookManager, make_book_side
+        mgr = OrderBookManager(["btcusdt", "ethusdt"])
+        state = mgr.books["BTCUSDT"]
+        state.bids = make_book_side([["100.0", "1"]], BID_SIGN)
+        state.asks = make_book_side([["100.02", "1"]], ASK_SIGN)
+        state.initialized = True
+        loop.run_until_complete(self.reporter.send_live_ticker(mgr, DataBuffer()))
+        msg = self.sent_messages[0]
+        assert "LIVE TICKER" in msg
+        assert "$    100.01" in msg
+        assert "초기화 중" in msg  # ETHUSDT
@@ -5,14 +5,18 @@ NTP 측정, 바이낸스 오프셋 측정, 경고 트리거 검증
 
 import asyncio
 import json
+import struct
 import tempfile
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import aiohttp
 import pytest
 
 from src.config import Config
-from src.time_sync_monitor import TimeSyncMonitor
+from src.time_sync_monitor import (
+    ALERT_COOLDOWN, MEASURE_INTERVAL, NTP_EPOCH_DELTA, TimeSyncMonitor, sntp_offset,
+)
 
 
 @pytest.fixture
@@ -25,61 +29,122 @@ def monitor(config):
     return TimeSyncMonitor(config)
 
 
+def _sntp_response(t2: float, t3: float) -> bytes:
+    """수신/송신 타임스탬프만 채운 48바이트 SNTP 응답"""
+    def ntp(t):
+        sec = t + NTP_EPOCH_DELTA
+        return struct.pack("!II", int(sec), int((sec % 1) * 2 ** 32))
+    return bytes(32) + ntp(t2) + ntp(t3)
+
+
+def _mock_session(json_payload=None, side_effect=None) -> MagicMock:
+    """get()이 json_payload 응답(async with)을 돌려주거나 side_effect를 내는 세션 mock"""
+    mock_resp = MagicMock(spec=aiohttp.ClientResponse)
+    mock_resp.status = 200
+    mock_resp.json = AsyncMock(return_value=json_payload)
+    mock_resp.__aenter__.return_value = mock_resp
+    mock_resp.__aexit__.return_value = False  # 기본 MagicMock 반환값은 참 → 예외를 삼킴
+
+    mock_session = MagicMock(spec=aiohttp.ClientSession)
+    mock_session.closed = False
+    mock_session.get = MagicMock(return_value=mock_resp, side_effect=side_effect)
+    return mock_session
+
+
 class TestNTPMeasurement:
-    """NTP 오프셋 측정 검증"""
+    """SNTP 오프셋 측정 검증"""
+
+    def test_sntp_offset_formula(self):
+        """((T2 - T1) + (T3 - T4)) / 2 - 서버가 0.5초 앞선 경우"""
+        resp = _sntp_response(t2=1000.6, t3=1000.7)
+        assert sntp_offset(resp, t1=1000.0, t4=1000.3) == pytest.approx(0.5, abs=1e-6)
+
+    def test_ntp_returns_float(self, monitor, loop):
+        """UDP 응답 수신 시 오프셋 float 반환"""
+        import time
+
+        async def fake_endpoint(factory, remote_addr):
+            protocol = factory()
+            transport = MagicMock()
+            now = time.time()
+            transport.sendto = lambda data: protocol.datagram_received(
+                _sntp_response(now + 0.25, now + 0.25), remote_addr)
+            return transport, protocol
+
+        async def run():
+            running = asyncio.get_running_loop()
+            with patch.object(running, "create_datagram_endpoint", side_effect=fake_endpoint):
+                return await monitor.measure_ntp_offset()
 
-    def test_ntp_returns_float(self, monitor):
-        """NTP 측정 결과는 float"""
-        # ntplib 없어도 0.0 반환
-        result = asyncio.run(monitor.measure_ntp_offset())
+        result = loop.run_until_complete(run())
         assert isinstance(result, float)
+        assert result == pytest.approx(0.25, abs=0.05)
 
-    def test_ntp_without_ntplib(self, monitor):
-        """ntplib 미설치 시 0.0 반환"""
-        with patch.dict("sys.modules", {"ntplib": None}):
-            result = asyncio.run(monitor.measure_ntp_offset())
-            assert result == 0.0
+    def test_ntp_failure_returns_zero(self, monitor, loop):
+        """UDP 엔드포인트 생성 실패 시 0.0 반환"""
+        async def run():
+            running = asyncio.get_running_loop()
+            with patch.object(running, "create_datagram_endpoint",
+                              side_effect=OSError("no route")):
+                return await monitor.measure_ntp_offset()
+
+        assert loop.run_until_complete(run()) == 0.0
 
 
 class TestBinanceMeasurement:
     """바이낸스 서버 시간 측정 검증"""
 
-    def test_binance_offset_returns_tuple(self, monitor):
+    def test_binance_offset_returns_tuple(self, monitor, loop):
         """바이낸스 측정 결과는 (offset, rtt) 튜플"""
         import time
-        server_time_ms = int(time.time() * 1000)
-
-        mock_resp = MagicMock()
-        mock_resp.status = 200
-        mock_resp.json = AsyncMock(return_value={"serverTime": server_time_ms})
-        mock_resp.__aenter__ = AsyncMock(return_value=mock_resp)
-        mock_resp.__aexit__ = AsyncMock(return_value=False)
+        server_time_ms = time.time_ns() // 1_000_000
 
-        mock_session = MagicMock()
-        mock_session.get = MagicMock(return_value=mock_resp)
-        mock_session.__aenter__ = AsyncMock(return_value=mock_session)
-        mock_session.__aexit__ = AsyncMock(return_value=False)
+        mock_session = _mock_session(json_payload={"serverTime": server_time_ms})
 
         async def run():
-            with patch("aiohttp.ClientSession", return_value=mock_session):
-                return await monitor.measure_binance_offset()
+            with patch("aiohttp.ClientSession", return_value=mock_session) as mock_cls:
+                first = await monitor.measure_binance_offset()
+                await monitor.measure_binance_offset()
+                assert mock_cls.call_count == 1  # 두 번째 측정은 세션 재사용
+                return first
 
-        offset, rtt = asyncio.run(run())
+        offset, rtt = loop.run_until_complete(run())
         assert isinstance(offset, float)
         assert isinstance(rtt, float)
         assert rtt >= 0
-
-    def test_binance_failure_returns_zeros(self, monitor):
+        assert mock_session.get.call_count == 2
+
+    def test_binance_offset_integer_arithmetic(self, monitor, loop):
+        """서버가 중간 시각보다 정확히 1.5초 앞서면 오프셋 1.5초 (ns 정수 계산)"""
+        mock_session = _mock_session(json_payload={"serverTime": 1_700_000_001_600})
+        monitor._session = mock_session
+        with patch("src.time_sync_monitor.time.time_ns", return_value=1_700_000_000_000_000_000), \
+                patch("src.time_sync_monitor.time.monotonic_ns", side_effect=[0, 200_000_000]):
+            offset, rtt = loop.run_until_complete(monitor.measure_binance_offset())
+        assert offset == 1.5
+        assert rtt == 0.2
+
+    def test_rtt_ignores_wall_clock_step(self, monitor, loop):
+        """측정 중 벽시계가 뒤로 점프해도 RTT는 monotonic 기준 (음수 아님)"""
+        monitor._session = _mock_session(json_payload={"serverTime": 1_700_000_000_000})
+        # 두 번째 벽시계 값은 1초 뒤로 점프 - RTT를 벽시계 차이로 구하면 -0.95초가 됨
+        with patch("src.time_sync_monitor.time.time_ns",
+                   side_effect=[1_700_000_000_000_000_000, 1_699_999_999_050_000_000]) as time_ns, \
+                patch("src.time_sync_monitor.time.monotonic_ns", side_effect=[0, 50_000_000]):
+            offset, rtt = loop.run_until_complete(monitor.measure_binance_offset())
+        assert time_ns.call_count == 1  # 벽시계는 요청 직전 한 번만 읽음
+        assert rtt == 0.05
+        assert offset == -0.025  # 서버 시각 - (첫 벽시계 값 + RTT/2)
+
+    def test_binance_failure_returns_zeros(self, monitor, loop):
         """바이낸스 측정 실패 시 (0.0, 0.0) 반환"""
-        mock_session = MagicMock()
-        mock_session.__aenter__ = AsyncMock(side_effect=ConnectionError("fail"))
-        mock_session.__aexit__ = AsyncMock(return_value=False)
+        mock_session = _mock_session(side_effect=ConnectionError("fail"))
 
         async def run():
             with patch("aiohttp.ClientSession", return_value=mock_session):
                 return await monitor.measure_binance_offset()
 
-        offset, rtt = asyncio.run(run())
+        offset, rtt = loop.run_until_complete(run())
         assert offset == 0.0
         assert rtt == 0.0
 
@@ -87,55 +152,156 @@ class TestBinanceMeasurement:
 class TestSaveMeasurement:
     """측정 결과 저장 검증"""
 
-    def test_save_creates_json_file(self, monitor, config):
-        asyncio.run(monitor.save_measurement(0.005, -0.002, 0.05))
+    def test_save_creates_jsonl_file(self, monitor, config, loop):
+        loop.run_until_complete(monitor.save_measurement(0.005, -0.002, 0.05))
 
         log_dir = Path(config.log_dir)
-        json_files = list(log_dir.glob("time_sync_*.json"))
-        assert len(json_files) == 1
+        files = list(log_dir.glob("time_sync_*.jsonl"))
+        assert len(files) == 1
 
-        with open(json_files[0]) as f:
-            data = json.load(f)
+        data = TimeSyncMonitor.read_measurements(files[0])
         assert len(data) == 1
         assert "ntp_offset_sec" in data[0]
         assert "binance_offset_sec" in data[0]
         assert "rtt_sec" in data[0]
 
-    def test_save_appends_to_existing(self, monitor, config):
-        asyncio.run(monitor.save_measurement(0.005, -0.002, 0.05))
-        asyncio.run(monitor.save_measurement(0.010, -0.001, 0.04))
+    def test_save_appends_to_existing(self, monitor, config, loop):
+        loop.run_until_complete(monitor.save_measurement(0.005, -0.002, 0.05))
+        loop.run_until_complete(monitor.save_measurement(0.010, -0.001, 0.04))
 
         log_dir = Path(config.log_dir)
-        json_files = list(log_dir.glob("time_sync_*.json"))
-        with open(json_files[0]) as f:
-            data = json.load(f)
+        files = list(log_dir.glob("time_sync_*.jsonl"))
+        lines = files[0].read_text().splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[1])["ntp_offset_sec"] == 0.010
+
+    def test_path_cached_until_utc_date_changes(self, monitor, config):
+        """같은 날짜는 캐시된 경로 재사용, 날짜가 바뀌면 새 파일"""
+        from datetime import datetime, timezone
+        day1 = datetime(2024, 1, 15, 23, 50, tzinfo=timezone.utc)
+        day2 = datetime(2024, 1, 16, 0, 0, tzinfo=timezone.utc)
+        first = monitor._measurement_path(day1)
+        assert monitor._measurement_path(day1) is first
+        assert first.name == "time_sync_20240115.jsonl"
+        assert monitor._measurement_path(day2).name == "time_sync_20240116.jsonl"
+
+    def test_legacy_json_array_migrated(self, config, loop):
+        from datetime import datetime, timezone
+        log_dir = Path(config.log_dir)
+        log_dir.mkdir(parents=True)
+        day = datetime.now(timezone.utc).strftime("%Y%m%d")
+        legacy = log_dir / f"time_sync_{day}.json"
+        legacy.write_text(json.dumps([{"timestamp": "old", "rtt_sec": 0.1}]))
+
+        monitor = TimeSyncMonitor(config)
+        loop.run_until_complete(monitor.save_measurement(0.0, 0.0, 0.02))
+
+        assert not legacy.exists()
+        data = TimeSyncMonitor.read_measurements(log_dir / f"time_sync_{day}.jsonl")
+        assert [d["timestamp"] for d in data][0] == "old"
         assert len(data) == 2
 
+    def test_legacy_files_from_previous_days_migrated_at_start(self, config):
+        """오늘이 아닌 날짜의 JSON 배열 파일도 시작 시 전부 JSONL로 변환 (저장 없이도)"""
+        log_dir = Path(config.log_dir)
+        log_dir.mkdir(parents=True)
+        for day in ("20240114", "20240115"):
+            (log_dir / f"time_sync_{day}.json").write_text(
+                json.dumps([{"timestamp": day, "rtt_sec": 0.1}, {"timestamp": day, "rtt_sec": 0.2}]))
+
+        TimeSyncMonitor(config)
+
+        assert not list(log_dir.glob("time_sync_*.json"))
+        for day in ("20240114", "20240115"):
+            data = TimeSyncMonitor.read_measurements(log_dir / f"time_sync_{day}.jsonl")
+            assert [d["rtt_sec"] for d in data] == [0.1, 0.2]
+            assert {d["timestamp"] for d in data} == {day}
+
 
 class TestNTPAlert:
     """NTP 오프셋 경고 트리거 검증"""
 
-    def test_alert_when_offset_exceeds_threshold(self, config):
+    def test_alert_when_offset_exceeds_threshold(self, config, loop):
+        """run() 한 사이클: NTP/바이낸스 동시 측정 후 100ms 초과 오프셋이면 경고 전송"""
         mock_telegram = MagicMock()
         mock_telegram.send_message = AsyncMock()
         monitor = TimeSyncMonitor(config, telegram=mock_telegram)
+        started = []
+        real_sleep = asyncio.sleep
+
+        async def ntp():
+            started.append("ntp")
+            await real_sleep(0)
+            assert "binance" in started  # gather: 바이낸스 측정이 NTP 완료를 기다리지 않음
+            return 0.15
+
+        async def binance():
+            started.append("binance")
+            return 0.0, 0.05
 
-        # 100ms 초과 오프셋
-        with patch.object(monitor, "measure_ntp_offset", return_value=AsyncMock(return_value=0.15)()):
-            with patch.object(monitor, "measure_binance_offset", return_value=AsyncMock(return_value=(0.0, 0.05))()):
-                with patch.object(monitor, "save_measurement", new_callable=AsyncMock):
-                    # run() 대신 한 사이클만 실행
-                    async def one_cycle():
-                        ntp_offset = 0.15
-                        binance_offset, rtt = 0.0, 0.05
-                        await monitor.save_measurement(ntp_offset, binance_offset, rtt)
-                        if abs(ntp_offset) > 0.1 and monitor.telegram:
-                            await monitor.telegram.send_message(
-                                f"⏰ NTP 오프셋 경고: {ntp_offset*1000:.1f}ms"
-                            )
-
-                    asyncio.run(one_cycle())
+        async def run():
+            with patch.object(monitor, "measure_ntp_offset", side_effect=ntp), \
+                    patch.object(monitor, "measure_binance_offset", side_effect=binance), \
+                    patch.object(monitor, "save_measurement", new=AsyncMock()) as save, \
+                    patch("src.time_sync_monitor.asyncio.sleep",
+                          side_effect=asyncio.CancelledError):
+                try:
+                    await monitor.run()
+                except asyncio.CancelledError:
+                    pass
+                save.assert_awaited_once_with(0.15, 0.0, 0.05)
+
+        loop.run_until_complete(run())
 
         mock_telegram.send_message.assert_called_once()
         call_text = mock_telegram.send_message.call_args[0][0]
         assert "150.0ms" in call_text
+
+    def test_alert_cooldown_suppresses_duplicates(self, config, loop):
+        """오프셋이 계속 틀어져 있어도 쿨다운 안에서는 경고 1회, 지나면 다시 전송"""
+        mock_telegram = MagicMock()
+        mock_telegram.send_message = AsyncMock()
+        monitor = TimeSyncMonitor(config, telegram=mock_telegram)
+
+        with patch("src.time_sync_monitor.time.monotonic", return_value=1000.0):
+            loop.run_until_complete(monitor._maybe_alert("ntp_offset", "a"))
+        with patch("src.time_sync_monitor.time.monotonic", return_value=1000.0 + MEASURE_INTERVAL):
+            loop.run_until_complete(monitor._maybe_alert("ntp_offset", "b"))
+        assert mock_telegram.send_message.call_count == 1
+
+        with patch("src.time_sync_monitor.time.monotonic", return_value=1000.0 + ALERT_COOLDOWN):
+            loop.run_until_complete(monitor._maybe_alert("ntp_offset", "c"))
+        assert [c.args[0] for c in mock_telegram.send_message.call_args_list] == ["a", "c"]
+
+
+class TestRunSchedule:
+    """측정 주기 드리프트 보정 검증"""
+
+    def test_sleep_subtracts_measurement_time(self, monitor, loop):
+        """측정에 걸린 시간만큼 다음 대기가 줄어듦 (절대 마감 시각)"""
+        sleeps = []
+
+        async def slow_ntp():
+            await real_sleep(0.05)
+            return 0.0
+
+        async def fake_sleep(delay):
+            sleeps.append(delay)
+            raise asyncio.CancelledError
+
+        real_sleep = asyncio.sleep
+
+        async def run():
+            with patch.object(monitor, "measure_ntp_offset", side_effect=slow_ntp), \
+                    patch.object(monitor, "measure_binance_offset",
+                                 new=AsyncMock(return_value=(0.0, 0.01))), \
+                    patch.object(monitor, "save_measurement", new=AsyncMock()), \
+                    patch("src.time_sync_monitor.asyncio.sleep", side_effect=fake_sleep):
+                try:
+                    await monitor.run()
+                except asyncio.CancelledError:
+                    pass
+
+        loop.run_until_complete(run())
+        assert len(sleeps) == 1
+        assert 595 < sleeps[0] < 599.96